@@ -0,0 +1,115 @@
+"""
+Общий HTTP-клиент настольных приложений.
+
+Все запросы к серверу идут через одну requests.Session на базовый адрес,
+поэтому TCP/TLS-соединения переиспользуются между запросами, а не
+открываются заново на каждую строку.
+
+Большие тела запросов (пакеты строк) отправляются сжатыми gzip, а ответы
+запрашиваются со сжатием (Accept-Encoding) и распаковываются requests.
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from retry_policy import CircuitBreaker
+
+# Основной сервер заданий (test.py, netr.py)
+API_BASE_URL = os.environ.get('PACKER_API_URL', 'http://10.171.12.36:3005')
+
+# Сервер старого приложения на Tkinter (main.py)
+LEGACY_API_BASE_URL = os.environ.get('PACKER_LEGACY_API_URL', 'https://corrywilliams.ru')
+
+# Таймаут запроса по умолчанию: (подключение, чтение), секунды
+DEFAULT_TIMEOUT = (10, 30)
+
+# Размер пула соединений; должен быть не меньше числа параллельных запросов загрузки
+POOL_MAXSIZE = 32
+
+# Сжатие ответов сервера, которое принимает клиент
+ACCEPT_ENCODING = 'gzip, deflate'
+
+# Тела запросов меньше этого размера не сжимаются: выигрыш меньше затрат
+COMPRESS_MIN_BYTES = 1024
+
+# Уровень gzip: 5 сжимает JSON почти как 9, но в несколько раз быстрее
+COMPRESS_LEVEL = 5
+
+# Ответ сервера, который не принимает сжатое тело запроса
+UNSUPPORTED_ENCODING_STATUS = 415
+
+
+class ApiClient:
+    """Клиент сервера с постоянной сессией и пулом keep-alive соединений."""
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, pool_maxsize=POOL_MAXSIZE, compress_requests=True):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        # Отключается сама, если сервер ответил, что не принимает сжатые тела
+        self.compress_requests = compress_requests
+        self.session = requests.Session()
+        self.session.headers.update({'Connection': 'keep-alive', 'Accept-Encoding': ACCEPT_ENCODING})
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Общий для всех загрузок через этот клиент: при сбоях сервера приостанавливает их все
+        self.breaker = CircuitBreaker()
+
+    def url(self, path):
+        """Возвращает полный адрес для пути относительно базового адреса."""
+        if path.startswith(('http://', 'https://')):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, self.url(path), **kwargs)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, compress=False, **kwargs):
+        """
+        POST-запрос. compress=True - тело из json= отправляется сжатым gzip,
+        если оно не меньше COMPRESS_MIN_BYTES и сервер принимает сжатие.
+        """
+        if not (compress and self.compress_requests and 'json' in kwargs):
+            return self.request('POST', path, **kwargs)
+
+        body = json.dumps(kwargs.pop('json'), ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+        body = body.encode('utf-8')
+        headers = {'Content-Type': 'application/json; charset=utf-8', **(kwargs.pop('headers', None) or {})}
+        if len(body) < COMPRESS_MIN_BYTES:
+            return self.request('POST', path, data=body, headers=headers, **kwargs)
+
+        response = self.request('POST', path, data=gzip.compress(body, COMPRESS_LEVEL),
+                                headers={**headers, 'Content-Encoding': 'gzip'}, **kwargs)
+        if response.status_code == UNSUPPORTED_ENCODING_STATUS:
+            logging.warning(f'Сервер {self.base_url} не принимает сжатые запросы, отправляем без сжатия.')
+            self.compress_requests = False
+            response = self.request('POST', path, data=body, headers=headers, **kwargs)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url=None):
+    """Возвращает общий клиент для базового адреса (по умолчанию - API_BASE_URL)."""
+    base_url = (base_url or API_BASE_URL).rstrip('/')
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = ApiClient(base_url)
+        return client
@@ -0,0 +1,130 @@
+"""
+Журнал настольных приложений.
+
+Записи из всех потоков кладутся в очередь, а форматирует и пишет их в файл
+и консоль отдельный фоновый поток (QueueListener), поэтому загрузка не ждет
+диск. Файл application.log ограничен по размеру и ротируется. Если очередь
+переполнена, отладочные и информационные записи пропускаются (с отметкой
+о количестве пропущенных), а предупреждения и ошибки ждут места в очереди
+и не теряются никогда.
+"""
+import atexit
+import itertools
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE_NAME = 'application.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Ротация журнала: размер одного файла и количество старых файлов
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Записей в очереди, ожидающих фонового потока
+LOG_QUEUE_SIZE = 10000
+
+# Строки загрузки: первые PAYLOAD_LOG_FIRST пишутся полностью, дальше - каждая PAYLOAD_LOG_EVERY-я
+PAYLOAD_LOG_FIRST = 5
+PAYLOAD_LOG_EVERY = 1000
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Кладет записи в очередь без форматирования; при переполнении пропускает только записи ниже WARNING."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Сообщение собирается из msg и args в фоновом потоке. Аргументы
+        # (строки загрузки) после записи в журнал не изменяются.
+        return record
+
+    def enqueue(self, record):
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                with self.dropped_lock:
+                    self.dropped += 1
+                return
+
+        if self.dropped:
+            with self.dropped_lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                self.queue.put(logging.makeLogRecord({
+                    'name': record.name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': 'Очередь журнала переполнена, пропущено записей: %d', 'args': (dropped,)}))
+
+
+class LogListener(QueueListener):
+    """Фоновый поток записи журнала; при остановке дожидается места в очереди, а не теряет хвост записей."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        # Может вызываться и приложением, и при выходе (atexit)
+        if self._thread is not None:
+            super().stop()
+
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level=logging.DEBUG, log_file=LOG_FILE_NAME):
+    """
+    Настраивает корневой логгер приложения (вместо logging.basicConfig).
+    Повторный вызов ничего не меняет. Оставшиеся в очереди записи
+    дописываются при выходе из программы.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                        encoding='utf-8', delay=True)]
+        # В собранном exe без консоли sys.stderr отсутствует
+        if sys.stderr is not None:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(NonBlockingQueueHandler(log_queue))
+        root.setLevel(level)
+
+        _listener = LogListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
+
+
+class SampledLog:
+    """
+    Журнал частых однотипных записей (строки загрузки): пишет первые first
+    записей и затем каждую every-ю, остальные пропускает без форматирования.
+    """
+
+    def __init__(self, first=PAYLOAD_LOG_FIRST, every=PAYLOAD_LOG_EVERY):
+        self.first = first
+        self.every = every
+        self.calls = itertools.count()
+
+    def log(self, level, msg, *args):
+        call = next(self.calls)
+        if call < self.first or call % self.every == 0:
+            logging.log(level, msg, *args)
@@ -0,0 +1,18 @@
+import os
+
+
+def home_dir():
+    """Домашняя папка пользователя (USERPROFILE в Windows)."""
+    return os.getenv('USERPROFILE') if os.name == 'nt' else os.path.expanduser('~')
+
+
+def app_data_dir(*parts):
+    """Возвращает (и создает) папку для служебных файлов приложения."""
+    path = os.path.join(home_dir(), '.packer_desktop', *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def downloads_dir():
+    """Папка загрузок пользователя, куда сохраняются скачанные отчеты."""
+    return os.path.join(home_dir(), 'Downloads')
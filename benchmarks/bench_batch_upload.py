@@ -0,0 +1,47 @@
+"""
+Скорость загрузки строк (строк/сек) в зависимости от размера пакета.
+
+Запуск из корня проекта: python -m benchmarks.bench_batch_upload --rows 5000 --latency 0.02
+"""
+import argparse
+import time
+
+import mock_server
+from api_client import ApiClient
+from retry_policy import RetryPolicy
+from upload_engine import RowUploader
+
+
+def make_payloads(count):
+    return [{'Artikul': 1000000 + index, 'SHK': str(4600000000000 + index), 'Itog_Zakaz': 10,
+             'Nazvanie_Zadaniya': 'WB bench.xlsx', 'pref': 'WB', 'Status': 0, 'Status_Zadaniya': 0}
+            for index in range(count)]
+
+
+def measure(base_url, payloads, batch_size):
+    uploader = RowUploader(ApiClient(base_url), '/upload-data-new', batch_size=batch_size, timeout=30,
+                           retry_policy=RetryPolicy(base_delay=0.1))
+    started = time.perf_counter()
+    uploader.upload(payloads)
+    return len(payloads) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02, help='задержка заглушки на запрос, секунды')
+    parser.add_argument('--sizes', default='1,50,100,500,1000', help='размеры пакетов через запятую')
+    args = parser.parse_args()
+
+    server = mock_server.start_server(latency=args.latency)
+    payloads = make_payloads(args.rows)
+    try:
+        print(f'{"пакет":>8} {"строк/сек":>12}')
+        for batch_size in (int(size) for size in args.sizes.split(',')):
+            print(f'{batch_size:>8} {measure(server.base_url, payloads, batch_size):>12.1f}')
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Пакетная загрузка и скачивание задания со сжатием и без него через
+заглушку сервера с ограниченной пропускной способностью канала (медленный
+VPN склада). Показывает байты тел запросов и ответов в сети и общее время.
+
+Запуск из корня проекта: python -m benchmarks.bench_compression --rows 20000 --bandwidth 256 --latency 0.05
+"""
+import argparse
+import time
+
+import mock_server
+from api_client import ApiClient
+from benchmarks.bench_payload_builder import CONSTANTS, make_sheet, vectorized_payloads
+from upload_engine import IDEMPOTENCY_FIELD, RowUploader
+from upload_journal import idempotency_key
+
+
+def run(payloads, compressed, bandwidth, latency, batch_size):
+    """Загружает строки и скачивает их обратно; возвращает замеры."""
+    server = mock_server.start_server(latency=latency, bandwidth=bandwidth)
+    client = ApiClient(server.base_url, timeout=(10, 600), compress_requests=compressed)
+    backend = server.backend
+    try:
+        started = time.perf_counter()
+        RowUploader(client, '/upload-data-new', batch_size=batch_size).upload(payloads)
+        upload_seconds = time.perf_counter() - started
+        upload_bytes = backend.bytes_received
+
+        headers = None if compressed else {'Accept-Encoding': 'identity'}
+        started = time.perf_counter()
+        response = client.get('/download', params={'task': CONSTANTS['Nazvanie_Zadaniya']}, headers=headers,
+                              stream=True)
+        # Задание WB: строки задания в dataSet2 (dataSet1 - отсканированные короба)
+        body = response.json()
+        rows = len(body['dataSet2'] or body['dataSet1'])
+        download_seconds = time.perf_counter() - started
+        if rows != len(payloads):
+            raise SystemExit(f'Ошибка: скачано {rows} строк из {len(payloads)}')
+        return upload_bytes, upload_seconds, backend.bytes_sent, download_seconds
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--bandwidth', type=float, default=256, help='пропускная способность канала, КБ/с')
+    parser.add_argument('--latency', type=float, default=0.05, help='задержка ответа сервера, секунды')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    payloads = vectorized_payloads(make_sheet(args.rows))
+    for index, payload in enumerate(payloads):
+        payload[IDEMPOTENCY_FIELD] = idempotency_key('bench', index, payload)
+
+    print(f'Строк: {args.rows}, канал {args.bandwidth:.0f} КБ/с, задержка {args.latency * 1000:.0f} мс')
+    results = {}
+    for compressed in (False, True):
+        results[compressed] = run(payloads, compressed, args.bandwidth * 1024, args.latency, args.batch_size)
+        upload_bytes, upload_seconds, download_bytes, download_seconds = results[compressed]
+        print(f'{"gzip" if compressed else "без сжатия":11} загрузка {upload_bytes / 1024 / 1024:7.2f} МБ '
+              f'за {upload_seconds:6.1f} с, скачивание {download_bytes / 1024 / 1024:7.2f} МБ '
+              f'за {download_seconds:6.1f} с')
+
+    plain, packed = results[False], results[True]
+    print(f'Загрузка: байт в {plain[0] / packed[0]:.1f} раза меньше, быстрее в {plain[1] / packed[1]:.1f} раза')
+    print(f'Скачивание: байт в {plain[2] / packed[2]:.1f} раза меньше, быстрее в {plain[3] / packed[3]:.1f} раза')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Ускорение построчной загрузки в зависимости от числа одновременных запросов.
+
+Запуск из корня проекта: python -m benchmarks.bench_concurrent_upload --rows 1000 --latency 0.05
+"""
+import argparse
+import time
+
+import mock_server
+from api_client import ApiClient
+from benchmarks.bench_batch_upload import make_payloads
+from retry_policy import RetryPolicy
+from upload_engine import ConcurrentUploader
+
+
+def measure(base_url, payloads, max_in_flight):
+    uploader = ConcurrentUploader(ApiClient(base_url), '/uploadData', max_in_flight=max_in_flight, timeout=30,
+                                  retry_policy=RetryPolicy(base_delay=0.1))
+    started = time.perf_counter()
+    uploader.upload(payloads)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.05, help='задержка заглушки на запрос, секунды')
+    parser.add_argument('--workers', default='1,2,4,8,16', help='числа одновременных запросов через запятую')
+    args = parser.parse_args()
+
+    server = mock_server.start_server(latency=args.latency)
+    payloads = make_payloads(args.rows)
+    try:
+        baseline = None
+        print(f'{"запросов":>9} {"время, с":>10} {"строк/сек":>10} {"ускорение":>10}')
+        for workers in (int(value) for value in args.workers.split(',')):
+            elapsed = measure(server.base_url, payloads, workers)
+            baseline = baseline or elapsed
+            print(f'{workers:>9} {elapsed:>10.2f} {len(payloads) / elapsed:>10.1f} {baseline / elapsed:>10.2f}')
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Задержка построчной загрузки с переиспользованием соединения и без него.
+
+Без переиспользования каждая строка отправляется через requests.post
+(новое TCP/TLS-соединение), с переиспользованием - через общий ApiClient.
+По умолчанию замер идет на локальной заглушке; для замера с TLS укажите
+--url тестового HTTPS-сервера.
+
+Запуск из корня проекта: python -m benchmarks.bench_connection_reuse --rows 300
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+import mock_server
+from api_client import ApiClient
+from benchmarks.bench_batch_upload import make_payloads
+
+
+def measure(send, payloads):
+    latencies = []
+    for payload in payloads:
+        started = time.perf_counter()
+        send(payload).raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f'{name:<22} {statistics.mean(latencies):>9.2f} {quantiles[49]:>9.2f} {quantiles[94]:>9.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=300)
+    parser.add_argument('--url', help='базовый адрес сервера (по умолчанию - локальная заглушка)')
+    parser.add_argument('--path', default='/upload-data-new')
+    args = parser.parse_args()
+
+    server = None if args.url else mock_server.start_server()
+    base_url = args.url or server.base_url
+    payloads = make_payloads(args.rows)
+    client = ApiClient(base_url)
+    try:
+        print(f'{"режим":<22} {"сред, мс":>9} {"p50, мс":>9} {"p95, мс":>9}')
+        report('новое соединение', measure(
+            lambda payload: requests.post(client.url(args.path), json=payload, timeout=30), payloads))
+        report('общая сессия', measure(lambda payload: client.post(args.path, json=payload), payloads))
+    finally:
+        client.close()
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
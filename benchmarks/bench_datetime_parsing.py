@@ -0,0 +1,108 @@
+"""
+Разбор времени сканирования в отчетах: прежний разбор save_to_excel (apply
+по строкам для формата '%H:%M:%S %d.%m.%Y', перебор форматов по столбцам
+целиком для остальных) против datetime_formats (формат по выборке, один
+векторный вызов на столбец, формат запоминается для источника).
+
+Проверяет, что значения совпадают с прежним разбором (пустые значения,
+пробелы по краям, испорченные строки), и замеряет время на --rows строках
+в форматах WB и остальных площадок. Прежний перебор форматов не убирал
+пробелы по краям (такие значения становились NaT), новый разбор убирает их
+для всех форматов, поэтому эталон для WB - прежний разбор без этих пробелов.
+
+Запуск из корня проекта: python -m benchmarks.bench_datetime_parsing --rows 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.workbook_generator import RUSSIAN_TIME_FORMAT, WB_TIME_FORMAT, scan_times
+from datetime_formats import parse_datetime_columns
+
+COLUMNS = ['Начало', 'Окончание']
+
+LEGACY_FORMATS = [
+    '%m-%d-%Y %H:%M:%S',
+    '%d-%m-%Y %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%H:%M:%S %d.%m.%Y',
+    '%d.%m.%Y %H:%M:%S',
+]
+
+
+def legacy_parse(data):
+    """Прежний разбор из save_to_excel."""
+    start, end = COLUMNS
+    sample_start = data[start].iloc[0] if not data[start].isna().all() else None
+
+    def parse_russian_datetime(date_str):
+        if pd.isna(date_str):
+            return pd.NaT
+        try:
+            parts = date_str.strip().split()
+            if len(parts) == 2:
+                time_part, date_part = parts
+                hours, minutes, seconds = map(int, time_part.split(':'))
+                day, month, year = map(int, date_part.split('.'))
+                return pd.Timestamp(year, month, day, hours, minutes, seconds)
+            return pd.NaT
+        except Exception:
+            return pd.NaT
+
+    if sample_start and ':' in str(sample_start) and '.' in str(sample_start):
+        data[start] = data[start].apply(parse_russian_datetime)
+        data[end] = data[end].apply(parse_russian_datetime)
+        return data
+    for date_format in LEGACY_FORMATS:
+        data[start] = pd.to_datetime(data[start], format=date_format, errors='coerce')
+        data[end] = pd.to_datetime(data[end], format=date_format, errors='coerce')
+        if not data[start].isna().all() and not data[end].isna().all():
+            break
+    return data
+
+
+def make_times(rows, time_format, seed=0):
+    rng = np.random.default_rng(seed)
+    start, end = scan_times(rng, rows, time_format)
+    data = pd.DataFrame({COLUMNS[0]: start, COLUMNS[1]: end})
+    # Пустые ячейки, лишние пробелы и испорченные значения
+    for column in COLUMNS:
+        picked = rng.random(rows)
+        data.loc[picked < 0.05, column] = None
+        data.loc[(picked >= 0.05) & (picked < 0.07), column] = ' ' + data[column] + ' '
+        data.loc[(picked >= 0.07) & (picked < 0.08), column] = 'нет'
+    return data
+
+
+def measure(fn, data):
+    data = data.copy()
+    started = time.perf_counter()
+    result = fn(data)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    for name, time_format in (('WB', WB_TIME_FORMAT), ('остальные площадки', RUSSIAN_TIME_FORMAT)):
+        data = make_times(args.rows, time_format)
+        # Первое значение непустое: прежний разбор выбирал способ по нему
+        data.iloc[0] = make_times(1, time_format, seed=1).iloc[0]
+        _, legacy_seconds = measure(legacy_parse, data)
+        expected = legacy_parse(data.apply(lambda column: column.str.strip()))
+        source = ('/download', name)
+        result, first_seconds = measure(lambda frame: parse_datetime_columns(frame, COLUMNS, source), data)
+        _, cached_seconds = measure(lambda frame: parse_datetime_columns(frame, COLUMNS, source), data)
+        for column in COLUMNS:
+            pd.testing.assert_series_equal(result[column], expected[column], check_dtype=False)
+        print(f'{name:18} {args.rows} строк: прежний разбор {legacy_seconds:6.2f} с, '
+              f'по выборке {first_seconds:6.2f} с, с запомненным форматом {cached_seconds:6.2f} с')
+    print('Значения совпадают')
+
+
+if __name__ == '__main__':
+    main()
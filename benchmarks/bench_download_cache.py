@@ -0,0 +1,90 @@
+"""
+Повторное скачивание задания через дисковый кэш (download_cache) против
+полного скачивания через заглушку сервера с задержкой.
+
+Проверяет, что повторное скачивание неизмененного задания - один условный
+запрос (304) и чтение с диска, что DataFrame из кэша совпадают со скачанными,
+что после изменения задания на сервере данные скачиваются заново, и что
+при превышении размера кэша удаляются давно не использованные записи.
+
+Запуск из корня проекта: python -m benchmarks.bench_download_cache --rows 20000 --latency 0.2
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+import mock_server
+from api_client import ApiClient
+from download_cache import DownloadCache
+from job_base import BaseJob
+from task_jobs import download_tables
+
+TABLES = ('dataSet1', 'dataSet2')
+
+
+def timed_download(backend, client, task, cache):
+    """Скачивание /download задания: (результат, секунды, запросов к серверу)."""
+    requests_before = backend.stats()['requests']
+    started = time.perf_counter()
+    result = download_tables(BaseJob(None), client, '/download', {'task': task}, TABLES, None, cache=cache)
+    return result, time.perf_counter() - started, backend.stats()['requests'] - requests_before
+
+
+def assert_same(got, want):
+    for key in TABLES:
+        pd.testing.assert_frame_equal(got[key], want[key])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.2, help='задержка ответа сервера, секунды')
+    parser.add_argument('--bandwidth', type=float, default=None, help='пропускная способность канала, КБ/с')
+    args = parser.parse_args()
+
+    server = mock_server.start_server(latency=args.latency,
+                                      bandwidth=args.bandwidth * 1024 if args.bandwidth else None, seed=1)
+    backend = server.backend
+    backend.seed_tasks(2, args.rows)
+    completed, in_progress = sorted(backend.task_summaries(), key=lambda name: 'seed 2' in name)
+    client = ApiClient(server.base_url, timeout=(10, 600))
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DownloadCache(directory)
+        try:
+            first, miss_seconds, miss_requests = timed_download(backend, client, completed, cache)
+            second, hit_seconds, hit_requests = timed_download(backend, client, completed, cache)
+            assert_same(second, first)
+            assert hit_requests == 1, hit_requests
+
+            # Задание изменилось на сервере: условный запрос получает новые данные
+            timed_download(backend, client, in_progress, cache)
+            backend.complete_task(in_progress, share=1.0)
+            changed, _, changed_requests = timed_download(backend, client, in_progress, cache)
+            assert_same(changed, download_tables(BaseJob(None), client, '/download', {'task': in_progress}, TABLES,
+                                                 None, cache=DownloadCache(tempfile.mkdtemp(dir=directory))))
+            assert changed_requests > 1, changed_requests
+            cache_size = cache.total_size()
+
+            # Кэш на одну запись: вторая вытесняет давно не использованную первую
+            small = DownloadCache(tempfile.mkdtemp(dir=directory), max_bytes=cache_size * 2 // 3)
+            timed_download(backend, client, completed, small)
+            timed_download(backend, client, in_progress, small)
+            _, _, evicted_requests = timed_download(backend, client, completed, small)
+            assert evicted_requests > 1, evicted_requests
+            cache.close()
+            small.close()
+        finally:
+            client.close()
+            server.shutdown()
+
+    rows = sum(len(first[key]) for key in TABLES)
+    print(f'Строк: {rows}, задержка {args.latency * 1000:.0f} мс, кэш двух заданий {cache_size / 1024:.0f} КБ')
+    print(f'Без кэша            {miss_seconds:6.2f} с ({miss_requests} запросов)')
+    print(f'Из кэша (304)       {hit_seconds:6.2f} с ({hit_requests} запрос)')
+    print('DataFrame из кэша совпадают, измененное задание скачано заново, старая запись вытеснена')
+
+
+if __name__ == '__main__':
+    main()
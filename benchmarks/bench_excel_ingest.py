@@ -0,0 +1,116 @@
+"""
+Чтение файла задания разными движками ExcelReader и через pandas.read_excel
+на сгенерированных книгах. Каждый замер выполняется в отдельном процессе,
+чтобы пиковая память (RSS) одного движка не влияла на другой. Перед
+замером проверяется, что движки читают одинаковые строки.
+
+Запуск из корня проекта: python -m benchmarks.bench_excel_ingest --rows 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import openpyxl
+import pandas as pd
+
+from benchmarks.bench_payload_builder import make_sheet
+from excel_reader import ExcelReader, available_engines
+from payload_builder import clean_nulls
+
+# Эталон: прежнее чтение файла целиком
+READ_EXCEL = 'pandas.read_excel'
+
+
+def workbook_path(rows, directory):
+    """Создает (один раз) книгу с синтетическим листом задания."""
+    path = os.path.join(directory, f'WB ingest {rows}.xlsx')
+    if os.path.exists(path):
+        return path
+    data = make_sheet(rows)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Лист1')
+    sheet.append(list(data.columns))
+    for row in data.astype(object).itertuples(index=False):
+        sheet.append([None if pd.isna(value) else value for value in row])
+    workbook.save(path)
+    return path
+
+
+def peak_rss_mb():
+    # ru_maxrss наследуется от родительского процесса через exec, VmHWM - нет
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss в Linux - килобайты, в macOS - байты
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 / 1024 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def measure(engine, path):
+    """Читает файл в текущем процессе и возвращает время и пиковую память."""
+    started = time.perf_counter()
+    if engine == READ_EXCEL:
+        rows = len(pd.read_excel(path))
+    else:
+        rows = 0
+        with ExcelReader(path, engine=engine) as reader:
+            for chunk in reader.iter_chunks():
+                rows += len(chunk)
+    return {'rows': rows, 'seconds': time.perf_counter() - started, 'peak_rss_mb': peak_rss_mb()}
+
+
+def measure_in_subprocess(engine, path):
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.bench_excel_ingest', '--measure', engine, path],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def check_engines_match(path, engines):
+    """Все движки ExcelReader должны давать одинаковые таблицы (после очистки пустых значений)."""
+    tables = {}
+    for engine in engines:
+        with ExcelReader(path, engine=engine) as reader:
+            tables[engine] = clean_nulls(pd.concat(reader.iter_chunks(), ignore_index=True))
+    reference_engine, reference = next(iter(tables.items()))
+    for engine, table in tables.items():
+        if not table.equals(reference):
+            raise SystemExit(f'Ошибка: {engine} читает файл иначе, чем {reference_engine}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--dir', default=os.path.join(tempfile.gettempdir(), 'excel_ingest_bench'),
+                        help='каталог для сгенерированных книг')
+    parser.add_argument('--measure', nargs=2, metavar=('ENGINE', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(*args.measure)))
+        return
+
+    os.makedirs(args.dir, exist_ok=True)
+    engines = available_engines()
+    print(f'Движки: {", ".join(engines)}')
+
+    for rows in args.rows:
+        path = workbook_path(rows, args.dir)
+        check_engines_match(path, engines)
+        print(f'\nСтрок: {rows} ({os.path.getsize(path) / 1024 / 1024:.1f} МБ), движки читают одинаково')
+        for engine in engines + [READ_EXCEL]:
+            result = measure_in_subprocess(engine, path)
+            print(f'{engine:18} {result["seconds"]:8.2f} с ({result["rows"] / result["seconds"]:9.0f} строк/с), '
+                  f'пик RSS {result["peak_rss_mb"]:7.1f} МБ')
+
+
+if __name__ == '__main__':
+    main()
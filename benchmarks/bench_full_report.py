@@ -0,0 +1,164 @@
+"""
+Полный отчет WB: прежний calculate_full_report (цикл по группам с масками по
+всему листу) против нового (merge/groupby, task_reports.calculate_full_report).
+
+Сначала проверяет, что результаты совпадают (assert_frame_equal: значения,
+типы столбцов, порядок строк и индекс) на случайных данных: ответы /download
+из генератора заданий и небольшие таблицы с совпадающими ключами, пустыми
+значениями, текстовыми артикулами и числами с плавающей точкой. Затем
+замеряет время на заданиях из --rows строк; прежняя реализация на больших
+заданиях работает минуты, поэтому замеряется только до --legacy-max-rows.
+
+Запуск из корня проекта: python -m benchmarks.bench_full_report --rows 10000 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.workbook_generator import download_response
+from column_schema import TASK_SCHEMA
+from task_reports import calculate_full_report
+
+
+def legacy_full_report(sheet1, sheet2):
+    """Прежняя реализация calculate_full_report (эталон для сравнения)."""
+    TASK_SCHEMA.standardize_for_report(sheet1)
+    TASK_SCHEMA.standardize_for_report(sheet2)
+
+    required_columns = ['Artikul', 'Kolvo_Tovarov', 'Pallet_No']
+    if [col for col in required_columns if col not in sheet1.columns]:
+        return sheet2
+
+    grouped_data = sheet1.groupby(['Artikul', 'Kolvo_Tovarov', 'Pallet_No']).size().reset_index(
+        name='Количество записей')
+
+    new_rows = []
+    for _, row in grouped_data.iterrows():
+        arkt = row['Artikul']
+        kolvo = row['Kolvo_Tovarov']
+        mesto = row['Количество записей']
+        pallet = row['Pallet_No']
+
+        matches = sheet2[(sheet2['Artikul'] == arkt) & (sheet2['Vlozhennost'] == kolvo)]
+        if not matches.empty:
+            sheet2.loc[(sheet2['Artikul'] == arkt) & (sheet2['Vlozhennost'] == kolvo), ['Mesto', 'Pallet_No']] = [
+                mesto, pallet]
+        else:
+            matches_for_copy = sheet2[sheet2['Artikul'] == arkt]
+            if not matches_for_copy.empty:
+                for _, match in matches_for_copy.iterrows():
+                    new_row = match.copy()
+                    new_row['Vlozhennost'] = kolvo
+                    new_row['Mesto'] = mesto
+                    new_row['Pallet_No'] = pallet
+                    new_rows.append(new_row)
+
+    if new_rows:
+        sheet2 = pd.concat([sheet2, pd.DataFrame(new_rows)], ignore_index=True)
+
+    for artikul in sheet2['Artikul'].unique():
+        rows_with_values = sheet2[(sheet2['Artikul'] == artikul) &
+                                  sheet2[['Mesto', 'Vlozhennost', 'Pallet_No']].notna().all(axis=1)]
+        rows_without_values = sheet2[(sheet2['Artikul'] == artikul) &
+                                     sheet2[['Mesto', 'Vlozhennost', 'Pallet_No']].isna().all(axis=1)]
+        if not rows_with_values.empty and not rows_without_values.empty:
+            sheet2.drop(rows_without_values.index, inplace=True)
+
+    return sheet2
+
+
+def generated_sheets(rows, seed):
+    """Листы задания WB из ответа /download генератора заданий."""
+    body = download_response(rows, 'WB', seed)
+    return pd.DataFrame(body['dataSet1']), pd.DataFrame(body['dataSet2'])
+
+
+def random_sheets(rng):
+    """
+    Небольшие листы с малым числом артикулов, чтобы часто встречались совпадения,
+    несколько паллет на один ключ, строки без места/вложенности/паллета, пустые ключи
+    и артикулы разных типов на листах.
+    """
+    rows1 = int(rng.integers(0, 40))
+    rows2 = int(rng.integers(1, 40))
+    text_articles = rng.random() < 0.3
+    pool = np.array([f'{code}-ЧР' for code in range(8)] if text_articles else np.arange(100, 108), dtype=object)
+
+    def column(count, values, blank_share):
+        picked = pd.Series(values[rng.integers(0, len(values), count)], dtype=object)
+        picked[rng.random(count) < blank_share] = None
+        return picked
+
+    blanks = 0.2 if rng.random() < 0.5 else 0.0
+    sheet1_blanks = 0.2 if rng.random() < 0.5 else 0.0
+    sheet1 = pd.DataFrame({
+        'Artikul': column(rows1, pool, sheet1_blanks / 4).tolist(),
+        'Kolvo_Tovarov': column(rows1, np.arange(1, 5), sheet1_blanks).tolist(),
+        'Pallet_No': column(rows1, np.arange(1, 4), sheet1_blanks).tolist(),
+    })
+    sheet2 = pd.DataFrame({
+        'Artikul': column(rows2, pool[:6], blanks / 4).tolist(),
+        'Nazvanie_Tovara': column(rows2, np.array(['Кружка', 'Футболка']), 0.1).tolist(),
+        'Itog_Zakaz': rng.integers(1, 500, rows2).tolist(),
+        'Mesto': column(rows2, np.arange(1, 9), blanks).tolist(),
+        'Vlozhennost': column(rows2, np.arange(1, 6), blanks).tolist(),
+        'Pallet_No': column(rows2, np.arange(1, 4), blanks).tolist(),
+        'SHK_SPO': column(rows2, np.array([4600000000001.0, 4600000000002.0]), 0.5).tolist(),
+        'comment': [None] * rows2,
+    })
+    if rng.random() < 0.5:
+        # Все строки части артикулов без места, вложенности и паллета
+        empty = sheet2['Artikul'].isin(pool[:2])
+        sheet2.loc[empty, ['Mesto', 'Vlozhennost', 'Pallet_No']] = None
+    if not text_articles and rng.random() < 0.1:
+        # Артикулы второго листа текстом: совпадают только артикулы первого листа тоже текстом
+        sheet2['Artikul'] = sheet2['Artikul'].astype(str)
+        sheet1['Artikul'] = [str(value) if index % 2 and pd.notna(value) else value
+                             for index, value in enumerate(sheet1['Artikul'].astype(object))]
+    return sheet1, sheet2
+
+
+def check_equivalence(cases):
+    for sheet1, sheet2 in cases:
+        expected = legacy_full_report(sheet1.copy(), sheet2.copy())
+        result = calculate_full_report(sheet1.copy(), sheet2.copy())
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def measure(fn, sheet1, sheet2):
+    sheet1, sheet2 = sheet1.copy(), sheet2.copy()
+    started = time.perf_counter()
+    fn(sheet1, sheet2)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--legacy-max-rows', type=int, default=10000,
+                        help='прежняя реализация замеряется только на заданиях не больше этого')
+    parser.add_argument('--cases', type=int, default=300, help='случайных таблиц для проверки совпадения')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    cases = [random_sheets(rng) for _ in range(args.cases)]
+    cases += [generated_sheets(rows, seed) for seed, rows in enumerate((1, 10, 200, 2000))]
+    check_equivalence(cases)
+    print(f'Результаты совпадают: {len(cases)} наборов данных')
+
+    for rows in args.rows:
+        sheet1, sheet2 = generated_sheets(rows, seed=0)
+        new_seconds = measure(calculate_full_report, sheet1, sheet2)
+        line = f'{rows:7} строк: merge/groupby {new_seconds:7.2f} с'
+        if rows <= args.legacy_max_rows:
+            legacy_seconds = measure(legacy_full_report, sheet1, sheet2)
+            line += f', прежний цикл {legacy_seconds:7.2f} с (в {legacy_seconds / new_seconds:.0f} раз быстрее)'
+            pd.testing.assert_frame_equal(calculate_full_report(sheet1.copy(), sheet2.copy()),
+                                          legacy_full_report(sheet1.copy(), sheet2.copy()))
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Разбор ответа /download: response.json() + pd.DataFrame(записи) против
+потокового разбора json_stream.read_json_tables. Показывает время и пиковую
+память (tracemalloc, без самого тела ответа) и проверяет, что DataFrame
+совпадают, в том числе при нарезке тела на мелкие куски (границы кусков
+внутри записей и многобайтовых символов UTF-8).
+
+Запуск из корня проекта: python -m benchmarks.bench_json_stream --rows 100000
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.bench_payload_builder import make_sheet, vectorized_payloads
+from json_stream import STREAM_CHUNK_BYTES, read_json_tables
+
+TABLES = ('dataSet1', 'dataSet2')
+
+
+def make_body(rows):
+    """Тело ответа /download задания WB: строки задания и отсканированные короба."""
+    records = vectorized_payloads(make_sheet(rows))
+    scans = [{'Artikul': record['Artikul'], 'Kolvo_Tovarov': 1, 'Pallet_No': index % 50,
+              'Time_Start': '01.02.2025 10:00:00', 'Time_End': None}
+             for index, record in enumerate(records[::4])]
+    return json.dumps({'dataSet1': scans, 'dataSet2': records}, ensure_ascii=False).encode('utf-8')
+
+
+def chunked(body, chunk_size):
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+def random_chunks(body, rng):
+    start = 0
+    while start < len(body):
+        size = rng.choice((1, 2, 3, 7, 64, 4096))
+        yield body[start:start + size]
+        start += size
+
+
+def legacy_tables(body):
+    """Прежний путь: весь текст ответа, дерево словарей, затем DataFrame."""
+    data = json.loads(body.decode('utf-8'))
+    return {key: pd.DataFrame(data.get(key, [])) for key in TABLES}
+
+
+def streaming_tables(body):
+    return read_json_tables(chunked(body, STREAM_CHUNK_BYTES), TABLES)
+
+
+def measure(fn, body):
+    started = time.perf_counter()
+    result = fn(body)
+    seconds = time.perf_counter() - started
+    del result
+    tracemalloc.start()
+    result = fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    body = make_body(args.rows)
+    print(f'Строк: {args.rows}, тело ответа {len(body) / 1024 / 1024:.1f} МБ')
+    expected, legacy_seconds, legacy_peak = measure(legacy_tables, body)
+    result, stream_seconds, stream_peak = measure(streaming_tables, body)
+    for name, seconds, peak in (('json + DataFrame', legacy_seconds, legacy_peak),
+                                ('потоковый разбор', stream_seconds, stream_peak)):
+        print(f'{name:17} {seconds:6.2f} с, пик памяти {peak / 1024 / 1024:7.1f} МБ')
+    print(f'Память меньше в {legacy_peak / stream_peak:.1f} раза')
+
+    small = make_body(300)
+    small_expected = legacy_tables(small)
+    checks = [(expected, result)]
+    checks += [(small_expected, read_json_tables(random_chunks(small, random.Random(seed)), TABLES))
+               for seed in range(20)]
+    for want, got in checks:
+        for key in TABLES:
+            pd.testing.assert_frame_equal(got[key], want[key])
+    print('DataFrame совпадают')
+
+
+if __name__ == '__main__':
+    main()
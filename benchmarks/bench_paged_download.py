@@ -0,0 +1,75 @@
+"""
+Скачивание завершенного задания WB одним ответом /download и постранично
+(paged_download) через заглушку сервера с задержкой и ограниченным каналом.
+Проверяет, что DataFrame совпадают, и что при сбоях сервера (--error-rate)
+повторяются отдельные страницы, а не все скачивание.
+
+Запуск из корня проекта: python -m benchmarks.bench_paged_download --rows 100000 --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import time
+
+import pandas as pd
+
+import mock_server
+from api_client import ApiClient
+from json_stream import STREAM_CHUNK_BYTES, read_json_tables
+from paged_download import PagedDownloader
+from retry_policy import RetryPolicy
+
+TABLES = ('dataSet1', 'dataSet2')
+
+
+def single_response(client, task):
+    """Прежний путь: один запрос, ответ целиком."""
+    response = client.get('/download', params={'task': task}, stream=True)
+    response.raise_for_status()
+    with response:
+        return read_json_tables(response.iter_content(chunk_size=STREAM_CHUNK_BYTES), TABLES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--latency', type=float, default=0.2, help='задержка ответа сервера, секунды')
+    parser.add_argument('--bandwidth', type=float, default=None, help='пропускная способность канала, КБ/с')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='доля ответов 500 при постраничном скачивании')
+    parser.add_argument('--page-rows', type=int, default=5000)
+    parser.add_argument('--max-in-flight', type=int, default=4)
+    args = parser.parse_args()
+
+    server = mock_server.start_server(latency=args.latency,
+                                      bandwidth=args.bandwidth * 1024 if args.bandwidth else None, seed=1)
+    backend = server.backend
+    backend.seed_tasks(1, args.rows)
+    task, = backend.completed_tasks()
+    client = ApiClient(server.base_url, timeout=(10, 600))
+    try:
+        started = time.perf_counter()
+        expected = single_response(client, task)
+        single_seconds = time.perf_counter() - started
+
+        backend.error_rate = args.error_rate
+        requests_before = backend.stats()['requests']
+        downloader = PagedDownloader(client, '/download', {'task': task}, page_rows=args.page_rows,
+                                     max_in_flight=args.max_in_flight, retry_policy=RetryPolicy(base_delay=0.2))
+        retries = []
+        started = time.perf_counter()
+        result = downloader.download(TABLES, on_event=retries.append)
+        paged_seconds = time.perf_counter() - started
+        requests = backend.stats()['requests'] - requests_before
+    finally:
+        client.close()
+        server.shutdown()
+
+    rows = sum(len(expected[key]) for key in TABLES)
+    print(f'Строк: {rows}, задержка {args.latency * 1000:.0f} мс, ошибок сервера {args.error_rate:.0%}')
+    print(f'Одним ответом     {single_seconds:6.2f} с')
+    print(f'Постранично       {paged_seconds:6.2f} с ({requests} запросов, повторов страниц: {len(retries)})')
+    for key in TABLES:
+        pd.testing.assert_frame_equal(result[key], expected[key])
+    print('DataFrame совпадают')
+
+
+if __name__ == '__main__':
+    main()
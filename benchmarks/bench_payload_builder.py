@@ -0,0 +1,129 @@
+"""
+Формирование строк задания: прежний построчный путь (iterrows) против
+векторного payload_builder на синтетическом листе. Перед замером
+проверяется, что оба пути дают одинаковые строки.
+
+Запуск из корня проекта: python -m benchmarks.bench_payload_builder --rows 100000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from column_schema import OP_FLAG, TASK_SCHEMA
+from payload_builder import build_payloads, clean_nulls
+
+UPLOAD_FIELDS = TASK_SCHEMA.upload_fields
+
+CONSTANTS = {'pref': 'WB', 'Scklad_Pref': 'Склад 1', 'Status': 0, 'Status_Zadaniya': 0,
+             'Nazvanie_Zadaniya': 'WB bench.xlsx'}
+
+
+def make_sheet(rows, seed=0):
+    """Синтетический лист задания с реальными заголовками и типичными пропусками."""
+    rng = np.random.default_rng(seed)
+    op_values = np.array([None, None, None, 'V', 'v', 1, 2.0, 'да', ' '], dtype=object)
+    sheet = {
+        'Артикул': rng.integers(100000, 999999, rows),
+        'Артикул Сырья': np.where(rng.random(rows) < 0.3, np.nan, rng.integers(10000, 99999, rows).astype(float)),
+        'Номенклатура': [f'НМ-{i}' for i in rng.integers(0, 5000, rows)],
+        'Название товара': [f'Товар {i}' for i in rng.integers(0, 5000, rows)],
+        'ШК': rng.integers(4600000000000, 4609999999999, rows),
+        'ШК Сырья': np.where(rng.random(rows) < 0.5, '', '4601234567890'),
+        'Кол-во сырья': np.where(rng.random(rows) < 0.5, np.nan, rng.integers(1, 10, rows).astype(float)),
+        'Итог Заказ': rng.integers(1, 500, rows),
+        'СОХ': rng.choice(['да', 'нет', 'nan'], rows),
+        'тип поставки': rng.choice(['Короб', 'Монопаллета'], rows),
+        'Срок Годности': rng.choice(['01.12.2026', '', '15.03.2027'], rows),
+        'Тип операции': rng.choice(np.array(['Гофро', None, 3], dtype=object), rows),
+        'Место': rng.integers(1, 100, rows),
+        'Вложенность': rng.integers(1, 50, rows),
+        'Паллет №': rng.integers(1, 30, rows),
+        'ВП': rng.choice(['ВП-1', 'ВП-2', 'NaN'], rows),
+        'Планируемое кол-во': rng.integers(1, 500, rows),
+    }
+    for _, source, kind in UPLOAD_FIELDS:
+        if kind == OP_FLAG and source not in sheet:
+            sheet[source] = rng.choice(op_values, rows)
+    return pd.DataFrame(sheet)
+
+
+def legacy_op_value(value):
+    """Прежний process_op_column_value."""
+    if value is not None:
+        value_str = str(value).strip()
+        if value_str == 'V':
+            return '1'
+        try:
+            float_value = float(value_str)
+            return str(int(float_value))
+        except ValueError:
+            return 'V'
+    return value
+
+
+def legacy_payloads(data):
+    """Прежний путь: очистка по столбцам и сборка строки через iterrows."""
+    data = data.where(pd.notnull(data), None)
+    for column in data.columns:
+        data[column] = data[column].replace(
+            {np.nan: None, 'nan': None, 'NaN': None, '': None, ' ': None, '  ': None, '   ': None})
+
+    payloads = []
+    for _, row in data.iterrows():
+        artikul_syrya_value = row.get('Артикул Сырья')
+        if pd.notna(artikul_syrya_value):
+            if isinstance(artikul_syrya_value, float) and artikul_syrya_value.is_integer():
+                artikul_syrya = str(int(artikul_syrya_value))
+            else:
+                artikul_syrya = str(artikul_syrya_value)
+        else:
+            artikul_syrya = None
+        upakovka_v_gofro = str(row.get('Тип операции')) if pd.notna(row.get('Тип операции')) else None
+
+        payload = {}
+        for key, source, kind in UPLOAD_FIELDS:
+            if kind == OP_FLAG:
+                payload[key] = legacy_op_value(row.get(source))
+            else:
+                payload[key] = row.get(source)
+        payload['Artikul_Syrya'] = artikul_syrya
+        payload['Upakovka_v_Gofro'] = upakovka_v_gofro
+        payload.update(CONSTANTS)
+        payloads.append(payload)
+    return payloads
+
+
+def vectorized_payloads(data):
+    return build_payloads(clean_nulls(data), UPLOAD_FIELDS, CONSTANTS)
+
+
+def measure(fn, data):
+    started = time.perf_counter()
+    result = fn(data)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    data = make_sheet(args.rows)
+    legacy, legacy_seconds = measure(legacy_payloads, data)
+    vectorized, vectorized_seconds = measure(vectorized_payloads, data)
+
+    # Сравниваем то, что уйдет на сервер: JSON каждой строки
+    if [json.dumps(row, sort_keys=True) for row in legacy] != [json.dumps(row, sort_keys=True) for row in vectorized]:
+        raise SystemExit('Ошибка: векторный путь дает другие строки, чем iterrows')
+
+    print(f'Строк: {args.rows}, строки совпадают')
+    print(f'iterrows:  {legacy_seconds:8.2f} с ({args.rows / legacy_seconds:10.0f} строк/с)')
+    print(f'векторный: {vectorized_seconds:8.2f} с ({args.rows / vectorized_seconds:10.0f} строк/с)')
+    print(f'ускорение: {legacy_seconds / vectorized_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Набор замеров горячих путей загрузки и скачивания на синтетических
+заданиях WB/Ozon (benchmarks.workbook_generator):
+
+- read_excel - чтение файла задания через pandas.read_excel (прежний путь);
+- excel_reader - чтение того же файла кусками через ExcelReader;
+- payload_build - очистка и формирование строк загрузки test.py (upload_file);
+- process_op_column_value - признаки операций по одной ячейке (main.py);
+- op_flag_value - признаки операций по уникальным значениям столбца (payload_builder);
+- calculate_full_report - расчет полного отчета WB;
+- save_to_excel - отчет с разбором дат Начало/Окончание и записью xlsx;
+- reorder_columns_by_template - порядок столбцов отчета;
+- save_multiple_sheets_to_excel - краткий и полный отчет WB в xlsx.
+
+Каждый случай выполняется repeat раз на каждом размере; подготовка данных
+(копии таблиц, которые функции меняют на месте) в замер не входит. Итог
+пишется в JSON; с --baseline медианы сравниваются с прошлым запуском,
+и замедление больше --threshold отмечается как регрессия (код выхода 1).
+
+Запуск из корня проекта:
+python -m benchmarks.bench_suite --rows 1000 10000 --output bench_results.json
+python -m benchmarks.bench_suite --rows 1000 10000 --baseline bench_results.json --output new.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.workbook_generator import MARKETPLACES, download_response, make_task_sheet, task_name, \
+    task_workbook
+from column_schema import FLAG_TYPE, TASK_SCHEMA
+from excel_reader import ExcelReader
+from main import FileUploaderApp as TkUploaderApp
+from payload_builder import build_payloads, clean_nulls, map_unique, op_flag_value
+from task_reports import calculate_full_report, reorder_columns_by_template, save_multiple_sheets_to_excel, \
+    save_to_excel
+
+# Размеры заданий по умолчанию; генератор поддерживает до 500 000 строк
+DEFAULT_ROWS = (1000, 10000)
+MAX_ROWS = 500_000
+
+# Замедление медианы относительно базового запуска, после которого случай считается регрессией
+DEFAULT_THRESHOLD = 0.2
+
+# Случай, один прогон которого дольше этого (секунды), больше не повторяется
+SLOW_RUN_SECONDS = 30
+
+FLAG_TITLES = list(dict.fromkeys(column.title for column in TASK_SCHEMA.upload_columns
+                                 if column.dtype == FLAG_TYPE))
+
+
+class Workload:
+    """Данные одного размера и площадки; создаются при первом обращении."""
+
+    def __init__(self, rows, marketplace):
+        self.rows = rows
+        self.marketplace = marketplace
+        self.task_name = task_name(marketplace, rows)
+        self._sheet = None
+        self._response = None
+
+    @property
+    def sheet(self):
+        if self._sheet is None:
+            self._sheet = make_task_sheet(self.rows, self.marketplace)
+        return self._sheet
+
+    @property
+    def workbook(self):
+        return task_workbook(self.rows, self.marketplace)
+
+    @property
+    def response(self):
+        if self._response is None:
+            self._response = download_response(self.rows, self.marketplace)
+        return self._response
+
+    def data_sets(self):
+        """Новые таблицы из ответа сервера, как в run_download_file."""
+        return pd.DataFrame(self.response['dataSet1']), pd.DataFrame(self.response['dataSet2'])
+
+
+def upload_constants(workload):
+    """Значения, одинаковые для всех строк загрузки (как в run_upload_file)."""
+    return {'pref': task_name(workload.marketplace, workload.rows).split(' ')[0], 'Scklad_Pref': 'Склад 1',
+            'Status': 0, 'Status_Zadaniya': 0, 'Nazvanie_Zadaniya': workload.task_name}
+
+
+def legacy_op_values(sheet):
+    # В main.py ячейки признаков приходили текстом
+    return [None if value is None else str(value) for title in FLAG_TITLES for value in sheet[title]]
+
+
+def report_rows(workload):
+    """Строки задания с заголовками Excel, как перед reorder_columns_by_template."""
+    data_set1, data_set2 = workload.data_sets()
+    rows = data_set2 if workload.marketplace == 'WB' else data_set1
+    return rows.rename(columns=TASK_SCHEMA.download_rename)
+
+
+# Случай: (площадки, подготовка(workload) -> аргументы, замеряемая функция(*аргументы))
+CASES = {
+    'read_excel': (MARKETPLACES, lambda w: (w.workbook,), pd.read_excel),
+    'excel_reader': (MARKETPLACES, lambda w: (w.workbook,),
+                     lambda path: sum(len(chunk) for chunk in ExcelReader(path).iter_chunks())),
+    'payload_build': (MARKETPLACES, lambda w: (w.sheet, upload_constants(w)),
+                      lambda sheet, constants: build_payloads(clean_nulls(sheet), TASK_SCHEMA.upload_fields,
+                                                              constants)),
+    'process_op_column_value': (MARKETPLACES, lambda w: (legacy_op_values(w.sheet),),
+                                lambda values: [TkUploaderApp.process_op_column_value(None, value)
+                                                for value in values]),
+    'op_flag_value': (MARKETPLACES, lambda w: (clean_nulls(w.sheet[FLAG_TITLES]),),
+                      lambda flags: [map_unique(flags[title], op_flag_value) for title in flags.columns]),
+    'calculate_full_report': (('WB',), lambda w: w.data_sets(), calculate_full_report),
+    'save_to_excel': (('Ozon',), lambda w: (w.data_sets()[0], w.task_name, TASK_SCHEMA.download_rename),
+                      save_to_excel),
+    'reorder_columns_by_template': (MARKETPLACES, lambda w: (report_rows(w),), reorder_columns_by_template),
+    'save_multiple_sheets_to_excel': (('WB',), lambda w: full_report_args(w), save_multiple_sheets_to_excel),
+}
+
+
+def full_report_args(workload):
+    data_set1, data_set2 = workload.data_sets()
+    data_set2 = calculate_full_report(data_set1, data_set2)
+    return data_set1, data_set2, workload.task_name, TASK_SCHEMA.download_rename
+
+
+def measure(prepare, fn, workload, repeat):
+    """Время прогонов fn; подготовка аргументов перед каждым прогоном не замеряется."""
+    runs = []
+    for _ in range(repeat):
+        args = prepare(workload)
+        started = time.perf_counter()
+        fn(*args)
+        runs.append(time.perf_counter() - started)
+        if runs[-1] > SLOW_RUN_SECONDS:
+            break
+    return runs
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Сравнивает медианы с базовым запуском; возвращает ключи регрессий."""
+    regressions = []
+    print(f'\nСравнение с базовым запуском ({baseline["environment"].get("commit")}), порог {threshold:.0%}:')
+    for key, result in results.items():
+        base = baseline['results'].get(key)
+        if not base:
+            continue
+        ratio = result['median'] / base['median'] if base['median'] else float('inf')
+        if ratio > 1 + threshold:
+            mark = 'РЕГРЕССИЯ'
+            regressions.append(key)
+        elif ratio < 1 / (1 + threshold):
+            mark = 'быстрее'
+        else:
+            mark = ''
+        result['baseline_median'] = base['median']
+        result['ratio'] = round(ratio, 3)
+        print(f'{key:52} {base["median"]:9.4f} -> {result["median"]:9.4f} с  x{ratio:5.2f} {mark}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--marketplaces', nargs='+', choices=MARKETPLACES, default=MARKETPLACES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='bench_results.json', help='файл результатов JSON')
+    parser.add_argument('--baseline', help='результаты прошлого запуска для поиска регрессий')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+    if max(args.rows) > MAX_ROWS:
+        parser.error(f'не больше {MAX_ROWS} строк')
+
+    # save_to_excel и save_multiple_sheets_to_excel пишут в <домашняя папка>/Downloads
+    home = tempfile.mkdtemp(prefix='packer_bench_home_')
+    os.makedirs(os.path.join(home, 'Downloads'))
+    os.environ['HOME'] = os.environ['USERPROFILE'] = home
+
+    results = {}
+    for rows in args.rows:
+        for marketplace in args.marketplaces:
+            workload = Workload(rows, marketplace)
+            for case in args.cases:
+                marketplaces, prepare, fn = CASES[case]
+                if marketplace not in marketplaces:
+                    continue
+                runs = measure(prepare, fn, workload, args.repeat)
+                median = statistics.median(runs)
+                key = f'{case}/{marketplace}/{rows}'
+                results[key] = {
+                    'case': case, 'marketplace': marketplace, 'rows': rows,
+                    'runs': [round(run, 6) for run in runs],
+                    'min': round(min(runs), 6), 'median': round(median, 6),
+                    'rows_per_second': round(rows / median) if median else None,
+                }
+                print(f'{key:52} медиана {median:9.4f} с, мин {min(runs):9.4f} с, '
+                      f'{rows / median:12,.0f} строк/с'.replace(',', ' '))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'threshold': args.threshold, 'results': results,
+                   'regressions': regressions}, f, ensure_ascii=False, indent=2)
+    print(f'\nРезультаты: {args.output}')
+    if regressions:
+        print(f'Регрессии: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Синтетические задания WB и Ozon для замеров: лист задания с настоящими
+заголовками Excel (TASK_SCHEMA) и ответ сервера /download по этому заданию.
+
+Значения похожи на настоящие: артикулы WB - числовые nmID, Ozon - текстовые
+артикулы продавца, ШК - EAN-13, признаки операций в основном пустые, а часть
+ячеек пустая или с пробелом, как в файлах от клиентов.
+
+Сгенерированные xlsx кэшируются во временной папке по (площадка, строки, seed).
+
+Запуск из корня проекта: python -m benchmarks.workbook_generator --rows 100000 --marketplace Ozon
+"""
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from column_schema import FLAG_TYPE, TASK_SCHEMA
+
+CACHE_DIR = os.path.join(tempfile.gettempdir(), 'packer_bench')
+
+MARKETPLACES = ('WB', 'Ozon')
+
+# Доля строк с отметкой в столбце признака операции
+OP_FLAG_SHARE = 0.15
+
+# Форматы времени сканирования в ответе /download: полный отчет WB и отчет остальных площадок
+WB_TIME_FORMAT = '%m-%d-%Y %H:%M:%S'
+RUSSIAN_TIME_FORMAT = '%H:%M:%S %d.%m.%Y'
+
+
+def task_name(marketplace, rows):
+    """Название задания: префикс площадки до пробела, как в именах файлов."""
+    prefix = 'WB' if marketplace == 'WB' else 'OZON'
+    return f'{prefix} bench {rows}.xlsx'
+
+
+def articles(rng, marketplace, count):
+    if marketplace == 'WB':
+        return rng.integers(10_000_000, 299_999_999, count)
+    codes = rng.integers(1000, 99999, count)
+    series = rng.choice(['ЧР', 'BL', 'KIT', 'ЖК'], count)
+    return np.array([f'{code}-{suffix}' for code, suffix in zip(codes, series)], dtype=object)
+
+
+def product_names(rng, count):
+    kinds = np.array(['Футболка', 'Кружка', 'Чехол для телефона', 'Набор косметики', 'Игрушка мягкая',
+                      'Кабель USB-C', 'Термос 0,5 л', 'Свеча ароматическая'], dtype=object)
+    colors = np.array(['черный', 'белый', 'синий', 'красный', 'зеленый', 'бежевый'], dtype=object)
+    return kinds[rng.integers(0, len(kinds), count)] + ' ' + colors[rng.integers(0, len(colors), count)]
+
+
+def barcodes(rng, count):
+    return rng.integers(4_600_000_000_000, 4_699_999_999_999, count)
+
+
+def with_blanks(rng, values, share, blank=None):
+    """Заменяет долю share значений пустыми (None, '' или ' ', как в Excel клиентов)."""
+    values = np.asarray(values, dtype=object).copy()
+    values[rng.random(len(values)) < share] = blank
+    return values
+
+
+def make_task_sheet(rows, marketplace='WB', seed=0):
+    """
+    Лист задания для загрузки со всеми столбцами TASK_SCHEMA.upload_columns
+    (как его читает ExcelReader: dtype=object, пустые ячейки - None).
+    Товары повторяются: на одно задание приходится около rows / 20 артикулов.
+    """
+    rng = np.random.default_rng(seed)
+    products = max(rows // 20, 1)
+    product = rng.integers(0, products, rows)
+    product_articles = articles(rng, marketplace, products)
+    product_barcodes = barcodes(rng, products)
+    product_titles = product_names(rng, products)
+
+    expiry = [(datetime(2026, 1, 1) + timedelta(days=int(day))).strftime('%d.%m.%Y')
+              for day in rng.integers(0, 720, 64)]
+    flag_marks = np.array(['V', 'V', 'V', 1, 'да'], dtype=object)
+    sheet = {}
+    for column in TASK_SCHEMA.upload_columns:
+        title = column.title
+        if title in sheet:
+            continue
+        if column.dtype == FLAG_TYPE:
+            values = flag_marks[rng.integers(0, len(flag_marks), rows)]
+            sheet[title] = with_blanks(rng, values, 1 - OP_FLAG_SHARE)
+        elif title == 'Артикул':
+            sheet[title] = product_articles[product]
+        elif title == 'Артикул Сырья':
+            sheet[title] = with_blanks(rng, rng.integers(10000, 99999, rows), 0.7)
+        elif title == 'Название товара':
+            sheet[title] = product_titles[product]
+        elif title == 'ШК':
+            sheet[title] = product_barcodes[product]
+        elif title in ('ШК Сырья', 'ШК СПО'):
+            sheet[title] = with_blanks(rng, barcodes(rng, rows), 0.8)
+        elif title == 'Номенклатура':
+            sheet[title] = np.array([f'НМ-{index:06d}' for index in product], dtype=object)
+        elif title == 'Кол-во сырья':
+            sheet[title] = with_blanks(rng, rng.integers(1, 10, rows), 0.6)
+        elif title == 'Итог Заказ':
+            sheet[title] = rng.integers(1, 500, rows)
+        elif title == 'СОХ':
+            sheet[title] = with_blanks(rng, rng.choice(['да', 'нет'], rows), 0.5, blank=' ')
+        elif title == 'Срок Годности':
+            sheet[title] = with_blanks(rng, rng.choice(expiry, rows), 0.6)
+        elif title == 'Тип операции':
+            sheet[title] = with_blanks(rng, rng.choice(['Гофро', 'Пакет', 'Короб'], rows), 0.5)
+        elif title in ('Место', 'Вложенность', 'Паллет №'):
+            sheet[title] = with_blanks(rng, rng.integers(1, 60, rows), 0.1)
+        elif title == 'ВП':
+            sheet[title] = with_blanks(rng, np.array([f'ВП-{i}' for i in rng.integers(1, 40, rows)]), 0.3)
+        elif title == 'тип поставки':
+            sheet[title] = rng.choice(['Короб', 'Монопаллета', 'Суперсейф'], rows)
+        elif title == 'Планируемое кол-во':
+            sheet[title] = rng.integers(1, 500, rows)
+        else:
+            sheet[title] = with_blanks(rng, np.full(rows, 'текст', dtype=object), 0.5, blank='')
+    return pd.DataFrame(sheet, dtype=object)
+
+
+def write_workbook(path, sheet):
+    """Записывает лист в xlsx построчно (constant_memory), пустые значения - пустые ячейки."""
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Лист1')
+    worksheet.write_row(0, 0, list(sheet.columns))
+    for row_number, row in enumerate(sheet.itertuples(index=False, name=None), start=1):
+        for column_number, value in enumerate(row):
+            if value is None or value == '':
+                continue
+            if isinstance(value, np.integer):
+                value = int(value)
+            worksheet.write(row_number, column_number, value)
+    workbook.close()
+    return path
+
+
+def task_workbook(rows, marketplace='WB', seed=0):
+    """Возвращает путь к xlsx задания из кэша, при необходимости создавая его."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f'task_{marketplace}_{rows}_{seed}.xlsx')
+    if not os.path.exists(path):
+        temp_path = path + '.tmp.xlsx'
+        write_workbook(temp_path, make_task_sheet(rows, marketplace, seed))
+        os.replace(temp_path, path)
+    return path
+
+
+def scan_times(rng, count, time_format):
+    """Время начала и окончания сканирования строками в формате сервера."""
+    start = datetime(2026, 10, 1, 8, 0, 0)
+    offsets = np.sort(rng.integers(0, 10 * 3600, count))
+    durations = rng.integers(5, 600, count)
+    starts = [(start + timedelta(seconds=int(offset))).strftime(time_format) for offset in offsets]
+    ends = [(start + timedelta(seconds=int(offset + duration))).strftime(time_format)
+            for offset, duration in zip(offsets, durations)]
+    return starts, ends
+
+
+def download_response(rows, marketplace='WB', seed=0):
+    """
+    Тело ответа /download для задания из rows строк (как после response.json()).
+
+    Строки задания - с ключами сервера, временем сканирования, исполнителем и
+    частично заполненными местом/вложенностью/паллетом. У WB они приходят в
+    dataSet2, а dataSet1 - отсканированные короба (артикул, количество товаров,
+    паллет; около половины строк задания). У остальных площадок строки задания
+    приходят в dataSet1, а dataSet2 пустой.
+    """
+    rng = np.random.default_rng(seed + 1)
+    sheet = make_task_sheet(rows, marketplace, seed)
+    task_rows = pd.DataFrame({column.key: sheet[column.title] for column in TASK_SCHEMA.upload_columns
+                              if column.download and column.title in sheet}, dtype=object)
+    time_format = WB_TIME_FORMAT if marketplace == 'WB' else RUSSIAN_TIME_FORMAT
+    task_rows['Time_Start'], task_rows['Time_End'] = scan_times(rng, rows, time_format)
+    task_rows['Ispolnitel'] = rng.choice(['Иванов', 'Петрова', 'Сидоров', 'Ким'], rows)
+    task_rows['reason'] = with_blanks(rng, rng.choice(['Брак', 'Нет товара'], rows), 0.95)
+    task_rows['comment'] = None
+    task_rows['Nazvanie_Zadaniya'] = task_name(marketplace, rows)
+    task_rows['Vlozhennost'] = with_blanks(rng, rng.integers(0, 30, rows), 0.3)
+    task_rows['Mesto'] = with_blanks(rng, rng.integers(1, 60, rows), 0.3)
+    task_rows['Pallet_No'] = with_blanks(rng, rng.integers(1, 30, rows), 0.3)
+
+    if marketplace != 'WB':
+        return {'dataSet1': records(task_rows), 'dataSet2': []}
+
+    boxes = max(rows // 2, 1)
+    picked = rng.integers(0, rows, boxes)
+    scanned = pd.DataFrame({
+        'Artikul': task_rows['Artikul'].to_numpy()[picked],
+        'SHK': task_rows['SHK'].to_numpy()[picked],
+        'Kolvo_Tovarov': rng.integers(1, 30, boxes),
+        'Pallet_No': rng.integers(1, 30, boxes),
+        'Ispolnitel': task_rows['Ispolnitel'].to_numpy()[picked],
+    })
+    return {'dataSet1': records(scanned), 'dataSet2': records(task_rows)}
+
+
+def records(df):
+    """Строки таблицы как в JSON-ответе сервера: числа numpy - обычные числа, пустые - None."""
+    return json.loads(df.to_json(orient='records', force_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--marketplace', choices=MARKETPLACES, default='WB')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(task_workbook(args.rows, args.marketplace, args.seed))
+
+
+if __name__ == '__main__':
+    main()
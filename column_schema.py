@@ -0,0 +1,202 @@
+"""
+Описание столбцов заданий в одном месте.
+
+Для каждого столбца задаются ключ на сервере, заголовок в Excel, тип
+значения, допустимость пустых значений, способ преобразования при
+загрузке и участие в скачивании и отчете. Схема компилируется один раз
+при импорте в готовые словари переименования и списки столбцов, поэтому
+загрузка, скачивание и отчет переименовывают таблицу одним вызовом.
+"""
+
+# Способы преобразования значения при загрузке
+RAW = 'raw'  # значение как есть
+OP_FLAG = 'op_flag'  # признак операции (см. payload_builder.op_flag_value)
+ID_TEXT = 'id_text'  # артикул как строка без '.0'
+TEXT = 'text'  # значение как строка
+
+# Типы значений столбцов
+TEXT_TYPE = 'text'
+INT_TYPE = 'int'
+ARTICLE_TYPE = 'article'
+NUMBER_TYPE = 'number'
+BARCODE_TYPE = 'barcode'
+DATE_TYPE = 'date'
+DATETIME_TYPE = 'datetime'
+FLAG_TYPE = 'flag'
+
+
+class Column:
+    """
+    Столбец задания.
+
+    key - ключ на сервере; title - заголовок в Excel;
+    upload - отправляется при загрузке (значение берется из столбца title);
+    download - переименовывается key -> title при скачивании;
+    export - входит в отчет; export_title - заголовок в отчете, если отличается от title;
+    report - участвует в расчете полного отчета под именем key.
+    """
+
+    def __init__(self, key, title, dtype=TEXT_TYPE, nullable=True, kind=RAW, upload=True, download=True,
+                 export=True, export_title=None, report=False):
+        self.key = key
+        self.title = title
+        self.dtype = dtype
+        self.nullable = nullable
+        self.kind = kind
+        self.upload = upload
+        self.download = download
+        self.export = export
+        self.export_title = export_title or title
+        self.report = report
+
+
+def flag(key, title, **kwargs):
+    """Столбец признака операции."""
+    return Column(key, title, dtype=FLAG_TYPE, kind=OP_FLAG, **kwargs)
+
+
+class ColumnSchema:
+    """Скомпилированная схема: словари переименования и порядок столбцов."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.by_key = {column.key: column for column in columns}
+        self.upload_columns = [column for column in columns if column.upload]
+        # Поля строки загрузки: (ключ на сервере, столбец Excel, преобразование)
+        self.upload_fields = [(column.key, column.title, column.kind) for column in self.upload_columns]
+        self.titles = {column.key: column.title for column in columns}
+        self.download_rename = {column.key: column.title for column in columns if column.download}
+        self.export_order = [column.export_title for column in columns if column.export]
+        self.report_rename = {column.title: column.key for column in columns if column.report}
+
+    def rename_for_download(self, df):
+        """Переименовывает столбцы скачанной таблицы в заголовки Excel (на месте)."""
+        df.rename(columns=self.download_rename, inplace=True)
+        return df
+
+    def standardize_for_report(self, df):
+        """
+        Переименовывает заголовки Excel в ключи для расчета отчета (на месте).
+        Если в таблице уже есть столбец с ключом, он остается как есть.
+        """
+        columns = set(df.columns)
+        rename = {title: key for title, key in self.report_rename.items() if title in columns and key not in columns}
+        if rename:
+            df.rename(columns=rename, inplace=True)
+        return df
+
+    def reorder_for_export(self, df):
+        """Возвращает таблицу со столбцами отчета в заданном порядке; недостающие столбцы пустые."""
+        # Лишние столбцы (в том числе повторяющиеся заголовки) отбрасываются до reindex
+        return df.loc[:, df.columns.isin(self.export_order)].reindex(columns=self.export_order)
+
+
+# Задания упаковки (test.py): /upload-data-new и /download.
+# Порядок столбцов с export=True - порядок столбцов в отчете.
+TASK_SCHEMA = ColumnSchema([
+    Column('Artikul', 'Артикул', dtype=ARTICLE_TYPE, nullable=False, report=True),
+    Column('Artikul_Syrya', 'Артикул Сырья', kind=ID_TEXT),
+    Column('Nazvanie_Tovara', 'Название товара'),
+    Column('SHK', 'ШК', dtype=BARCODE_TYPE, nullable=False),
+    Column('SHK_Syrya', 'ШК Сырья', dtype=BARCODE_TYPE),
+    Column('Nomenklatura', 'Номенклатура', download=False),
+    Column('Kol_vo_Syrya', 'Кол-во сырья', dtype=NUMBER_TYPE),
+    Column('Itog_Zakaz', 'Итог Заказ', dtype=NUMBER_TYPE, nullable=False),
+    Column('SOH', 'СОХ'),
+    Column('Srok_Godnosti', 'Срок Годности', dtype=DATE_TYPE),
+    flag('Op_16_TU_3_5', 'Упаковка в пакет с клеевым слоем'),
+    flag('Opasnyi_Tovar', 'Упаковка в пакет с замком Zip Lock'),
+    flag('Upakovka_tovara_v_gofromeyler', 'Упаковка товара в гофромейлер'),
+    flag('Upakovka_v_PE_Paket', 'Упаковка товара в п/э пакет', download=False),
+    flag('Op_468_Proverka_SHK', 'Упаковка в бабл - пленку'),
+    flag('Op_1_Bl_1_Sht', 'Упаковка товара в индивидуальный короб'),
+    flag('Op_2_Bl_2_Sht', 'Пересчет товара'),
+    flag('Op_3_Bl_3_Sht', 'Фасовка/сборка монотовара в короб'),
+    flag('Op_4_Bl_4_Sht', 'Маркировка товара стикером'),
+    flag('Op_5_Bl_5_Sht', 'Маркировка транспортного короба'),
+    flag('Op_6_Blis_6_10_Sht', 'Маркировка паллета (транспортного модуля)'),
+    flag('Op_7_Pereschyot', 'Удаление стикера/маркировки с товара'),
+    flag('Op_9_Fasovka_Sborka', 'Термоупаковка товара'),
+    flag('Op_470_Dop_Upakovka', 'Проверка штрих-кода / срока годности'),
+    flag('Op_469_Spetsifikatsiya_TM', 'Спецификация ТМ (для маркеплейсов)'),
+    flag('Op_10_Markirovka_SHT', 'Разбор товара (для маркетплейсов)'),
+    flag('Op_11_Markirovka_Prom', 'Подготовка транспортного паллета к отгрузке'),
+    flag('Op_13_Markirovka_Fabr', 'Раскомплект заказа (полный/частичный)'),
+    flag('Sborka_naborov_ot_2_shtuk_raznykh_tovarov', 'Сборка наборов (комплектов) от 2-х штук разных товаров'),
+    flag('Vlozhit_v_upakovku_pechatnyi_material', 'Вложить в упаковку печатный материал'),
+    flag('PriznakSortirovki', 'Сортируемый товар'),
+    flag('Khranenie_tovara', 'Хранение товара'),
+    flag('Izmerenie_VGH_i_peredacha_informatsii', 'Измерение ВГХ и передача информации'),
+    flag('Indeks_za_srochnost_koeff_1_5', 'Индекс за срочность (коэффициент 1,5)'),
+    flag('Prochie_raboty_vklyuchaya_ustranenie_anomalii', 'Прочие работы (в т.ч. устранение аномалий)'),
+    flag('Ne_Sortiruemyi_Tovar', 'Не сортируемый товар'),
+    Column('Upakovka_v_Gofro', 'Тип операции', kind=TEXT),  # без обработки признака операции
+    flag('Produkty', 'Продукты'),
+    flag('Op_17_TU_6_8', 'Опасный товар'),
+    flag('Zakrytaya_Zona', 'Закрытая зона'),
+    flag('Krupnogabaritnyi_Tovar', 'Крупногабаритный товар'),
+    flag('Yuvelirnye_Izdelia', 'Ювелирные изделия'),
+    Column('Mesto', 'Место', dtype=INT_TYPE, report=True),
+    Column('Vlozhennost', 'Вложенность', dtype=INT_TYPE, report=True),
+    # В полном отчете паллет остается под ключом после calculate_full_report
+    Column('Pallet_No', 'Паллет №', dtype=INT_TYPE, download=False, export_title='Pallet_No', report=True),
+    Column('Ispolnitel', 'Исполнитель', upload=False),
+    Column('reason', 'Причина', upload=False),
+    Column('comment', 'Комментарий', upload=False),
+    Column('Time_Start', 'Начало', dtype=DATETIME_TYPE, upload=False),
+    Column('Time_End', 'Окончание', dtype=DATETIME_TYPE, upload=False),
+
+    # Столбцы, которых нет в отчете
+    Column('vp', 'ВП', export=False),
+    Column('Nazvanie_Zadaniya', 'Название задания', upload=False, export=False),
+    Column('Itog_MP', 'Итог МП', dtype=NUMBER_TYPE, upload=False, export=False),
+    flag('Sortiruemyi_Tovar', 'Печать этикетки с ШК', export=False),
+    flag('Pechat_Etiketki_s_SHK', 'Печать этикетки с ШК', export=False),
+    Column('Fakticheskoe_Kol_vo', 'Фактическое количество', dtype=NUMBER_TYPE, upload=False, export=False),
+    Column('Ubrano_iz_Zakaza', 'Убрано из заказа', dtype=NUMBER_TYPE, upload=False, export=False),
+    Column('Pallet №', 'Паллет №', upload=False, export=False),
+    Column('SHK_WPS', 'ШК WPS', dtype=BARCODE_TYPE, upload=False, export=False),
+    Column('SHK_SPO', 'ШК СПО', dtype=BARCODE_TYPE, download=False, export=False),
+    Column('Tip_Postavki', 'тип поставки', download=False, export=False),
+    Column('Plan_Otkaz', 'Планируемое кол-во', dtype=NUMBER_TYPE, download=False, export=False),
+    Column('Kolvo_Tovarov', 'Количество товаров', dtype=NUMBER_TYPE, upload=False, download=False, export=False,
+           report=True),
+])
+
+# Задания ВПС (netr.py): /uploadData и /downloadData
+WPS_SCHEMA = ColumnSchema([
+    Column('Artikul', 'Артикул', dtype=ARTICLE_TYPE, nullable=False, download=False),
+    Column('Nazvanie_Tovara', 'Название товара', download=False),
+    Column('SHK', 'ШК', dtype=BARCODE_TYPE, nullable=False, download=False),
+    Column('Nomenklatura', 'Номенклатура'),
+    Column('Itog_Zakaz', 'Итог Заказ', dtype=NUMBER_TYPE, nullable=False, download=False),
+    Column('Srok_Godnosti', 'Срок Годности', dtype=DATE_TYPE, download=False),
+    Column('vp', 'ВП'),
+
+    # /downloadData возвращает ключи в нижнем регистре
+    Column('nazvanie_zdaniya', 'Название задания', upload=False),
+    Column('artikul', 'Артикул', dtype=ARTICLE_TYPE, upload=False),
+    Column('nazvanie_tovara', 'Название товара', upload=False),
+    Column('shk', 'Штрих-код', dtype=BARCODE_TYPE, upload=False),
+    Column('srok_godnosti', 'Срок годности', dtype=DATE_TYPE, upload=False),
+    Column('vlozhennost', 'Вложенность', dtype=INT_TYPE, upload=False),
+    Column('pallet', 'Паллет', upload=False),
+    Column('shk_wps', 'ШК ВПС', dtype=BARCODE_TYPE, upload=False),
+    Column('size_vps', 'Размер ВПС', upload=False),
+    Column('itog_zakaza', 'Итог заказа', dtype=NUMBER_TYPE, upload=False),
+])
+
+# Файл ВПС (netr.py, load_vps): скачанный /downloadData файл отправляется построчно в /uploadWPS.
+# Все значения, кроме итога заказа, отправляются строкой.
+VPS_FILE_SCHEMA = ColumnSchema([
+    Column('nazvanie_zdaniya', 'Название задания', kind=TEXT),
+    Column('artikul', 'Артикул', dtype=ARTICLE_TYPE, kind=TEXT),
+    Column('shk', 'Штрих-код', dtype=BARCODE_TYPE, kind=TEXT),
+    Column('mesto', 'Место', kind=TEXT),
+    Column('vlozhennost', 'Вложенность', dtype=INT_TYPE, kind=TEXT),
+    Column('pallet', 'Паллет', kind=TEXT),
+    Column('size_vps', 'Размер ВПС', kind=TEXT),
+    Column('vp', 'ВП', kind=TEXT),
+    Column('itog_zakaza', 'Итог заказа', dtype=NUMBER_TYPE, nullable=False),
+    Column('shk_wps', 'ШК ВПС', dtype=BARCODE_TYPE, kind=TEXT),
+])
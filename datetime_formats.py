@@ -0,0 +1,103 @@
+"""
+Разбор времени сканирования (Time_Start/Time_End, в отчетах - Начало/Окончание).
+
+Сервер отдает время строкой, формат зависит от вида отчета: у полного отчета
+WB '%m-%d-%Y %H:%M:%S', у остальных площадок '%H:%M:%S %d.%m.%Y'. Формат
+определяется один раз по небольшой выборке значений, затем столбцы целиком
+разбираются одним вызовом pd.to_datetime с этим форматом. Найденный формат
+запоминается для источника (например, пути запроса и площадки), и следующие
+отчеты того же источника только проверяют его на выборке.
+"""
+import logging
+import threading
+
+import pandas as pd
+
+# Известные форматы времени в порядке предпочтения (при неоднозначной выборке,
+# например '01-02-2026', выбирается первый)
+DATETIME_FORMATS = (
+    '%m-%d-%Y %H:%M:%S',
+    '%d-%m-%Y %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%H:%M:%S %d.%m.%Y',
+    '%d.%m.%Y %H:%M:%S',
+)
+
+# Сколько непустых значений проверяется при определении формата
+SAMPLE_SIZE = 200
+
+_formats = {}
+_formats_lock = threading.Lock()
+
+
+def text_values(series):
+    """Строковые значения столбца без пробелов по краям; остальное - пропуски."""
+    if pd.api.types.is_string_dtype(series.dtype) or series.dtype == object:
+        try:
+            return series.str.strip()
+        except AttributeError:
+            # В столбце нет строк
+            pass
+    return series
+
+
+def sample_values(columns):
+    """Первые SAMPLE_SIZE непустых значений столбцов."""
+    sample = pd.concat([column.dropna().head(SAMPLE_SIZE) for column in columns], ignore_index=True)
+    return text_values(sample.head(SAMPLE_SIZE)) if len(sample) else sample
+
+
+def parsed_count(sample, date_format):
+    return pd.to_datetime(sample, format=date_format, errors='coerce').notna().sum()
+
+
+def detect_format(sample):
+    """Формат, по которому разбирается больше всего значений выборки; None - ни один не подошел."""
+    best, best_count = None, 0
+    for date_format in DATETIME_FORMATS:
+        count = parsed_count(sample, date_format)
+        if count > best_count:
+            best, best_count = date_format, count
+        if count == len(sample):
+            break
+    return best
+
+
+def format_for(columns, source=None):
+    """
+    Формат времени столбцов columns. Для источника source формат из прошлых
+    отчетов используется, если по нему разбирается вся выборка.
+    """
+    sample = sample_values(columns)
+    if not len(sample):
+        return None
+    with _formats_lock:
+        cached = _formats.get(source) if source is not None else None
+    if cached is not None and parsed_count(sample, cached) == len(sample):
+        return cached
+
+    date_format = detect_format(sample)
+    logging.info(f"Формат времени {source or ''}: {date_format or 'не определен'} (выборка: {sample.iloc[0]!r})")
+    if source is not None and date_format is not None:
+        with _formats_lock:
+            _formats[source] = date_format
+    return date_format
+
+
+def parse_datetime_columns(data, columns, source=None):
+    """
+    Заменяет строки времени в столбцах columns таблицы data на datetime (на месте);
+    значения не в формате - NaT. Если ни один известный формат не подошел,
+    формат определяет pandas.
+    """
+    parsed = [column for column in columns if not pd.api.types.is_datetime64_any_dtype(data[column])]
+    if not parsed:
+        return data
+    date_format = format_for([data[column] for column in parsed], source)
+    for column in parsed:
+        values = text_values(data[column])
+        if date_format is None:
+            data[column] = pd.to_datetime(values, errors='coerce')
+        else:
+            data[column] = pd.to_datetime(values, format=date_format, errors='coerce')
+    return data
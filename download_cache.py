@@ -0,0 +1,212 @@
+"""
+Дисковый кэш скачанных заданий.
+
+Завершенные задания меняются редко, а один и тот же отчет за час скачивают
+несколько раз. Ответ скачивания (/download, /downloadData) сохраняется на
+диск вместе с валидаторами сервера (ETag, Last-Modified). Повторное
+скачивание отправляет условный запрос (If-None-Match / If-Modified-Since);
+если сервер ответил 304, данные читаются из кэша.
+
+Записи ищутся по пути запроса и его параметрам (названию задания). Общий
+размер файлов ограничен: при превышении удаляются записи, которые дольше
+всего не использовались.
+
+Файл записи - gzip-текст: первая строка - заголовок JSON (остальные поля
+ответа, столбцы и число строк массивов), далее по строке JSON на столбец.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app_paths import app_data_dir
+from json_stream import ColumnBuffer
+
+CACHE_DIR_NAME = 'download_cache'
+INDEX_FILE_NAME = 'index.sqlite3'
+CACHE_FILE_SUFFIX = '.json.gz'
+
+# Предельный общий размер файлов кэша, байт
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+# Быстрое сжатие: файлы кэша читаются и пишутся чаще, чем хранятся долго
+CACHE_COMPRESS_LEVEL = 1
+
+
+def cache_key(path, params):
+    """Ключ записи: путь запроса и параметры (название задания)."""
+    content = json.dumps([path, params], ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CacheEntry:
+    """Запись индекса кэша."""
+
+    def __init__(self, key, file_name, etag, last_modified, size):
+        self.key = key
+        self.file_name = file_name
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+
+    def validators(self):
+        """Заголовки условного запроса."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class DownloadCache:
+    """Файлы ответов и индекс в SQLite (потокобезопасный)."""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or app_data_dir(CACHE_DIR_NAME)
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(os.path.join(self.directory, INDEX_FILE_NAME), check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                description TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                used_at REAL NOT NULL
+            );
+        """)
+        self.connection.commit()
+
+    def lookup(self, key):
+        """Запись по ключу или None, если ответ не кэшировался или его файл пропал."""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT key, file_name, etag, last_modified, size FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        entry = CacheEntry(*row)
+        if not os.path.exists(self.file_path(entry.file_name)):
+            self.remove(key)
+            return None
+        return entry
+
+    def load(self, entry, tables):
+        """
+        Читает ответ из файла записи: словарь, как json_stream.read_json_tables
+        (массивы tables - DataFrame). Поврежденный файл - ValueError или OSError.
+        """
+        with gzip.open(self.file_path(entry.file_name), 'rt', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            result = dict(header['values'])
+            for table in tables:
+                buffer = ColumnBuffer()
+                description = header['tables'].get(table, {'rows': 0, 'columns': []})
+                buffer.rows = description['rows']
+                for column in description['columns']:
+                    values = json.loads(f.readline())
+                    if len(values) != buffer.rows:
+                        raise ValueError(f'Файл кэша {entry.file_name} поврежден: столбец {column}')
+                    buffer.columns[column] = values
+                result[table] = buffer.to_frame()
+        self.touch(entry.key)
+        return result
+
+    def store(self, key, description, etag, last_modified, result, tables):
+        """
+        Сохраняет ответ (словарь с ColumnBuffer в массивах tables) с валидаторами.
+        Ответ без ETag и Last-Modified не сохраняется: его нельзя проверить условным запросом.
+        """
+        if not etag and not last_modified:
+            return
+        file_name = key + CACHE_FILE_SUFFIX
+        path = self.file_path(file_name)
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        header = {'values': {name: value for name, value in result.items() if name not in tables},
+                  'tables': {table: {'rows': result[table].rows, 'columns': list(result[table].columns)}
+                             for table in tables}}
+        try:
+            with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=CACHE_COMPRESS_LEVEL) as f:
+                f.write(json.dumps(header, ensure_ascii=False) + '\n')
+                for table in tables:
+                    for values in result[table].columns.values():
+                        f.write(json.dumps(values, ensure_ascii=False) + '\n')
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        size = os.path.getsize(path)
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO entries (key, description, file_name, etag, last_modified, size, used_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', (key, description, file_name, etag, last_modified, size, time.time()))
+            self.connection.commit()
+        self.evict()
+
+    def touch(self, key):
+        with self.lock:
+            self.connection.execute('UPDATE entries SET used_at = ? WHERE key = ?', (time.time(), key))
+            self.connection.commit()
+
+    def remove(self, key):
+        """Удаляет запись и ее файл."""
+        with self.lock:
+            row = self.connection.execute('SELECT file_name FROM entries WHERE key = ?', (key,)).fetchone()
+            self.connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self.connection.commit()
+        if row is not None:
+            self.remove_file(row[0])
+
+    def evict(self):
+        """Удаляет давно не использованные записи, пока общий размер больше max_bytes."""
+        with self.lock:
+            rows = self.connection.execute('SELECT key, file_name, size FROM entries ORDER BY used_at DESC').fetchall()
+            total = 0
+            evicted = []
+            for key, file_name, size in rows:
+                total += size
+                if total > self.max_bytes:
+                    evicted.append((key, file_name))
+            self.connection.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key, _ in evicted])
+            self.connection.commit()
+        for key, file_name in evicted:
+            logging.info('Кэш скачивания: удалена давно не использованная запись %s', file_name)
+            self.remove_file(file_name)
+
+    def total_size(self):
+        with self.lock:
+            return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def file_path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def remove_file(self, file_name):
+        try:
+            os.remove(self.file_path(file_name))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        self.connection.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_download_cache():
+    """Возвращает общий кэш скачивания приложения."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DownloadCache()
+        return _cache
@@ -0,0 +1,268 @@
+"""
+Потоковое чтение Excel-файлов заданий.
+
+Файл открывается один раз и читается кусками по chunk_rows строк, поэтому
+загрузка на сервер начинается сразу после разбора первого куска. Движок
+чтения выбирается автоматически: calamine (пакет python-calamine), если он
+установлен, иначе openpyxl в режиме read_only.
+"""
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import weakref
+
+import openpyxl
+import pandas as pd
+
+try:
+    import python_calamine
+except ImportError:  # необязательная зависимость
+    python_calamine = None
+
+# Количество строк в одном куске
+DEFAULT_CHUNK_ROWS = 5000
+
+# Сколько кусков фоновое чтение может подготовить заранее
+PREFETCH_CHUNKS = 2
+
+# Ошибки формул Excel; pandas.read_excel читает их как пустые значения
+EXCEL_ERRORS = {'#N/A', '#VALUE!', '#REF!', '#DIV/0!', '#NUM!', '#NAME?', '#NULL!'}
+
+
+def column_names(header):
+    """Имена столбцов как у pandas.read_excel: пустые - 'Unnamed: N', повторы - 'Имя.1'."""
+    names = []
+    seen = {}
+    for position, value in enumerate(header):
+        name = f'Unnamed: {position}' if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+class OpenpyxlSheet:
+    """Первый лист книги через openpyxl: строки разбираются по мере чтения."""
+
+    def __init__(self, file_path):
+        self.workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        self.sheet_names = self.workbook.sheetnames
+        self.sheet = self.workbook.worksheets[0]
+
+    @property
+    def row_count(self):
+        max_row = self.sheet.max_row
+        return max(max_row - 1, 0) if max_row else 0
+
+    def iter_rows(self):
+        return self.sheet.iter_rows(values_only=True)
+
+    def close(self):
+        self.workbook.close()
+
+
+def calamine_value(value):
+    """Значение ячейки calamine как у openpyxl: пустая ячейка - None, целое число - int."""
+    if value == '':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class CalamineSheet:
+    """
+    Первый лист книги через calamine. Лист разбирается целиком при открытии
+    (в несколько раз быстрее openpyxl), строки затем отдаются кусками.
+    Ячейки только из пробелов calamine читает как пустые.
+    """
+
+    def __init__(self, file_path):
+        self.workbook = python_calamine.CalamineWorkbook.from_path(file_path)
+        self.sheet_names = self.workbook.sheet_names
+        self.sheet = self.workbook.get_sheet_by_index(0)
+
+    @property
+    def row_count(self):
+        return max(self.sheet.total_height - 1, 0)
+
+    def iter_rows(self):
+        # calamine отдает строки начиная с первой заполненной ячейки; openpyxl - с A1
+        first_row, first_column = self.sheet.start
+        for _ in range(first_row):
+            yield ()
+        padding = [None] * first_column
+        for row in self.sheet.iter_rows():
+            yield padding + [calamine_value(value) for value in row]
+
+    def close(self):
+        self.workbook.close()
+
+
+# Движки чтения в порядке предпочтения
+ENGINES = {
+    'calamine': CalamineSheet,
+    'openpyxl': OpenpyxlSheet,
+}
+
+
+def available_engines():
+    """Имена движков, которые можно использовать в этой установке."""
+    return [name for name in ENGINES if name != 'calamine' or python_calamine is not None]
+
+
+class ExcelReader:
+    """
+    Читает первый лист книги кусками DataFrame.
+
+    engine - 'calamine' или 'openpyxl'; по умолчанию первый доступный.
+    Значения ячеек остаются такими, как их вернул движок: целые числа
+    не превращаются в float из-за пустых ячеек в столбце. Полностью
+    пустые строки пропускаются, как в pandas.read_excel.
+    """
+
+    def __init__(self, file_path, chunk_rows=DEFAULT_CHUNK_ROWS, engine=None):
+        self.file_path = file_path
+        self.chunk_rows = chunk_rows
+        self.engine = engine or available_engines()[0]
+        if self.engine not in available_engines():
+            raise ValueError(f'Движок чтения Excel недоступен: {self.engine}')
+        self.source = ENGINES[self.engine](file_path)
+        self.sheet_names = self.source.sheet_names
+
+    @property
+    def row_count(self):
+        """Количество строк данных по размеру листа из файла (оценка, 0 - неизвестно)."""
+        return self.source.row_count
+
+    @property
+    def single_sheet(self):
+        """В книге ровно один лист."""
+        return len(self.sheet_names) == 1
+
+    def iter_chunks(self):
+        """
+        Возвращает куски листа (DataFrame с заголовками из первой строки).
+        Индекс куска - номера строк листа Excel (заголовок - строка 1).
+        """
+        rows = self.source.iter_rows()
+        header = next(rows, None)
+        if header is None:
+            return
+        header = list(header)
+        while header and header[-1] is None:
+            header.pop()
+        columns = column_names(header)
+        width = len(columns)
+
+        buffer = []
+        row_numbers = []
+        for row_number, row in enumerate(rows, start=2):
+            values = [None if isinstance(value, str) and value in EXCEL_ERRORS else value for value in row[:width]]
+            if all(value is None for value in values):
+                continue
+            if len(values) < width:
+                values.extend([None] * (width - len(values)))
+            buffer.append(values)
+            row_numbers.append(row_number)
+            if len(buffer) >= self.chunk_rows:
+                yield pd.DataFrame(buffer, columns=columns, index=row_numbers, dtype=object)
+                buffer = []
+                row_numbers = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns, index=row_numbers, dtype=object)
+
+    def close(self):
+        self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SpilledChunks:
+    """
+    Куски листа, сохраненные во временную папку по мере чтения. Книга
+    разбирается один раз (при проверке файла), а при отправке куски читаются
+    с диска по одному - в памяти не держится весь файл, и разбор Excel
+    не повторяется. Папка удаляется при close() или, если close() не был
+    вызван, когда объект больше не используется.
+    """
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix='packer-chunks-')
+        self.paths = []
+        self.remove = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+    def add(self, chunk):
+        """Сохраняет кусок и возвращает его же, чтобы add можно было вставить в перебор кусков."""
+        path = os.path.join(self.directory, f'{len(self.paths)}.pkl')
+        chunk.to_pickle(path)
+        self.paths.append(path)
+        return chunk
+
+    def __iter__(self):
+        for path in self.paths:
+            yield pd.read_pickle(path)
+
+    def close(self):
+        self.remove()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+def prefetch(iterable, depth=PREFETCH_CHUNKS):
+    """
+    Перебирает iterable в фоновом потоке, опережая потребителя не больше
+    чем на depth элементов. Ошибка чтения передается потребителю; если
+    потребитель прекратил перебор, фоновый поток останавливается.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop_event = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop_event.is_set():
+            try:
+                items.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(done)
+        except Exception as e:
+            put(_Failure(e))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop_event.set()
@@ -0,0 +1,457 @@
+"""
+Служба горячей папки: файлы заданий, положенные в папку, загружаются на
+сервер без участия оператора.
+
+Новый .xlsx берется в работу, когда его размер и время изменения не менялись
+settle секунд (файл докопирован). Файл переносится в processing/, поэтому
+повторно он не попадет в очередь, даже если служба увидит его снова. Название
+задания и префикс площадки (pref) берутся из имени файла, как в окнах
+загрузки; файл проверяется и загружается тем же заданием (task_jobs), что и
+кнопка «Загрузить» (режим upload) или загрузка задания ВПС (режим load-task).
+После загрузки файл переносится в done/, при ошибке - в failed/ вместе с
+текстом ошибки (<файл>.error.txt).
+
+Название задания - имя файла, поэтому файл с именем, которое уже есть в done/,
+повторно не загружается: он сразу переносится в failed/ с объяснением в
+<файл>.error.txt и предупреждением в журнале. Чтобы загрузить такое задание
+снова, файл нужно переименовать или убрать прежний файл из done/.
+
+Одновременно загружается не больше workers файлов; в очереди ждет не больше
+max_queue файлов, остальные остаются в папке до освобождения места.
+Глубина очереди, загружаемые файлы и задержка (от появления файла до конца
+загрузки) пишутся в журнал, в status.json в папке и в textfile Prometheus
+(metrics/hot_folder.prom).
+
+Файлы, оставшиеся в processing/ после аварийной остановки, при запуске
+загружаются снова и продолжаются с первой неподтвержденной строки. При
+остановке службы (Ctrl+C, SIGTERM) текущие загрузки отменяются, их строки
+удаляются с сервера, а файлы возвращаются в папку.
+
+Запуск: python hot_folder.py D:\\Задания --sklad "Склад 1" --workers 2
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import requests
+
+from api_client import get_client
+from app_logging import setup_logging
+from app_paths import app_data_dir
+from job_base import BaseJob, JobError
+from job_metrics import LATENCY_QUANTILES, METRICS_DIR_NAME, OUTCOME_FAILED, OUTCOME_SUCCESS, label_value, \
+    percentile, round_or_none, write_atomic
+from task_jobs import delete_uploaded_data, run_load_task, run_upload_file, task_prefix
+
+PROCESSING_DIR_NAME = 'processing'
+DONE_DIR_NAME = 'done'
+FAILED_DIR_NAME = 'failed'
+STATUS_FILE_NAME = 'status.json'
+PROM_FILE_NAME = 'hot_folder.prom'
+ERROR_FILE_SUFFIX = '.error.txt'
+
+FILE_EXTENSION = '.xlsx'
+# Файлы блокировки Excel (~$) и скрытые временные файлы копирования
+IGNORED_PREFIXES = ('~$', '.')
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_QUEUE = 100
+POLL_INTERVAL_SECONDS = 2.0
+# Файл берется в работу, если не менялся столько секунд
+SETTLE_SECONDS = 2.0
+# Как часто состояние пишется в журнал
+STATUS_INTERVAL_SECONDS = 30.0
+# Задержки считаются по последним LATENCY_WINDOW файлам
+LATENCY_WINDOW = 1000
+
+
+def upload_job(folder, file_path):
+    file_name = os.path.basename(file_path)
+    return run_upload_file, folder.api, file_path, file_name, task_prefix(file_name), folder.sklad
+
+
+def load_task_job(folder, file_path):
+    file_name = os.path.basename(file_path)
+    return run_load_task, folder.api, file_path, file_name, task_prefix(file_name)
+
+
+# Режим: функция (служба, путь) -> функция задания и ее аргументы
+MODES = {
+    'upload': upload_job,
+    'load-task': load_task_job,
+}
+
+
+def is_task_file(file_name):
+    return file_name.lower().endswith(FILE_EXTENSION) and not file_name.startswith(IGNORED_PREFIXES)
+
+
+def check_file_name(file_name):
+    """Название задания должно начинаться с префикса площадки и пробела ("WB 12.10 Подольск.xlsx")."""
+    if ' ' not in file_name.strip():
+        raise JobError(f"Не удалось определить префикс площадки по имени файла '{file_name}': "
+                       f"название должно начинаться с префикса и пробела, например 'WB 12.10.xlsx'.")
+
+
+def checked_task(job, fn, *args):
+    """Проверяет имя файла и выполняет задание; ошибка имени попадает в failed/, как любая другая."""
+    check_file_name(job.file_name)
+    return fn(job, *args)
+
+
+def unique_path(directory, file_name):
+    """Путь в папке; если файл с таким именем уже есть - с отметкой времени в имени."""
+    path = os.path.join(directory, file_name)
+    if not os.path.exists(path):
+        return path
+    stem, ext = os.path.splitext(file_name)
+    return os.path.join(directory, f'{stem} ({datetime.now():%Y-%m-%d %H-%M-%S}){ext}')
+
+
+def write_error(target, file_name, text):
+    """Записывает текст ошибки рядом с файлом в failed/."""
+    try:
+        with open(target + ERROR_FILE_SUFFIX, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    except OSError as e:
+        logging.error(f'Не удалось записать текст ошибки для {file_name}: {e}')
+
+
+def quantiles(values):
+    ordered = sorted(values)
+    return {f'p{int(quantile * 100)}': round_or_none(percentile(ordered, quantile), 3)
+            for quantile in LATENCY_QUANTILES}
+
+
+class FolderJob(BaseJob):
+    """Загрузка одного файла горячей папки; хранит время появления файла и ход загрузки."""
+
+    def __init__(self, path, detected_at, fn, *args):
+        super().__init__(checked_task, fn, *args)
+        self.path = path
+        self.file_name = os.path.basename(path)
+        self.detected_at = detected_at
+        self.started_at = None
+        self.done = 0
+        self.total = 0
+
+    def report_progress(self, done, total):
+        super().report_progress(done, total)
+        self.done, self.total = done, total
+
+    def report_status(self, text):
+        logging.debug('%s: %s', self.file_name, text)
+
+
+class HotFolder:
+    """Наблюдение за папкой, очередь файлов и пул потоков загрузки."""
+
+    def __init__(self, root, api, mode='upload', sklad=None, workers=DEFAULT_WORKERS, max_queue=DEFAULT_MAX_QUEUE,
+                 poll_interval=POLL_INTERVAL_SECONDS, settle_seconds=SETTLE_SECONDS,
+                 status_interval=STATUS_INTERVAL_SECONDS, metrics_dir=None):
+        self.root = os.path.abspath(root)
+        self.processing_dir = os.path.join(self.root, PROCESSING_DIR_NAME)
+        self.done_dir = os.path.join(self.root, DONE_DIR_NAME)
+        self.failed_dir = os.path.join(self.root, FAILED_DIR_NAME)
+        for directory in (self.processing_dir, self.done_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self.api = api
+        self.make_job = MODES[mode]
+        self.sklad = sklad
+        self.workers = workers
+        self.max_queue = max_queue
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.status_interval = status_interval
+        self.metrics_dir = metrics_dir
+
+        # Файлы в папке, еще не взятые в работу: путь -> ((размер, время изменения), когда изменился, когда появился)
+        self.seen = {}
+        self.queue = queue.Queue()
+        self.running = {}
+        self.done_count = 0
+        self.failed_count = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.wait_times = deque(maxlen=LATENCY_WINDOW)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def new_job(self, path, detected_at):
+        return FolderJob(path, detected_at, *self.make_job(self, path))
+
+    # --- Поиск файлов
+
+    def recover(self):
+        """Ставит в очередь файлы, оставшиеся в processing/ после аварийной остановки."""
+        now = time.monotonic()
+        for entry in sorted(os.scandir(self.processing_dir), key=lambda entry: entry.stat().st_mtime):
+            if entry.is_file() and is_task_file(entry.name):
+                logging.info('Горячая папка: продолжение загрузки %s после перезапуска', entry.name)
+                self.queue.put(self.new_job(entry.path, now))
+
+    def scan(self):
+        """Находит докопированные файлы и берет их в работу, пока в очереди есть место."""
+        now = time.monotonic()
+        present = {}
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError as e:
+            logging.error(f'Горячая папка недоступна: {e}')
+            return
+        for entry in entries:
+            try:
+                if not entry.is_file() or not is_task_file(entry.name):
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue  # файл удален или переименован во время просмотра
+            signature = (stat.st_size, stat.st_mtime_ns)
+            previous = self.seen.get(entry.path)
+            if previous is None:
+                present[entry.path] = (signature, now, now)
+            elif previous[0] != signature:
+                present[entry.path] = (signature, now, previous[2])
+            else:
+                present[entry.path] = previous
+        self.seen = present
+
+        ready = [(first_seen, path) for path, (signature, changed_at, first_seen) in present.items()
+                 if signature[0] > 0 and now - changed_at >= self.settle_seconds]
+        for first_seen, path in sorted(ready):
+            if self.queue.qsize() >= self.max_queue:
+                break
+            if self.claim(path, first_seen):
+                del self.seen[path]
+
+    def claim(self, path, detected_at):
+        """
+        Переносит файл в processing/ и ставит в очередь; уже загруженный (есть в done/) -
+        в failed/. False - файл еще занят или уже загружается.
+        """
+        file_name = os.path.basename(path)
+        if os.path.exists(os.path.join(self.done_dir, file_name)):
+            return self.reject(path, f"Задание '{file_name}' уже загружено (файл есть в {DONE_DIR_NAME}/) и "
+                                     f"повторно не загружается. Чтобы загрузить его снова, переименуйте файл "
+                                     f"или уберите прежний файл из {DONE_DIR_NAME}/.")
+        target = os.path.join(self.processing_dir, file_name)
+        if os.path.exists(target):
+            return False  # файл с тем же именем еще загружается; этот ждет своей очереди
+        try:
+            os.replace(path, target)
+        except OSError as e:
+            # В Windows файл, который еще копируется, нельзя перенести
+            logging.debug('Горячая папка: файл %s пока недоступен: %s', path, e)
+            return False
+        self.queue.put(self.new_job(target, detected_at))
+        logging.info('Горячая папка: в очереди %s (очередь %d)', file_name, self.queue.qsize())
+        return True
+
+    def reject(self, path, message):
+        """Переносит файл из папки в failed/ без загрузки. False - файл еще занят."""
+        file_name = os.path.basename(path)
+        target = unique_path(self.failed_dir, file_name)
+        try:
+            os.replace(path, target)
+        except OSError as e:
+            logging.debug('Горячая папка: файл %s пока недоступен: %s', path, e)
+            return False
+        write_error(target, file_name, message)
+        with self.lock:
+            self.failed_count += 1
+        logging.warning(f'Горячая папка: {file_name} не загружается: {message}')
+        return True
+
+    # --- Загрузка
+
+    def worker(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            if self.stop_event.is_set():
+                self.release(job)
+                continue
+            self.process(job)
+
+    def process(self, job):
+        job.started_at = time.monotonic()
+        with self.lock:
+            self.running[job.path] = job
+        outcome, value = job.execute()
+        finished = time.monotonic()
+        with self.lock:
+            del self.running[job.path]
+
+        if outcome == OUTCOME_SUCCESS:
+            self.finish(job, self.done_dir)
+            with self.lock:
+                self.done_count += 1
+                self.latencies.append(finished - job.detected_at)
+                self.wait_times.append(job.started_at - job.detected_at)
+            logging.info('Горячая папка: загружен %s за %.1f с (с момента появления %.1f с)',
+                         job.file_name, finished - job.started_at, finished - job.detected_at)
+        elif outcome == OUTCOME_FAILED:
+            target = self.finish(job, self.failed_dir)
+            write_error(target, job.file_name, value)
+            with self.lock:
+                self.failed_count += 1
+            logging.error(f'Горячая папка: ошибка загрузки {job.file_name}: {value}')
+        else:
+            self.cancel_upload(job)
+            self.release(job)
+        self.write_status()
+
+    def finish(self, job, directory):
+        target = unique_path(directory, job.file_name)
+        try:
+            os.replace(job.path, target)
+        except OSError as e:
+            logging.error(f'Не удалось перенести {job.file_name} в {directory}: {e}')
+        return target
+
+    def cancel_upload(self, job):
+        """Удаляет строки отмененной загрузки с сервера, как при отмене в окне загрузки."""
+        try:
+            delete_uploaded_data(self.api, task_prefix(job.file_name), job.file_name)
+        except (JobError, requests.RequestException) as e:
+            logging.error(f'Не удалось удалить загруженные строки {job.file_name}: {e}')
+
+    def release(self, job):
+        """Возвращает файл, не загруженный до остановки службы, в папку."""
+        try:
+            os.replace(job.path, unique_path(self.root, job.file_name))
+        except OSError as e:
+            logging.error(f'Не удалось вернуть {job.file_name} в папку: {e}')
+
+    # --- Состояние
+
+    def status(self):
+        now = time.monotonic()
+        with self.lock:
+            running = [{'file': job.file_name, 'done': job.done, 'total': job.total,
+                        'seconds': round(now - job.started_at, 1)} for job in self.running.values()]
+            latencies, wait_times = list(self.latencies), list(self.wait_times)
+            done_count, failed_count = self.done_count, self.failed_count
+        return {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'incoming': len(self.seen),
+            'queued': self.queue.qsize(),
+            'running': running,
+            'done': done_count,
+            'failed': failed_count,
+            'latency_seconds': quantiles(latencies),
+            'wait_seconds': quantiles(wait_times),
+        }
+
+    def write_status(self):
+        status = self.status()
+        try:
+            write_atomic(os.path.join(self.root, STATUS_FILE_NAME),
+                         json.dumps(status, ensure_ascii=False, indent=2) + '\n')
+            metrics_dir = self.metrics_dir or app_data_dir(METRICS_DIR_NAME)
+            write_atomic(os.path.join(metrics_dir, PROM_FILE_NAME), '\n'.join(prometheus_lines(status)) + '\n')
+        except OSError as e:
+            logging.warning(f'Не удалось записать состояние горячей папки: {e}')
+        return status
+
+    def log_status(self):
+        status = self.write_status()
+        latency = status['latency_seconds']
+        logging.info('Горячая папка: в папке %d, в очереди %d, загружается %d, загружено %d, ошибок %d, '
+                     'задержка p50 %s с, p95 %s с', status['incoming'], status['queued'], len(status['running']),
+                     status['done'], status['failed'], latency['p50'], latency['p95'])
+
+    # --- Работа службы
+
+    def run(self):
+        """Работает до stop(); затем отменяет текущие загрузки и возвращает файлы из очереди в папку."""
+        logging.info('Горячая папка %s: потоков %d, очередь до %d файлов', self.root, self.workers, self.max_queue)
+        self.recover()
+        threads = [threading.Thread(target=self.worker, name=f'hot-folder-{number}', daemon=True)
+                   for number in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        next_status = 0.0
+        while not self.stop_event.is_set():
+            self.scan()
+            if time.monotonic() >= next_status:
+                self.log_status()
+                next_status = time.monotonic() + self.status_interval
+            self.stop_event.wait(self.poll_interval)
+
+        logging.info('Горячая папка: остановка, отмена текущих загрузок...')
+        with self.lock:
+            for job in self.running.values():
+                job.cancel()
+        for _ in threads:
+            self.queue.put(None)
+        for thread in threads:
+            thread.join()
+        self.log_status()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def prometheus_lines(status):
+    """Состояние горячей папки в текстовом формате Prometheus."""
+    lines = [
+        '# HELP packer_hot_folder_files Файлов в горячей папке по состоянию.',
+        '# TYPE packer_hot_folder_files gauge',
+        f'packer_hot_folder_files{{state="incoming"}} {status["incoming"]}',
+        f'packer_hot_folder_files{{state="queued"}} {status["queued"]}',
+        f'packer_hot_folder_files{{state="running"}} {len(status["running"])}',
+        '# HELP packer_hot_folder_processed_total Файлов обработано с запуска службы.',
+        '# TYPE packer_hot_folder_processed_total counter',
+        f'packer_hot_folder_processed_total{{outcome="done"}} {status["done"]}',
+        f'packer_hot_folder_processed_total{{outcome="failed"}} {status["failed"]}',
+    ]
+    for name, key, description in (('latency', 'latency_seconds', 'от появления файла до конца загрузки'),
+                                   ('wait', 'wait_seconds', 'от появления файла до начала загрузки')):
+        metric = f'packer_hot_folder_{name}_seconds'
+        lines += [f'# HELP {metric} Время {description}.', f'# TYPE {metric} gauge']
+        for quantile in LATENCY_QUANTILES:
+            value = status[key][f'p{int(quantile * 100)}']
+            value = 'NaN' if value is None else value
+            lines.append(f'{metric}{{quantile="{label_value(quantile)}"}} {value}')
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('folder', help='папка, в которую кладут файлы заданий')
+    parser.add_argument('--mode', choices=list(MODES), default='upload',
+                        help='upload - задания (test.py), load-task - задания ВПС (netr.py)')
+    parser.add_argument('--sklad', help='склад для режима upload')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='файлов загружается одновременно')
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE, help='файлов в очереди')
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL_SECONDS)
+    parser.add_argument('--settle', type=float, default=SETTLE_SECONDS, help='файл не менялся столько секунд')
+    parser.add_argument('--status-interval', type=float, default=STATUS_INTERVAL_SECONDS)
+    parser.add_argument('--api-url', help='адрес сервера (по умолчанию PACKER_API_URL)')
+    args = parser.parse_args(argv)
+    if args.mode == 'upload' and not args.sklad:
+        parser.error('для режима upload нужен --sklad')
+    if not os.path.isdir(args.folder):
+        parser.error(f'папка не найдена: {args.folder}')
+
+    setup_logging(logging.INFO)
+    folder = HotFolder(args.folder, get_client(args.api_url), mode=args.mode, sklad=args.sklad,
+                       workers=args.workers, max_queue=args.max_queue, poll_interval=args.poll_interval,
+                       settle_seconds=args.settle, status_interval=args.status_interval)
+    signal.signal(signal.SIGTERM, lambda *_: folder.stop())
+    signal.signal(signal.SIGINT, lambda *_: folder.stop())
+    folder.run()
+
+
+if __name__ == '__main__':
+    main()
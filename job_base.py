@@ -0,0 +1,101 @@
+"""
+Задание загрузки или скачивания без привязки к интерфейсу.
+
+Функции заданий (task_jobs) вызываются как fn(job, *args, **kwargs) и
+общаются с вызывающим только через job: прогресс, статус, пауза, отмена
+и метрики.
+Окна выполняют их в пуле Qt (jobs.Job), а командная строка и служба
+горячей папки - в обычных потоках (BaseJob и его наследники).
+"""
+import logging
+import threading
+
+from job_metrics import OUTCOME_CANCELLED, OUTCOME_FAILED, OUTCOME_SUCCESS, JobMetrics
+
+
+class JobError(Exception):
+    """Ожидаемая ошибка задания, текст которой показывается пользователю."""
+
+
+class JobCancelled(Exception):
+    """Задание отменено пользователем."""
+
+
+class BaseJob:
+    """
+    Задание: функция, ее аргументы, флаги отмены и паузы и метрики. Наследники
+    переопределяют report_progress/report_status (вызывая report_progress
+    базового класса), чтобы показывать ход работы. Задание на паузе
+    останавливается при следующем сообщении о прогрессе (между строками
+    загрузки) и ждет продолжения или отмены.
+    Метрики, начатые через job.start_metrics, записываются по завершении задания.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancel_event = threading.Event()
+        # Сброшен - задание на паузе
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.metrics = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.resume_event.set()  # задание на паузе тоже должно увидеть отмену
+
+    def pause(self):
+        if not self.is_cancelled():
+            self.resume_event.clear()
+
+    def resume(self):
+        self.resume_event.set()
+
+    def is_paused(self):
+        return not self.resume_event.is_set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.is_cancelled():
+            raise JobCancelled()
+
+    def start_metrics(self, job_type, name=''):
+        """Начинает сбор метрик задания (job_type - имя файла метрик, например 'upload_file')."""
+        self.metrics = JobMetrics(job_type, name)
+        return self.metrics
+
+    def report_progress(self, done, total):
+        self.resume_event.wait()
+
+    def report_status(self, text):
+        pass
+
+    def execute(self):
+        """
+        Выполняет функцию задания и записывает метрики. Возвращает (итог, значение):
+        результат функции при успехе, текст ошибки при неудаче, None при отмене.
+        Функция, которая завершилась без исключения, выполнена: отмена, нажатая
+        после этого, не превращает задание в отмененное (иначе действие после
+        отмены удалило бы полностью загруженные строки).
+        """
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+        except Exception as e:
+            if self.is_cancelled() or isinstance(e, JobCancelled):
+                logging.info('Задание отменено пользователем.')
+                self.finish_metrics(OUTCOME_CANCELLED)
+                return OUTCOME_CANCELLED, None
+            if not isinstance(e, JobError):
+                logging.exception(f'Ошибка в фоновом задании: {e}')
+            self.finish_metrics(OUTCOME_FAILED)
+            return OUTCOME_FAILED, str(e)
+
+        self.finish_metrics(OUTCOME_SUCCESS)
+        return OUTCOME_SUCCESS, result
+
+    def finish_metrics(self, outcome):
+        if self.metrics is not None:
+            self.metrics.finish(outcome)
@@ -0,0 +1,268 @@
+"""
+Метрики фоновых заданий загрузки и скачивания.
+
+Задание накапливает время по этапам (чтение, очистка, формирование строк,
+отправка, ожидание повторов, запись Excel), задержки HTTP-запросов и число
+повторов, а по завершении дописывает итог в metrics/jobs.jsonl и
+перезаписывает textfile Prometheus (metrics/<задание>.prom) в папке
+служебных файлов приложения.
+
+Этапы могут идти одновременно (куски файла готовятся в фоновом потоке,
+пока отправляются предыдущие), поэтому сумма этапов может быть больше
+общей длительности задания.
+"""
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from app_paths import app_data_dir
+
+METRICS_DIR_NAME = 'metrics'
+JOBS_LOG_NAME = 'jobs.jsonl'
+
+# Этапы заданий
+STAGE_READ = 'read'  # чтение и проверка Excel-файла
+STAGE_CLEAN = 'clean'
+STAGE_BUILD = 'build'  # формирование строк для отправки
+STAGE_SEND = 'send'  # отправка строк, включая ожидание повторов
+STAGE_RETRY_WAIT = 'retry_wait'  # паузы перед повторами и ожидание выключателя
+STAGE_DOWNLOAD = 'download'  # запрос и разбор ответа при скачивании
+STAGE_REPORT = 'report'
+STAGE_EXCEL_WRITE = 'excel_write'
+
+# Перцентили задержки запросов в итоге задания
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+
+# Текущая скорость задания считается по последним RATE_WINDOW_SECONDS секундам
+RATE_WINDOW_SECONDS = 10
+
+# Итог задания
+OUTCOME_SUCCESS = 'success'
+OUTCOME_FAILED = 'failed'
+OUTCOME_CANCELLED = 'cancelled'
+
+# Задания завершаются в разных потоках: строки jobs.jsonl дописываются по одной
+_jobs_log_lock = threading.Lock()
+
+
+def percentile(sorted_values, quantile):
+    """Перцентиль по ближайшему рангу из отсортированного списка (None для пустого)."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(quantile * len(sorted_values)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def round_or_none(value, digits=6):
+    return None if value is None else round(value, digits)
+
+
+class RateMeter:
+    """Текущая скорость (строк/с) по прогрессу за последние window секунд - для окон прогресса."""
+
+    def __init__(self, window=RATE_WINDOW_SECONDS):
+        self.window = window
+        self.samples = deque()
+
+    def add(self, value):
+        now = time.monotonic()
+        samples = self.samples
+        if samples and value < samples[-1][1]:
+            samples.clear()  # прогресс начался заново (например, после продолжения загрузки)
+        samples.append((now, value))
+        while len(samples) > 2 and now - samples[1][0] >= self.window:
+            samples.popleft()
+
+    def rate(self, min_seconds=0.0):
+        """Скорость от первого замера окна до текущего момента; None - замеров слишком мало."""
+        if not self.samples:
+            return None
+        now = time.monotonic()
+        (started_at, started_value), (_, value) = self.samples[0], self.samples[-1]
+        if now - started_at < min_seconds or now <= started_at:
+            return None
+        return (value - started_value) / (now - started_at)
+
+
+def format_rate(rate, remaining=0):
+    """Текст скорости для окон: '1 200 строк/с, осталось ~2:05' (оценка времени - если осталось что загружать)."""
+    text = f"{rate:,.0f} строк/с".replace(',', ' ')
+    if remaining > 0 and rate > 0:
+        seconds = int(remaining / rate)
+        text += f", осталось ~{seconds // 60}:{seconds % 60:02d}"
+    return text
+
+
+class JobMetrics:
+    """
+    Метрики одного задания. Методы потокобезопасны: строки отправляются
+    из нескольких потоков, а куски файла готовятся в фоновом потоке.
+    """
+
+    def __init__(self, job_type, name=''):
+        self.job_type = job_type
+        self.name = name
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.finished = None
+        self.outcome = None
+        self.rows = 0
+        self.stages = {}
+        self.latencies = []
+        self.failed_requests = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, stage):
+        """Добавляет время выполнения блока к этапу."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(stage, time.perf_counter() - started)
+
+    def add_stage_time(self, stage, seconds):
+        with self.lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def record_request(self, seconds, failed=False):
+        """Задержка одного HTTP-запроса; failed - ошибка сети или ответ сервера с ошибкой."""
+        with self.lock:
+            self.latencies.append(seconds)
+            self.failed_requests += failed
+
+    def record_retry(self, wait_seconds):
+        with self.lock:
+            self.retries += 1
+            self.stages[STAGE_RETRY_WAIT] = self.stages.get(STAGE_RETRY_WAIT, 0.0) + wait_seconds
+
+    def add_rows(self, count=1):
+        with self.lock:
+            self.rows += count
+
+    def duration(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self):
+        """Итог задания в виде словаря (то, что пишется в jobs.jsonl)."""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            stages = dict(self.stages)
+            rows, retries, failed_requests = self.rows, self.retries, self.failed_requests
+        duration = self.duration()
+        return {
+            'job': self.job_type,
+            'name': self.name,
+            'outcome': self.outcome,
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'duration_seconds': round(duration, 3),
+            'rows': rows,
+            'rows_per_second': round(rows / duration, 1) if duration > 0 else 0.0,
+            'stages_seconds': {stage: round(seconds, 3) for stage, seconds in stages.items()},
+            'requests': {
+                'count': len(latencies),
+                'failed': failed_requests,
+                'latency_sum_seconds': round(sum(latencies), 3),
+                'latency_seconds': {f'p{int(quantile * 100)}': round_or_none(percentile(latencies, quantile))
+                                    for quantile in LATENCY_QUANTILES},
+            },
+            'retries': retries,
+        }
+
+    def finish(self, outcome, directory=None):
+        """Фиксирует итог и записывает файлы метрик. Ошибки записи только пишутся в журнал."""
+        self.finished = time.perf_counter()
+        self.outcome = outcome
+        summary = self.summary()
+        logging.info('Метрики задания %s (%s): %s', self.job_type, self.name, summary)
+        try:
+            directory = directory or app_data_dir(METRICS_DIR_NAME)
+            line = json.dumps(summary, ensure_ascii=False) + '\n'
+            with _jobs_log_lock, open(os.path.join(directory, JOBS_LOG_NAME), 'a', encoding='utf-8') as file:
+                file.write(line)
+            write_textfile(os.path.join(directory, f'{self.job_type}.prom'), summary)
+        except OSError as e:
+            logging.warning(f'Не удалось записать метрики задания: {e}')
+        return summary
+
+
+def label_value(value):
+    """Экранирует значение метки Prometheus."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_lines(summary):
+    """Итог последнего задания в текстовом формате Prometheus (для node_exporter textfile)."""
+    job = f'job_type="{label_value(summary["job"])}"'
+    requests = summary['requests']
+    lines = [
+        '# HELP packer_job_finished_timestamp_seconds Время завершения последнего задания.',
+        '# TYPE packer_job_finished_timestamp_seconds gauge',
+        f'packer_job_finished_timestamp_seconds{{{job}}} {time.time():.3f}',
+        '# HELP packer_job_success Последнее задание завершилось успешно.',
+        '# TYPE packer_job_success gauge',
+        f'packer_job_success{{{job}}} {int(summary["outcome"] == OUTCOME_SUCCESS)}',
+        '# HELP packer_job_duration_seconds Длительность последнего задания.',
+        '# TYPE packer_job_duration_seconds gauge',
+        f'packer_job_duration_seconds{{{job}}} {summary["duration_seconds"]}',
+        '# HELP packer_job_rows Строк обработано последним заданием.',
+        '# TYPE packer_job_rows gauge',
+        f'packer_job_rows{{{job}}} {summary["rows"]}',
+        '# HELP packer_job_rows_per_second Средняя скорость последнего задания.',
+        '# TYPE packer_job_rows_per_second gauge',
+        f'packer_job_rows_per_second{{{job}}} {summary["rows_per_second"]}',
+        '# HELP packer_job_retries Повторов запросов в последнем задании.',
+        '# TYPE packer_job_retries gauge',
+        f'packer_job_retries{{{job}}} {summary["retries"]}',
+        '# HELP packer_job_failed_requests Неуспешных запросов в последнем задании.',
+        '# TYPE packer_job_failed_requests gauge',
+        f'packer_job_failed_requests{{{job}}} {requests["failed"]}',
+        '# HELP packer_job_stage_seconds Время этапов последнего задания.',
+        '# TYPE packer_job_stage_seconds gauge',
+    ]
+    for stage, seconds in sorted(summary['stages_seconds'].items()):
+        lines.append(f'packer_job_stage_seconds{{{job},stage="{label_value(stage)}"}} {seconds}')
+
+    lines += [
+        '# HELP packer_job_request_latency_seconds Задержка HTTP-запросов последнего задания.',
+        '# TYPE packer_job_request_latency_seconds summary',
+    ]
+    for quantile in LATENCY_QUANTILES:
+        value = requests['latency_seconds'][f'p{int(quantile * 100)}']
+        lines.append(f'packer_job_request_latency_seconds{{{job},quantile="{quantile}"}} '
+                     f'{"NaN" if value is None else value}')
+    lines += [
+        f'packer_job_request_latency_seconds_sum{{{job}}} {requests["latency_sum_seconds"]}',
+        f'packer_job_request_latency_seconds_count{{{job}}} {requests["count"]}',
+    ]
+    return lines
+
+
+def write_atomic(path, text):
+    """
+    Записывает файл целиком через временный файл, чтобы читатель не увидел его наполовину.
+    Имя временного файла уникально, поэтому одновременные записи из разных потоков
+    не мешают друг другу: остается файл последней из них.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or None, prefix=os.path.basename(path) + '.',
+                                     suffix='.tmp')
+    try:
+        with open(fd, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_textfile(path, summary):
+    """Записывает textfile Prometheus с итогом задания."""
+    write_atomic(path, '\n'.join(prometheus_lines(summary)) + '\n')
@@ -0,0 +1,96 @@
+"""
+Фоновые задания для загрузки и скачивания.
+
+Сетевые запросы и обработка pandas выполняются в пуле потоков QThreadPool,
+а окно получает прогресс и результат через сигналы, поэтому интерфейс
+не замирает на медленных ответах и повторах.
+"""
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from job_base import BaseJob
+from job_metrics import OUTCOME_FAILED, OUTCOME_SUCCESS
+
+# Количество заданий, выполняемых одновременно
+MAX_CONCURRENT_JOBS = 4
+
+
+class JobSignals(QObject):
+    progress = pyqtSignal(int, int)  # выполнено, всего
+    status = pyqtSignal(str)
+    finished = pyqtSignal(object)  # результат функции задания
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class Job(BaseJob, QRunnable):
+    """
+    Задание пула потоков. Функция вызывается как fn(job, *args, **kwargs)
+    и сообщает о ходе работы через job.report_progress/job.report_status,
+    которые передаются окну сигналами.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        QRunnable.__init__(self)
+        BaseJob.__init__(self, fn, *args, **kwargs)
+        # Сигналы создаются в потоке интерфейса, поэтому обработчики вызываются в нем же
+        self.signals = JobSignals()
+        self.setAutoDelete(False)
+
+    def report_progress(self, done, total):
+        super().report_progress(done, total)
+        self.signals.progress.emit(done, total)
+
+    def report_status(self, text):
+        self.signals.status.emit(text)
+
+    def run(self):
+        outcome, value = self.execute()
+        if outcome == OUTCOME_SUCCESS:
+            self.signals.finished.emit(value)
+        elif outcome == OUTCOME_FAILED:
+            self.signals.failed.emit(value)
+        else:
+            self.signals.cancelled.emit()
+
+
+class JobManager(QObject):
+    """Очередь фоновых заданий с ограничением числа одновременно выполняемых."""
+
+    def __init__(self, max_jobs=MAX_CONCURRENT_JOBS, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_jobs)
+        self.jobs = set()
+
+    def submit(self, fn, *args, progress_window=None, on_finished=None, on_failed=None, on_cancelled=None,
+               on_progress=None, on_status=None, **kwargs):
+        """
+        Ставит функцию в очередь и возвращает задание. Если передано окно
+        прогресса, оно получает прогресс и статус, кнопка отмены отменяет задание,
+        а по завершении окно закрывается. Обработчики подключаются до запуска
+        задания, поэтому не пропускают его первых сигналов.
+        """
+        job = Job(fn, *args, **kwargs)
+        self.jobs.add(job)
+
+        if progress_window is not None:
+            progress_window.bind_job(job)
+        if on_progress:
+            job.signals.progress.connect(on_progress)
+        if on_status:
+            job.signals.status.connect(on_status)
+        for signal, handler in ((job.signals.finished, on_finished), (job.signals.failed, on_failed),
+                                (job.signals.cancelled, on_cancelled)):
+            signal.connect(lambda *args, job=job: self.jobs.discard(job))
+            if handler:
+                signal.connect(handler)
+
+        self.pool.start(job)
+        return job
+
+    def cancel_all(self):
+        for job in list(self.jobs):
+            job.cancel()
+
+    def active_count(self):
+        return len(self.jobs)
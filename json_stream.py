@@ -0,0 +1,188 @@
+"""
+Потоковый разбор JSON-ответов скачивания заданий.
+
+Ответы /download и /downloadData - объект с массивами записей
+({"dataSet1": [...], "dataSet2": [...]} и {"success": true, "data": [...]}).
+response.json() держит в памяти все тело ответа, дерево словарей по записи
+на строку и затем еще DataFrame. Здесь тело читается кусками по мере
+поступления, каждая запись массива разбирается отдельно (сканером json
+из стандартной библиотеки) и сразу раскладывается по спискам столбцов,
+так что в памяти остается примерно одна копия данных.
+"""
+import codecs
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# Размер куска тела ответа при чтении потоком
+STREAM_CHUNK_BYTES = 256 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_decoder = json.JSONDecoder()
+
+
+class ColumnBuffer:
+    """
+    Записи массива по столбцам. to_frame() дает тот же DataFrame, что
+    pd.DataFrame(список записей): столбцы в порядке появления ключей,
+    отсутствующий в записи ключ - NaN.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+
+    def append(self, record):
+        columns = self.columns
+        for key, value in record.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [np.nan] * self.rows
+            column.append(value)
+        self.rows += 1
+        # Обычно у всех записей одинаковые ключи, и выравнивать нечего
+        if len(record) != len(columns):
+            for column in columns.values():
+                if len(column) < self.rows:
+                    column.append(np.nan)
+
+    def extend(self, other):
+        """Добавляет записи другого буфера (следующей страницы) после своих."""
+        columns = self.columns
+        for key, values in other.columns.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [np.nan] * self.rows
+            column.extend(values)
+        self.rows += other.rows
+        for column in columns.values():
+            if len(column) < self.rows:
+                column.extend([np.nan] * (self.rows - len(column)))
+        other.columns = {}
+
+    def to_frame(self):
+        """DataFrame из накопленных записей; списки столбцов освобождаются."""
+        frame = pd.DataFrame(self.columns)
+        self.columns = {}
+        return frame
+
+
+class JsonScanner:
+    """Разбор JSON из потока кусков байтов (UTF-8) с буфером на один кусок."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Дочитывает следующий кусок в буфер; False - тело ответа закончилось."""
+        if self.eof:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self.text_decoder.decode(b'', final=True)
+        else:
+            text = self.text_decoder.decode(chunk)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Следующий символ после пробелов ('' - конец данных)."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f'Ожидался символ {char!r}, получен {found!r}')
+        self.pos += 1
+
+    def value(self):
+        """Разбирает одно значение JSON целиком (дочитывая куски, если оно не поместилось в буфер)."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # Число в конце буфера может быть недочитано: '12' из '125'
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Элементы массива по одному."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f'Ожидался символ \',\' или \']\', получен {separator!r}')
+
+
+def read_json_tables(chunks, tables, as_buffers=False):
+    """
+    Разбирает JSON-объект из кусков тела ответа (например, response.iter_content()).
+
+    Возвращает словарь верхнего уровня, в котором массивы записей с ключами
+    из tables заменены на DataFrame (null или отсутствующий ключ - пустой
+    DataFrame), а при as_buffers - на ColumnBuffer. Остальные значения
+    возвращаются как есть. Ошибка разбора - ValueError.
+    """
+    scanner = JsonScanner(chunks)
+    result = {}
+    scanner.expect('{')
+    if scanner.peek() == '}':
+        scanner.pos += 1
+    else:
+        while True:
+            key = scanner.value()
+            if not isinstance(key, str):
+                raise ValueError(f'Ожидался ключ объекта, получено {key!r}')
+            scanner.expect(':')
+            if key in tables and scanner.peek() == '[':
+                buffer = ColumnBuffer()
+                for record in scanner.items():
+                    if not isinstance(record, dict):
+                        raise ValueError(f'Элемент массива {key} не объект: {record!r}')
+                    buffer.append(record)
+                result[key] = buffer if as_buffers else buffer.to_frame()
+            else:
+                value = scanner.value()
+                if key in tables and value is not None:
+                    raise ValueError(f'Значение {key} не массив')
+                result[key] = value
+            separator = scanner.peek()
+            scanner.pos += 1
+            if separator == '}':
+                break
+            if separator != ',':
+                raise ValueError(f'Ожидался символ \',\' или \'}}\', получен {separator!r}')
+    if scanner.peek() != '':
+        raise ValueError('Лишние данные после JSON-объекта')
+
+    for key in tables:
+        if result.get(key) is None:
+            result[key] = ColumnBuffer() if as_buffers else pd.DataFrame()
+    return result
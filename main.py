@@ -5,16 +5,20 @@ import requests
 import pandas as pd
 import logging
 from io import StringIO
-import numpy as np
 import time
+from itertools import chain
 
-# Настройка логирования
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+from api_client import LEGACY_API_BASE_URL, get_client
+from app_logging import SampledLog, setup_logging
+from excel_reader import ExcelReader
+from payload_builder import clean_nulls
+from upload_engine import send_row
 
 
 class FileUploaderApp:
     def __init__(self, root):
         self.root = root
+        self.api = get_client(LEGACY_API_BASE_URL)
         self.root.title("Packer Desktop")
         self.root.geometry("900x750")
         self.root.configure(bg='#f0f0f0')
@@ -84,7 +88,7 @@ class FileUploaderApp:
     def load_in_progress_tasks(self):
         """Запрашивает список выполняемых заданий с сервера и отображает их в listbox."""
         try:
-            response = requests.get('https://corrywilliams.ru/tasks-in-progress')
+            response = self.api.get('/tasks-in-progress')
             response.raise_for_status()
             tasks = response.json().get('tasksInProgress', [])
 
@@ -112,7 +116,7 @@ class FileUploaderApp:
     def load_sklad_options(self):
         """Запрос к серверу для получения списка складов и загрузка их в ComboBox."""
         try:
-            response = requests.get('https://corrywilliams.ru/sklads')
+            response = self.api.get('/sklads')
             response.raise_for_status()  # Вызывает ошибку при неуспешном статусе
             sklads = response.json().get('sklads', [])
             if sklads:
@@ -149,6 +153,11 @@ class FileUploaderApp:
         self.progress_window.destroy()
         self.remove_uploaded_data()
 
+    def show_retry_status(self, text):
+        """Показывает в окне прогресса сообщение о повторе или паузе загрузки."""
+        self.progress_label.config(text=text)
+        self.progress_window.update()
+
     def update_progress(self, value):
         """Обновление прогресс-бара."""
         self.progress_bar['value'] = value
@@ -158,7 +167,7 @@ class FileUploaderApp:
         """Удаляет ранее отправленные данные с сервера."""
         try:
             payload = {'pref': self.current_pref, 'Nazvanie_Zadaniya': self.current_task_name}
-            response = requests.post('https://corrywilliams.ru/delete-uploaded-data', json=payload)
+            response = self.api.post('/delete-uploaded-data', json=payload)
             if response.status_code == 200:
                 logging.info('Ранее отправленные данные успешно удалены.')
             else:
@@ -193,100 +202,82 @@ class FileUploaderApp:
             return
 
         try:
-            # Чтение данных из Excel-файла
-            data = pd.read_excel(file_path)
-
-            # Проверка, что файл содержит данные
-            if data.empty:
-                messagebox.showwarning("Предупреждение", "Файл пустой.")
-                return
-
-            # Замена NaN, пустых строк и некорректных значений на None
-            data = data.where(pd.notnull(data), None)
-            # data = data.replace({np.nan: None, '': None, ' ': None})
-
-            # # Замена всех типов данных float с 'NaN' и 'nan' на None с использованием NumPy
-            for column in data.columns:
-                data[column] = data[column].replace({np.nan: None, 'nan': None, 'NaN': None, '': None, ' ': None, '  ': None,  '   ': None})
-
-            # Отображение окна прогресса
-            self.show_progress_window(len(data))
-
-            url = "https://corrywilliams.ru/upload-data"
-
-            # Обработка каждой строки
-            for index, row in data.iterrows():
-                artikul_syrya_value = row.get('Артикул Сырья')
-                if pd.notna(artikul_syrya_value):
-                    # Проверяем, является ли значение числом с плавающей точкой
-                    if isinstance(artikul_syrya_value, float) and artikul_syrya_value.is_integer():
-                        artikul_syrya = str(int(artikul_syrya_value))  # Убираем .0 и преобразуем в строку
-                    else:
-                        artikul_syrya = str(artikul_syrya_value)  # Преобразуем в строку
-                else:
-                    artikul_syrya = None  # Если значение пустое, ставим None для отправки как NULL
-                payload = {
-                    'Artikul': row.get('Артикул'),
-                    'Artikul_Syrya': artikul_syrya,  # None если отсутствует
-                    'Nomenklatura': row.get('Номенклатура'),
-                    'Nazvanie_Tovara': row.get('Название товара'),
-                    'SHK': row.get('ШК'),
-                    'SHK_Syrya': row.get('ШК Сырья'),
-                    'SHK_SPO': row.get('ШК СПО'),
-                    'Kol_vo_Syrya': row.get('Кол-во сырья'),
-                    'Itog_Zakaz': row.get('Итог Заказ'),
-                    'SOH': row.get('СОХ'),
-                    'Tip_Postavki': row.get('тип поставки'),
-                    'Srok_Godnosti': row.get('Срок Годности'),
-                    'Op_1_Bl_1_Sht': self.process_op_column_value(row.get('Оп 1 бл. 1 шт')),
-                    'Op_2_Bl_2_Sht': self.process_op_column_value(row.get('Оп 2 бл.2 шт')),
-                    'Op_3_Bl_3_Sht': self.process_op_column_value(row.get('Оп 3 бл.3 шт')),
-                    'Op_4_Bl_4_Sht': self.process_op_column_value(row.get('Оп 4 бл.4шт')),
-                    'Op_5_Bl_5_Sht': self.process_op_column_value(row.get('Оп 5 бл.5 шт')),
-                    'Op_6_Blis_6_10_Sht': self.process_op_column_value(row.get('Оп 6 блис.6-10шт')),
-                    'Op_7_Pereschyot': self.process_op_column_value(row.get('Оп 7 пересчет')),
-                    'Op_9_Fasovka_Sborka': self.process_op_column_value(row.get('Оп 9 фасовка/сборка')),
-                    'Op_10_Markirovka_SHT': self.process_op_column_value(row.get('Оп 10 Маркировка ШТ')),
-                    'Op_11_Markirovka_Prom': self.process_op_column_value(row.get('Оп 11 маркировка пром')),
-                    'Op_13_Markirovka_Fabr': self.process_op_column_value(row.get('Оп 13 маркировка фабр')),
-                    'Op_14_TU_1_Sht': self.process_op_column_value(row.get('Оп 14 ТУ 1 шт')),
-                    'Op_15_TU_2_Sht': self.process_op_column_value(row.get('Оп 15 ТУ 2 шт')),
-                    'Op_16_TU_3_5': self.process_op_column_value(row.get('Оп 16 ТУ 3-5')),
-                    'Op_17_TU_6_8': self.process_op_column_value(row.get('Оп 17 ТУ 6-8')),
-                    'Op_468_Proverka_SHK': self.process_op_column_value(row.get('Оп 468 проверка ШК')),
-                    'Op_469_Spetsifikatsiya_TM': self.process_op_column_value(row.get('Оп 469 Спецификация ТМ')),
-                    'Op_470_Dop_Upakovka': self.process_op_column_value(row.get('Оп 470 доп упаковка')),
-                    'Mesto': row.get('Место'),
-                    'Vlozhennost': row.get('Вложенность'),
-                    'Pallet_No': row.get('Паллет №'),
-                    'pref': pref,
-                    'Scklad_Pref': selected_sklad,
-                    'Status': 0,
-                    'Status_Zadaniya': 0,
-                    'Nazvanie_Zadaniya': file_name
-                }
-
-                # Пытаемся отправить строку на сервер до успешного завершения
-                success = False
-                while not success:
-                    try:
-                        response = requests.post(url, json=payload, timeout=75, verify=True)
-                        if response.status_code == 200:
-                            logging.info(f'Строка {index + 1} успешно загружена.')
-                            logging.info(f'{payload}')
-
-                            success = True  # Успешная отправка
+            # Чтение Excel-файла кусками, без загрузки всего файла в память
+            with ExcelReader(file_path) as reader:
+                chunks = reader.iter_chunks()
+
+                # Проверка, что файл содержит данные
+                first_chunk = next(chunks, None)
+                if first_chunk is None:
+                    messagebox.showwarning("Предупреждение", "Файл пустой.")
+                    return
+
+                # Отображение окна прогресса
+                total = reader.row_count or len(first_chunk)
+                self.show_progress_window(total)
+
+                # Обработка каждой строки; NaN, пустые строки и некорректные значения заменяются на None
+                rows = (row for chunk in chain([first_chunk], chunks) for _, row in clean_nulls(chunk).iterrows())
+                row_log = SampledLog()
+                for index, row in enumerate(rows):
+                    artikul_syrya_value = row.get('Артикул Сырья')
+                    if pd.notna(artikul_syrya_value):
+                        # Проверяем, является ли значение числом с плавающей точкой
+                        if isinstance(artikul_syrya_value, float) and artikul_syrya_value.is_integer():
+                            artikul_syrya = str(int(artikul_syrya_value))  # Убираем .0 и преобразуем в строку
                         else:
-                            logging.error(f'Ошибка при загрузке строки {index + 1}: {response.text}')
-                            time.sleep(2)  # Ожидание перед повтором
-
-                    except requests.exceptions.RequestException as e:
-                        logging.error(f'Ошибка при загрузке строки {index + 1}: {e}')
-                        time.sleep(2)  # Ожидание перед повтором
-
-                # Обновляем прогресс
-                self.update_progress(index + 1)
-                time.sleep(0.2)
+                            artikul_syrya = str(artikul_syrya_value)  # Преобразуем в строку
+                    else:
+                        artikul_syrya = None  # Если значение пустое, ставим None для отправки как NULL
+                    payload = {
+                        'Artikul': row.get('Артикул'),
+                        'Artikul_Syrya': artikul_syrya,  # None если отсутствует
+                        'Nomenklatura': row.get('Номенклатура'),
+                        'Nazvanie_Tovara': row.get('Название товара'),
+                        'SHK': row.get('ШК'),
+                        'SHK_Syrya': row.get('ШК Сырья'),
+                        'SHK_SPO': row.get('ШК СПО'),
+                        'Kol_vo_Syrya': row.get('Кол-во сырья'),
+                        'Itog_Zakaz': row.get('Итог Заказ'),
+                        'SOH': row.get('СОХ'),
+                        'Tip_Postavki': row.get('тип поставки'),
+                        'Srok_Godnosti': row.get('Срок Годности'),
+                        'Op_1_Bl_1_Sht': self.process_op_column_value(row.get('Оп 1 бл. 1 шт')),
+                        'Op_2_Bl_2_Sht': self.process_op_column_value(row.get('Оп 2 бл.2 шт')),
+                        'Op_3_Bl_3_Sht': self.process_op_column_value(row.get('Оп 3 бл.3 шт')),
+                        'Op_4_Bl_4_Sht': self.process_op_column_value(row.get('Оп 4 бл.4шт')),
+                        'Op_5_Bl_5_Sht': self.process_op_column_value(row.get('Оп 5 бл.5 шт')),
+                        'Op_6_Blis_6_10_Sht': self.process_op_column_value(row.get('Оп 6 блис.6-10шт')),
+                        'Op_7_Pereschyot': self.process_op_column_value(row.get('Оп 7 пересчет')),
+                        'Op_9_Fasovka_Sborka': self.process_op_column_value(row.get('Оп 9 фасовка/сборка')),
+                        'Op_10_Markirovka_SHT': self.process_op_column_value(row.get('Оп 10 Маркировка ШТ')),
+                        'Op_11_Markirovka_Prom': self.process_op_column_value(row.get('Оп 11 маркировка пром')),
+                        'Op_13_Markirovka_Fabr': self.process_op_column_value(row.get('Оп 13 маркировка фабр')),
+                        'Op_14_TU_1_Sht': self.process_op_column_value(row.get('Оп 14 ТУ 1 шт')),
+                        'Op_15_TU_2_Sht': self.process_op_column_value(row.get('Оп 15 ТУ 2 шт')),
+                        'Op_16_TU_3_5': self.process_op_column_value(row.get('Оп 16 ТУ 3-5')),
+                        'Op_17_TU_6_8': self.process_op_column_value(row.get('Оп 17 ТУ 6-8')),
+                        'Op_468_Proverka_SHK': self.process_op_column_value(row.get('Оп 468 проверка ШК')),
+                        'Op_469_Spetsifikatsiya_TM': self.process_op_column_value(row.get('Оп 469 Спецификация ТМ')),
+                        'Op_470_Dop_Upakovka': self.process_op_column_value(row.get('Оп 470 доп упаковка')),
+                        'Mesto': row.get('Место'),
+                        'Vlozhennost': row.get('Вложенность'),
+                        'Pallet_No': row.get('Паллет №'),
+                        'pref': pref,
+                        'Scklad_Pref': selected_sklad,
+                        'Status': 0,
+                        'Status_Zadaniya': 0,
+                        'Nazvanie_Zadaniya': file_name
+                    }
+
+                    # Отправляем строку с повторами по политике; пауза при сбоях сервера видна в окне прогресса
+                    send_row(self.api, '/upload-data', payload, index, total, timeout=75,
+                             on_event=self.show_retry_status)
+                    row_log.log(logging.INFO, 'Строка %d успешно загружена: %s', index + 1, payload)
+
+                    # Обновляем прогресс
+                    self.update_progress(index + 1)
+                    time.sleep(0.2)
 
             # Закрываем окно прогресса после завершения
             self.progress_window.destroy()
@@ -298,7 +289,7 @@ class FileUploaderApp:
     def load_completed_tasks(self):
         """Загружает список выполненных задач с сервера и отображает их в списке."""
         try:
-            response = requests.get('https://corrywilliams.ru/completed-tasks')
+            response = self.api.get('/completed-tasks')
             response.raise_for_status()
             tasks = response.json().get('tasks', [])
             self.update_task_listbox(tasks)
@@ -326,7 +317,7 @@ class FileUploaderApp:
         column_names = self.get_column_names()
 
         try:
-            response = requests.get(f'https://corrywilliams.ru/download?task={selected_task}', stream=True)
+            response = self.api.get('/download', params={'task': selected_task}, stream=True)
             response.raise_for_status()
 
             # Process WB-specific data
@@ -338,7 +329,7 @@ class FileUploaderApp:
                 # Check if data_set1 has required data
                 if not data_set1.empty:
                     # Check column names before processing
-                    print("Columns in data_set1:", data_set1.columns.tolist())
+                    logging.debug(f"Columns in data_set1: {data_set1.columns.tolist()}")
                     # Calculate full report
                     data_set2 = self.calculate_full_report(data_set1, data_set2)
 
@@ -483,6 +474,7 @@ class FileUploaderApp:
 
 # Запуск приложения
 if __name__ == "__main__":
+    setup_logging()
     root = tk.Tk()
     app = FileUploaderApp(root)
     root.mainloop()
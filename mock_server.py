@@ -0,0 +1,610 @@
+"""
+Локальная замена бэкенда 10.171.12.36:3005 для замеров без обращения к боевому серверу.
+
+Реализует API, которым пользуются test.py, netr.py и main.py: списки складов
+и заданий, загрузку строк (построчно и пакетами), удаление, скачивание,
+задания ВПС и сроки годности. Данные хранятся в памяти. Задержка ответа,
+доля ошибок сервера, пропускная способность канала и скорость записи строк
+настраиваются, поэтому на заглушке можно замерять загрузку, скачивание и
+списки заданий целиком, без сети.
+
+Приложения переключаются на заглушку переменными окружения:
+    PACKER_API_URL=http://127.0.0.1:3005 python test.py
+    PACKER_LEGACY_API_URL=http://127.0.0.1:3005 python main.py
+
+Задания в заглушке: загруженные (ни одна строка не выполнена), выполняемые
+и завершенные (выполнены все строки). Строки выполняются служебным запросом
+POST /mock/complete-task {"Nazvanie_Zadaniya": ..., "share": 0.5}, счетчики
+заглушки отдает GET /mock/stats.
+
+Ответы скачивания (/download, /downloadData) отдаются с ETag и Last-Modified
+и на условный запрос с неизменившимися данными отвечают 304 без тела.
+
+Запуск: python mock_server.py --port 3005 --latency 0.05 --bandwidth 256 --error-rate 0.01 --seed-tasks 6
+"""
+import argparse
+import email.utils
+import gzip
+import hashlib
+import json
+import logging
+import random
+import socket
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from api_client import COMPRESS_MIN_BYTES
+from paged_download import LIMIT_PARAM, OFFSET_PARAM, TABLE_PARAM, TOTAL_FIELD
+from upload_engine import IDEMPOTENCY_FIELD, batch_path_for
+
+DEFAULT_SKLADS = ['Склад 1', 'Склад 2', 'Подольск', 'Электросталь']
+
+# Время сканирования в ответе /download: у заданий WB и у остальных площадок
+WB_TIME_FORMAT = '%m-%d-%Y %H:%M:%S'
+RUSSIAN_TIME_FORMAT = '%H:%M:%S %d.%m.%Y'
+
+# Ключи строк /uploadData и ключи тех же значений в ответе /downloadData
+WPS_DOWNLOAD_KEYS = {
+    'Nazvanie_Zadaniya': 'nazvanie_zdaniya',
+    'Artikul': 'artikul',
+    'Nazvanie_Tovara': 'nazvanie_tovara',
+    'SHK': 'shk',
+    'Srok_Godnosti': 'srok_godnosti',
+    'Itog_Zakaz': 'itog_zakaza',
+    'Nomenklatura': 'Nomenklatura',
+    'vp': 'vp',
+}
+# Поля /downloadData, которые заполняются на складе (при загрузке файла ВПС)
+WPS_WAREHOUSE_KEYS = ('vlozhennost', 'pallet', 'shk_wps', 'size_vps')
+
+# Таблицы хранилища: строки заданий (/upload-data-new), ВПС (/uploadData) и файлы ВПС (/uploadWPS)
+TASKS, WPS, VPS = 'tasks', 'wps', 'vps'
+# Таблицы, из которых /delete-uploaded-data удаляет строки задания (отмена загрузки
+# задания в test.py и main.py и задания ВПС в netr.py); файлы ВПС не удаляются
+DELETE_TABLES = (TASKS, WPS)
+
+
+def is_wb_task(task_name):
+    return 'WB' in task_name
+
+
+class MockBackend:
+    """Хранилище и настройки заглушки сервера."""
+
+    def __init__(self, latency=0.0, batch_enabled=True, bandwidth=None, jitter=0.0, error_rate=0.0, row_rate=None,
+                 sklads=None, seed=None, paging_enabled=True):
+        self.latency = latency
+        # Случайная добавка к задержке, 0..jitter секунд
+        self.jitter = jitter
+        self.batch_enabled = batch_enabled
+        # Постраничная выдача скачивания (offset/limit); выключена - параметры страниц не учитываются
+        self.paging_enabled = paging_enabled
+        # Доля запросов, на которые сервер отвечает 500 (ничего не сохраняя)
+        self.error_rate = error_rate
+        # Пропускная способность канала, байт/с (None - без ограничения); канал общий для всех запросов
+        self.bandwidth = bandwidth
+        self.link_free_at = 0.0
+        # Скорость записи строк в базу, строк/с (None - без ограничения)
+        self.row_rate = row_rate
+        self.db_free_at = 0.0
+        self.sklads = list(sklads or DEFAULT_SKLADS)
+        self.random = random.Random(seed)
+
+        self.tables = {TASKS: [], WPS: [], VPS: []}
+        self.rows = self.tables[TASKS]
+        # Отсканированные короба заданий WB (dataSet1 ответа /download)
+        self.scans = {}
+        self.hidden_tasks = set()
+        self.idempotency_keys = set()
+        # Номер версии данных (растет при каждом изменении строк) и последние ответы
+        # скачивания: (вид ответа, задание) -> (версия, тело, ETag, Last-Modified)
+        self.data_version = 0
+        self.snapshots = {}
+
+        self.requests_count = 0
+        self.duplicates_count = 0
+        self.errors_count = 0
+        # Байты тел запросов и ответов так, как они прошли по сети (после сжатия)
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    # --- Условия работы сервера
+
+    def delay(self):
+        """Ждет задержку ответа сервера."""
+        with self.lock:
+            seconds = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if seconds:
+            time.sleep(seconds)
+
+    def inject_error(self):
+        """Решает, ответить ли на запрос ошибкой сервера."""
+        with self.lock:
+            self.requests_count += 1
+            failed = bool(self.error_rate) and self.random.random() < self.error_rate
+            self.errors_count += failed
+        return failed
+
+    def transfer(self, size, received):
+        """Учитывает передачу size байт и ждет, пока они пройдут через канал."""
+        with self.lock:
+            if received:
+                self.bytes_received += size
+            else:
+                self.bytes_sent += size
+            if not self.bandwidth:
+                return
+            now = time.monotonic()
+            self.link_free_at = max(now, self.link_free_at) + size / self.bandwidth
+            wait = self.link_free_at - now
+        time.sleep(wait)
+
+    def write_rows(self, count):
+        """Ждет, пока база запишет count строк (общая очередь записи для всех запросов)."""
+        if not self.row_rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.db_free_at = max(now, self.db_free_at) + count / self.row_rate
+            wait = self.db_free_at - now
+        time.sleep(wait)
+
+    # --- Загрузка
+
+    def store_rows(self, rows, table=TASKS):
+        """
+        Сохраняет строки и возвращает для каждой признак повтора: строка с уже
+        известным ключом идемпотентности не сохраняется второй раз.
+        """
+        self.write_rows(len(rows))
+        duplicates = []
+        with self.lock:
+            stored = self.tables[table]
+            for row in rows:
+                key = row.get(IDEMPOTENCY_FIELD)
+                duplicate = key is not None and key in self.idempotency_keys
+                if duplicate:
+                    self.duplicates_count += 1
+                else:
+                    stored.append(row)
+                    self.data_version += 1
+                    if key is not None:
+                        self.idempotency_keys.add(key)
+                duplicates.append(duplicate)
+        return duplicates
+
+    def delete_task(self, task_name, pref=None):
+        """
+        Удаляет строки задания из таблиц DELETE_TABLES (и их ключи идемпотентности);
+        возвращает число удаленных строк.
+        """
+        with self.lock:
+            deleted = []
+            for table in DELETE_TABLES:
+                kept = []
+                for row in self.tables[table]:
+                    match = row.get('Nazvanie_Zadaniya') == task_name and (pref is None or row.get('pref') == pref)
+                    (deleted if match else kept).append(row)
+                self.tables[table][:] = kept
+            self.idempotency_keys.difference_update(row.get(IDEMPOTENCY_FIELD) for row in deleted)
+            if deleted:
+                self.scans.pop(task_name, None)
+                self.data_version += 1
+        return len(deleted)
+
+    # --- Задания
+
+    def task_rows(self, task_name, table=TASKS):
+        key = 'nazvanie_zdaniya' if table == VPS else 'Nazvanie_Zadaniya'
+        with self.lock:
+            return [row for row in self.tables[table] if row.get(key) == task_name]
+
+    def task_summaries(self):
+        """Сводка по заданиям: строк всего, выполнено и время начала первой строки."""
+        summaries = {}
+        with self.lock:
+            for row in self.rows:
+                name = row.get('Nazvanie_Zadaniya')
+                summary = summaries.setdefault(name, {'total': 0, 'completed': 0, 'time_start': None})
+                summary['total'] += 1
+                if str(row.get('Status')) == '1':
+                    summary['completed'] += 1
+                    start = row.get('Time_Start')
+                    if start and (summary['time_start'] is None or start < summary['time_start']):
+                        summary['time_start'] = start
+        return summaries
+
+    def tasks_in_progress(self):
+        return [{'Nazvanie_Zadaniya': name, 'Time_Start': summary['time_start'],
+                 'Progress': round(summary['completed'] / summary['total'] * 100, 2),
+                 'TotalTasks': summary['total'], 'CompletedTasks': summary['completed']}
+                for name, summary in self.task_summaries().items()
+                if 0 < summary['completed'] < summary['total']]
+
+    def completed_tasks(self):
+        return [name for name, summary in self.task_summaries().items() if summary['completed'] == summary['total']]
+
+    def uploaded_tasks(self):
+        return [name for name, summary in self.task_summaries().items() if summary['completed'] == 0]
+
+    def complete_task(self, task_name, share=1.0):
+        """
+        Отмечает долю share строк задания выполненными, как это делают на складе:
+        время сканирования, исполнитель, место, вложенность и паллет, а для
+        заданий WB - отсканированные короба. Возвращает число выполненных строк.
+        """
+        time_format = WB_TIME_FORMAT if is_wb_task(task_name) else RUSSIAN_TIME_FORMAT
+        started = datetime(2026, 10, 1, 8, 0, 0)
+        completed = 0
+        with self.lock:
+            rows = [row for row in self.rows if row.get('Nazvanie_Zadaniya') == task_name]
+            pending = [row for row in rows if str(row.get('Status')) != '1']
+            target = round(len(rows) * share) - (len(rows) - len(pending))
+            scans = self.scans.setdefault(task_name, []) if is_wb_task(task_name) else None
+            for row in pending[:max(target, 0)]:
+                offset = self.random.randint(0, 10 * 3600)
+                row.update({
+                    'Status': 1,
+                    'Time_Start': (started + timedelta(seconds=offset)).strftime(time_format),
+                    'Time_End': (started + timedelta(seconds=offset + self.random.randint(5, 600))).strftime(
+                        time_format),
+                    'Ispolnitel': self.random.choice(['Иванов', 'Петрова', 'Сидоров', 'Ким']),
+                    'Mesto': row.get('Mesto') or self.random.randint(1, 60),
+                    'Vlozhennost': row.get('Vlozhennost') or self.random.randint(1, 30),
+                    'Pallet_No': row.get('Pallet_No') or self.random.randint(1, 30),
+                })
+                if scans is not None:
+                    scans.append({'Artikul': row.get('Artikul'), 'SHK': row.get('SHK'),
+                                  'Kolvo_Tovarov': row['Vlozhennost'], 'Pallet_No': row['Pallet_No'],
+                                  'Ispolnitel': row['Ispolnitel']})
+                completed += 1
+                self.data_version += 1
+        return completed
+
+    def download(self, task_name):
+        """Ответ /download: у WB короба и строки задания, у остальных - строки задания."""
+        rows = self.task_rows(task_name)
+        if is_wb_task(task_name):
+            with self.lock:
+                scans = list(self.scans.get(task_name, []))
+            return {'dataSet1': scans, 'dataSet2': rows}
+        return {'dataSet1': rows, 'dataSet2': []}
+
+    def download_snapshot(self, kind, task_name):
+        """
+        Ответ скачивания kind ('download' или 'downloadData') с валидаторами:
+        (тело, ETag, Last-Modified). Пересчитывается только после изменения данных;
+        Last-Modified меняется, только если изменилось само тело.
+        """
+        key = (kind, task_name)
+        with self.lock:
+            version = self.data_version
+            cached = self.snapshots.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1:]
+        if kind == 'download':
+            body = self.download(task_name)
+        else:
+            body = {'success': True, 'data': self.wps_download(task_name)}
+        content = json.dumps(body, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        etag = f'"{hashlib.blake2b(content, digest_size=12).hexdigest()}"'
+        if cached is not None and cached[2] == etag:
+            modified = cached[3]
+        else:
+            modified = email.utils.formatdate(time.time(), usegmt=True)
+        with self.lock:
+            self.snapshots[key] = (version, body, etag, modified)
+        return body, etag, modified
+
+    def expiry_data(self, artikul):
+        dates = {}
+        with self.lock:
+            for row in self.rows:
+                if str(row.get('Artikul')) == artikul and row.get('Srok_Godnosti'):
+                    dates.setdefault(row['Srok_Godnosti'], None)
+        return [{'Artikul': artikul, 'ExpiryDate': date} for date in dates]
+
+    # --- Задания ВПС (netr.py)
+
+    def wps_task_names(self):
+        with self.lock:
+            names = dict.fromkeys(row.get('Nazvanie_Zadaniya') for row in self.tables[WPS])
+        return [name for name in names if name and name not in self.hidden_tasks]
+
+    def wps_download(self, task_name):
+        """Строки задания ВПС с ключами /downloadData; складские поля - из загруженного файла ВПС."""
+        warehouse = {(row.get('artikul'), row.get('shk')): row for row in self.task_rows(task_name, VPS)}
+        data = []
+        for index, row in enumerate(self.task_rows(task_name, WPS), start=1):
+            item = {'id': index}
+            item.update((download_key, row.get(key)) for key, download_key in WPS_DOWNLOAD_KEYS.items())
+            filled = warehouse.get((str(row.get('Artikul')), str(row.get('SHK'))), {})
+            item.update((key, filled.get(key)) for key in WPS_WAREHOUSE_KEYS)
+            data.append(item)
+        return data
+
+    def hide_task(self, task_name):
+        with self.lock:
+            self.hidden_tasks.add(task_name)
+
+    def stats(self):
+        with self.lock:
+            return {'requests': self.requests_count, 'errors': self.errors_count,
+                    'duplicates': self.duplicates_count, 'bytes_received': self.bytes_received,
+                    'bytes_sent': self.bytes_sent,
+                    'rows': {table: len(rows) for table, rows in self.tables.items()}}
+
+    def seed_tasks(self, count, rows):
+        """
+        Заполняет заглушку заданиями WB и Ozon по rows строк из генератора
+        замеров: по очереди завершенные, выполняемые (половина строк) и
+        загруженные. Те же строки сохраняются как задания ВПС.
+        """
+        from benchmarks.workbook_generator import make_task_sheet, task_name
+        from column_schema import TASK_SCHEMA, WPS_SCHEMA
+        from payload_builder import build_payloads, clean_nulls
+
+        for number in range(count):
+            marketplace = 'WB' if number % 2 == 0 else 'Ozon'
+            name = task_name(marketplace, rows).replace('bench', f'seed {number + 1}')
+            sheet = clean_nulls(make_task_sheet(rows, marketplace, seed=number))
+            constants = {'pref': name.split(' ')[0], 'Scklad_Pref': self.sklads[0], 'Status': 0,
+                         'Status_Zadaniya': 0, 'Nazvanie_Zadaniya': name}
+            self.store_rows(build_payloads(sheet, TASK_SCHEMA.upload_fields, constants))
+            self.store_rows(build_payloads(sheet, WPS_SCHEMA.upload_fields, constants), WPS)
+            self.complete_task(name, share=(1.0, 0.5, 0.0)[number % 3])
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    GET_ROUTES = {
+        '/sklads': 'get_sklads',
+        '/tasks-in-progress': 'get_tasks_in_progress',
+        '/completed-tasks': 'get_completed_tasks',
+        '/uploaded-tasks': 'get_uploaded_tasks',
+        '/download': 'get_download',
+        '/downloadData': 'get_download_data',
+        '/distinctName': 'get_distinct_name',
+        '/expiry-data': 'get_expiry_data',
+        '/mock/stats': 'get_stats',
+    }
+    POST_ROUTES = {
+        '/upload-data-new': 'post_task_row',
+        '/upload-data': 'post_task_row',  # та же загрузка задания в main.py
+        '/uploadData': 'post_wps_row',
+        '/uploadWPS': 'post_vps_row',
+        batch_path_for('/upload-data-new'): 'post_task_batch',
+        batch_path_for('/upload-data'): 'post_task_batch',
+        batch_path_for('/uploadData'): 'post_wps_batch',
+        '/delete-uploaded-data': 'post_delete_uploaded_data',
+        '/hideTask': 'post_hide_task',
+        '/mock/complete-task': 'post_complete_task',
+    }
+
+    def setup(self):
+        super().setup()
+        # Заголовки и тело пишутся отдельно; без TCP_NODELAY keep-alive упирается в задержку ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    @property
+    def backend(self):
+        return self.server.backend
+
+    def log_message(self, format, *args):
+        logging.debug(f'mock_server: {format % args}')
+
+    def send_json(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status == 304:
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if len(data) >= COMPRESS_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            data = gzip.compress(data, 5)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.backend.transfer(len(data), received=False)
+        self.wfile.write(data)
+
+    def read_json(self):
+        """Тело запроса как JSON; None - сжатие тела не поддерживается (ответ 415 уже отправлен)."""
+        length = int(self.headers.get('Content-Length', 0))
+        data = self.rfile.read(length)
+        self.backend.transfer(len(data), received=True)
+        encoding = self.headers.get('Content-Encoding', 'identity').lower()
+        if encoding == 'gzip':
+            data = gzip.decompress(data)
+        elif encoding == 'deflate':
+            data = zlib.decompress(data)
+        elif encoding != 'identity':
+            self.send_json(415, {'success': False, 'message': f'Unsupported encoding: {encoding}'})
+            return None
+        return json.loads(data or b'{}')
+
+    def dispatch(self, routes, argument):
+        url = urlparse(self.path)
+        handler = routes.get(url.path)
+        if handler is None or (handler.endswith('_batch') and not self.backend.batch_enabled):
+            self.send_json(404, {'success': False, 'message': 'Not found'})
+            return
+        self.backend.delay()
+        if self.backend.inject_error():
+            self.send_json(500, {'success': False, 'message': 'Internal server error (mock)'})
+            return
+        status, body, *headers = getattr(self, handler)(argument)
+        self.send_json(status, body, *headers)
+
+    def do_GET(self):
+        query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        self.dispatch(self.GET_ROUTES, query)
+
+    def do_POST(self):
+        body = self.read_json()
+        if body is None:
+            return
+        self.dispatch(self.POST_ROUTES, body)
+
+    # --- Списки
+
+    def get_sklads(self, query):
+        return 200, {'sklads': self.backend.sklads}
+
+    def get_tasks_in_progress(self, query):
+        return 200, {'tasksInProgress': self.backend.tasks_in_progress()}
+
+    def get_completed_tasks(self, query):
+        return 200, {'tasks': self.backend.completed_tasks()}
+
+    def get_uploaded_tasks(self, query):
+        return 200, {'tasks': self.backend.uploaded_tasks()}
+
+    def get_distinct_name(self, query):
+        return 200, {'success': True, 'data': self.backend.wps_task_names()}
+
+    def get_expiry_data(self, query):
+        return 200, {'expiryData': self.backend.expiry_data(query.get('artikul', ''))}
+
+    def get_stats(self, query):
+        return 200, self.backend.stats()
+
+    # --- Скачивание
+
+    def get_download(self, query):
+        return self.conditional_page('download', query)
+
+    def get_download_data(self, query):
+        return self.conditional_page('downloadData', query)
+
+    def conditional_page(self, kind, query):
+        """Ответ скачивания с ETag/Last-Modified; 304, если данные задания не изменились."""
+        body, etag, modified = self.backend.download_snapshot(kind, query.get('task', ''))
+        validators = {'ETag': etag, 'Last-Modified': modified}
+        if self.not_modified(etag, modified):
+            return 304, None, validators
+        return (*self.page(body, query), validators)
+
+    def not_modified(self, etag, modified):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return email.utils.parsedate_to_datetime(modified) <= since
+
+    def page(self, body, query):
+        """Страница массива query[table] ответа скачивания (см. paged_download) или ответ целиком."""
+        if LIMIT_PARAM not in query or not self.backend.paging_enabled:
+            return 200, body
+        table = query.get(TABLE_PARAM)
+        try:
+            offset = int(query.get(OFFSET_PARAM, 0))
+            limit = int(query[LIMIT_PARAM])
+        except ValueError:
+            return 400, {'success': False, 'message': 'offset и limit должны быть числами'}
+        if table not in body or offset < 0 or limit <= 0:
+            return 400, {'success': False, 'message': f'Неверная страница: {table} {offset} {limit}'}
+        rows = body[table] or []
+        page = {key: value for key, value in body.items() if not isinstance(value, list)}
+        page[table] = rows[offset:offset + limit]
+        page[TOTAL_FIELD] = len(rows)
+        return 200, page
+
+    # --- Загрузка
+
+    def store_row(self, body, table):
+        duplicate, = self.backend.store_rows([body], table)
+        return 200, {'success': True, 'duplicate': duplicate}
+
+    def store_batch(self, body, table):
+        duplicates = self.backend.store_rows(body.get('rows', []), table)
+        return 200, {'success': True, 'results': [{'index': index, 'success': True, 'duplicate': duplicate}
+                                                  for index, duplicate in enumerate(duplicates)]}
+
+    def post_task_row(self, body):
+        return self.store_row(body, TASKS)
+
+    def post_wps_row(self, body):
+        return self.store_row(body, WPS)
+
+    def post_vps_row(self, body):
+        return self.store_row(body, VPS)
+
+    def post_task_batch(self, body):
+        return self.store_batch(body, TASKS)
+
+    def post_wps_batch(self, body):
+        return self.store_batch(body, WPS)
+
+    def post_delete_uploaded_data(self, body):
+        deleted = self.backend.delete_task(body.get('Nazvanie_Zadaniya'), body.get('pref'))
+        return 200, {'success': True, 'message': f'Удалено строк: {deleted}', 'deleted': deleted}
+
+    def post_hide_task(self, body):
+        self.backend.hide_task(body.get('nazvanie_zdaniya'))
+        return 200, {'success': True}
+
+    def post_complete_task(self, body):
+        completed = self.backend.complete_task(body.get('Nazvanie_Zadaniya'), float(body.get('share', 1.0)))
+        return 200, {'success': True, 'completed': completed}
+
+
+def make_server(host='127.0.0.1', port=0, **options):
+    """Создает сервер заглушки; options - параметры MockBackend."""
+    server = ThreadingHTTPServer((host, port), MockRequestHandler)
+    server.daemon_threads = True
+    server.backend = MockBackend(**options)
+    server.base_url = f'http://{host}:{server.server_address[1]}'
+    return server
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """Запускает заглушку в фоновом потоке и возвращает сервер (адрес - server.base_url)."""
+    server = make_server(host, port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Локальная заглушка сервера заданий')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3005)
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа на запрос, секунды')
+    parser.add_argument('--jitter', type=float, default=0.0, help='случайная добавка к задержке, до N секунд')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля запросов с ответом 500, 0..1')
+    parser.add_argument('--bandwidth', type=float, default=None, help='пропускная способность канала, КБ/с')
+    parser.add_argument('--row-rate', type=float, default=None, help='скорость записи строк в базу, строк/с')
+    parser.add_argument('--no-batch', action='store_true', help='отключить пакетные эндпоинты')
+    parser.add_argument('--no-paging', action='store_true', help='отключить постраничное скачивание')
+    parser.add_argument('--seed-tasks', type=int, default=0, help='создать N заданий при запуске')
+    parser.add_argument('--seed-rows', type=int, default=1000, help='строк в каждом созданном задании')
+    parser.add_argument('--random-seed', type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = make_server(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                         error_rate=args.error_rate, batch_enabled=not args.no_batch, paging_enabled=not args.no_paging,
+                         bandwidth=args.bandwidth * 1024 if args.bandwidth else None, row_rate=args.row_rate,
+                         seed=args.random_seed)
+    if args.seed_tasks:
+        server.backend.seed_tasks(args.seed_tasks, args.seed_rows)
+        logging.info(f'Создано заданий: {args.seed_tasks} по {args.seed_rows} строк')
+    logging.info(f'Заглушка сервера запущена на {server.base_url}; '
+                 f'приложения: PACKER_API_URL={server.base_url} (test.py, netr.py), '
+                 f'PACKER_LEGACY_API_URL={server.base_url} (main.py)')
+    server.serve_forever()
@@ -1,8 +1,5 @@
 import os
-import time
 import logging
-import numpy as np
-import pandas as pd
 import requests
 import sys
 
@@ -10,6 +7,11 @@ from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtWidgets import QApplication, QFileDialog, QMessageBox, QWidget, QHBoxLayout, QLabel, QVBoxLayout
 from PyQt5.QtCore import Qt, pyqtSignal
 
+from api_client import get_client
+from app_logging import setup_logging
+from jobs import JobManager
+from task_jobs import run_download_task, run_load_task, run_load_vps, task_prefix
+from upload_queue import UploadQueuePanel, delete_uploaded_file
 from test import ProgressWindow  # Импортируем класс окна прогресса
 
 
@@ -86,6 +88,9 @@ class TaskManagerApp(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
         self.tasks = []
+        self.api = get_client()
+        self.jobs = JobManager(parent=self)
+        self.upload_queue = None
         self.initUI()
 
     def initUI(self):
@@ -303,13 +308,31 @@ class TaskManagerApp(QtWidgets.QWidget):
             }
         """)
         
+        # Кнопка очереди загрузки нескольких заданий
+        self.queue_btn = QtWidgets.QPushButton("🗂 Очередь загрузки")
+        self.queue_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #adb5bd;
+                color: white;
+                border: none;
+                border-radius: 5px;
+                padding: 10px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #868e96;
+            }
+        """)
+
         # Добавляем кнопки в макет
         button_layout.addWidget(self.load_task_btn)
+        button_layout.addWidget(self.queue_btn)
         button_layout.addWidget(self.load_vps_btn)
         button_layout.addWidget(self.download_task_btn)
         
         # Привязываем обработчики событий
         self.load_task_btn.clicked.connect(self.load_task)
+        self.queue_btn.clicked.connect(self.open_upload_queue)
         self.load_vps_btn.clicked.connect(self.load_vps)
         self.download_task_btn.clicked.connect(self.download_task)
         
@@ -354,14 +377,6 @@ class TaskManagerApp(QtWidgets.QWidget):
         # Загружаем данные
         self.load_initial_data()
 
-    def has_single_sheet(self, file_path):
-        try:
-            xl = pd.ExcelFile(file_path)
-            return len(xl.sheet_names) == 1
-        except Exception as e:
-            logging.error(f"Ошибка при проверке файла: {e}")
-            return False
-
     def load_initial_data(self):
         """Загружает список заданий с сервера и заполняет QListWidget."""
         self.task_list.clear()
@@ -369,7 +384,7 @@ class TaskManagerApp(QtWidgets.QWidget):
         self.status_label.setText("Загрузка данных...")
 
         try:
-            response = requests.get("http://10.171.12.36:3005/distinctName", timeout=10)
+            response = self.api.get("/distinctName", timeout=10)
 
             if response.status_code != 200:
                 logging.error(f"Ошибка при загрузке списка заданий: {response.status_code}")
@@ -450,9 +465,7 @@ class TaskManagerApp(QtWidgets.QWidget):
                 "nazvanie_zdaniya": original_task_name
             }
             
-            response = requests.post("http://10.171.12.36:3005/hideTask", 
-                                  json=payload,
-                                  timeout=10)
+            response = self.api.post("/hideTask", json=payload, timeout=10)
             
             if response.status_code == 200:
                 # Удаляем задание из списка
@@ -476,131 +489,48 @@ class TaskManagerApp(QtWidgets.QWidget):
             QMessageBox.warning(self, "Ошибка", "Файл не выбран!")
             return
 
-        if not self.has_single_sheet(file_path):
-            QMessageBox.critical(self, "Ошибка",
-                                 "Файл содержит несколько листов. Пожалуйста, загрузите файл только с одним листом!")
-            return
-
-        url = "http://10.171.12.36:3005/uploadWPS"
-
-        try:
-            # Читаем Excel-файл
-            data = pd.read_excel(file_path)
-
-            if data.empty:
-                QMessageBox.warning(self, "Ошибка", "Файл пустой!")
-                return
-
-            # Отображаем прогресс загрузки
-            self.progress_window = ProgressWindow(self, max_value=len(data))
-            self.progress_window.show()
-
-            for index, row in data.iterrows():
-                # Формируем payload для отправки строки на сервер
-                payload = {
-                    'nazvanie_zdaniya': str(row.get('Название задания', '')),
-                    'artikul': str(row.get('Артикул', '')),
-                    'shk': str(row.get('Штрих-код', '')).rstrip('.0') if isinstance(row.get('Штрих-код', ''),
-                                                                                    (int, float)) else str(
-                        row.get('Штрих-код', '')),
-                    'mesto': str(row.get('Место', '')),
-                    'vlozhennost': str(row.get('Вложенность', '')),
-                    'pallet': str(row.get('Паллет', '')),
-                    'size_vps': str(row.get('Размер ВПС', '')),
-                    'vp': str(row.get('ВП', '')),
-                    'itog_zakaza': row.get('Итог заказа'),  # Без преобразования в строку
-                    'shk_wps': str(row.get('ШК ВПС', ''))
-                }
-                logging.info(payload)
-
-                try:
-                    response = requests.post(url, json=payload, timeout=30)
-
-                    if response.status_code == 200:
-                        logging.info(f"✅ Строка {index + 1}/{len(data)} успешно загружена.")
-                    else:
-                        logging.error(f"❌ Ошибка при загрузке строки {index + 1}: {response.text}")
-
-                except requests.RequestException as e:
-                    logging.error(f"⛔ Ошибка сети при загрузке строки {index + 1}: {e}")
-                    continue
-
-                # Обновляем прогресс
-                self.progress_window.update_progress(index + 1)
-                QApplication.processEvents()
-
-            self.progress_window.close()
-            QMessageBox.information(self, "Успех", "Все строки успешно обработаны!")
-
-        except Exception as e:
-            logging.error(f"Ошибка при обработке файла: {e}")
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при обработке файла: {e}")
+        # Отображаем прогресс загрузки; чтение и отправка идут в фоновом задании
+        self.progress_window = ProgressWindow(self, max_value=0)
+        self.progress_window.show()
+        self.jobs.submit(run_load_vps, self.api, file_path,
+                         progress_window=self.progress_window,
+                         on_finished=lambda _: QMessageBox.information(self, "Успех",
+                                                                       "Все строки успешно обработаны!"),
+                         on_failed=lambda message: QMessageBox.critical(
+                             self, "Ошибка", f"Ошибка при обработке файла: {message}"))
+
+    def open_upload_queue(self):
+        """Открывает окно очереди загрузки нескольких заданий."""
+        if self.upload_queue is None:
+            self.upload_queue = UploadQueuePanel(
+                self, self.jobs, self.queue_load_task,
+                make_cleanup=lambda file_path: delete_uploaded_file(self.api, file_path),
+                title="Очередь загрузки заданий")
+        self.upload_queue.show()
+        self.upload_queue.raise_()
+
+    def queue_load_task(self, file_path):
+        file_name = os.path.basename(file_path)
+        return run_load_task, self.api, file_path, file_name, task_prefix(file_name)
 
     def load_task(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Выберите файл", "", "Excel файлы (*.xlsx)")
         if not file_path:
             return
 
-        if not self.has_single_sheet(file_path):
-            QMessageBox.critical(self, "Ошибка",
-                                 "Файл содержит несколько листов. Пожалуйста, загрузите файл только с одним листом!")
-            return
-
         file_name = os.path.basename(file_path)
-        pref = file_name.split(' ')[0]  # Получаем префикс из названия файла
-
-        try:
-            data = pd.read_excel(file_path)
-            if data.empty:
-                QMessageBox.warning(self, "Предупреждение", "Файл пустой.")
-                return
-
-            # Очистка данных
-            data = data.replace({np.nan: None, '': None, ' ': None, 'nan': None, 'NaN': None})
-
-            self.progress_window = ProgressWindow(self, max_value=len(data))
-            self.progress_window.show()
-
-            url = "http://10.171.12.36:3005/uploadData"
-
-            for index, row in data.iterrows():
-                payload = {
-                    'Artikul': row.get('Артикул'),
-                    'Nazvanie_Tovara': row.get('Название товара'),
-                    'SHK': row.get('ШК'),
-                    'Nomenklatura': row.get('Номенклатура'),
-                    'Itog_Zakaz': row.get('Итог Заказ'),
-                    'Srok_Godnosti': row.get('Срок Годности'),
-                    'pref': pref,
-                    'Status': 0,
-                    'Status_Zadaniya': 0,
-                    'Nazvanie_Zadaniya': file_name,
-                    'vp': row.get('ВП'),
-                }
-                logging.debug(f"[{index + 1}/{len(data)}] Payload: {payload}")
-                success = False
-                while not success:
-                    try:
-                        response = requests.post(url, json=payload, timeout=75)
-                        if response.status_code == 200:
-                            logging.info(f'✅ {index + 1}/{len(data)} - Успешно загружено: {payload}')
-                            success = True
-                        else:
-                            logging.error(f'❌ Ошибка при загрузке {index + 1}: {response.text}')
-                            time.sleep(2)  # Повтор через 2 секунды
-                    except requests.exceptions.RequestException as e:
-                        logging.error(f'⛔ Ошибка сети при загрузке {index + 1}: {e}')
-                        time.sleep(2)
-
-                self.progress_window.update_progress(index + 1)
-                QApplication.processEvents()
-
-            self.progress_window.close()
-            QMessageBox.information(self, "Успех", "Файл успешно загружен построчно.")
-
-        except Exception as e:
-            logging.error(f'❗ Ошибка при обработке файла: {e}')
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке файла: {e}")
+        pref = task_prefix(file_name)  # Получаем префикс из названия файла
+
+        progress_window = ProgressWindow(self, max_value=0)
+        progress_window.show()
+        self.progress_window = progress_window
+        self.jobs.submit(run_load_task, self.api, file_path, file_name, pref,
+                         progress_window=progress_window,
+                         on_finished=lambda _: QMessageBox.information(self, "Успех",
+                                                                       "Файл успешно загружен построчно."),
+                         on_failed=lambda message: QMessageBox.critical(
+                             self, "Ошибка", f"Ошибка при загрузке файла: {message}"),
+                         on_cancelled=lambda: progress_window.cancel_upload_process(pref, file_name))
 
     def download_task(self):
         """Скачивает данные с сервера и сохраняет их в Excel."""
@@ -620,85 +550,40 @@ class TaskManagerApp(QtWidgets.QWidget):
         task_name = item_widget.task_name
         original_task_name = task_name.split('. ', 1)[1] if '. ' in task_name else task_name
 
-        try:
-            self.status_label.setText(f"Скачивание задания: {original_task_name}...")
-            
-            # Формируем URL с параметром task
-            url = f'http://10.171.12.36:3005/downloadData'
-            params = {'task': original_task_name}
-            
-            response = requests.get(url, params=params, timeout=30)
-
-            if response.status_code != 200:
-                logging.error(f"Ошибка скачивания файла: {response.status_code}")
-                QMessageBox.critical(self, "Ошибка", f"Сервер вернул ошибку: {response.status_code}")
-                self.status_label.setText("Ошибка скачивания")
-                return
-
-            # Декодируем JSON
-            data = response.json()
-            if not data.get("success") or not data.get("data"):
-                logging.warning(f"Нет данных для задания {original_task_name}")
-                QMessageBox.warning(self, "Предупреждение", "Нет данных для скачивания.")
-                self.status_label.setText("Нет данных для скачивания")
-                return
-
-            # Преобразуем JSON-ответ в DataFrame
-            df = pd.DataFrame(data["data"])
-
-            # Удаляем поле ID если оно есть
-            if 'id' in df.columns:
-                df.drop(columns=['id'], inplace=True)
-
-            # Русифицируем заголовки колонок
-            column_mapping = {
-                "nazvanie_zdaniya": "Название задания",
-                "vp": "ВП",
-                "artikul": "Артикул",
-                "nazvanie_tovara": "Название товара",
-                "shk": "Штрих-код",
-                "srok_godnosti": "Срок годности",
-                "vlozhennost": "Вложенность",
-                "pallet": "Паллет",
-                "shk_wps": "ШК ВПС",
-                "size_vps": "Размер ВПС",
-                "itog_zakaza": "Итог заказа",
-                "Nomenklatura": "Номенклатура"
-            }
+        # Открываем диалог для сохранения файла
+        save_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Сохранить как",
+            f"{original_task_name}.xlsx",
+            "Excel файлы (*.xlsx)"
+        )
 
-            df.rename(columns=column_mapping, inplace=True)
+        if not save_path:
+            self.status_label.setText("Скачивание отменено")
+            return
 
-            # Открываем диалог для сохранения файла
-            save_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "Сохранить как",
-                f"{original_task_name}.xlsx",
-                "Excel файлы (*.xlsx)"
-            )
-            
-            if not save_path:
-                self.status_label.setText("Скачивание отменено")
-                return
+        self.status_label.setText(f"Скачивание задания: {original_task_name}...")
 
-            # Сохраняем в Excel
-            df.to_excel(save_path, index=False)
-            
+        def on_finished(_):
             self.status_label.setText(f"Файл успешно сохранён: {os.path.basename(save_path)}")
-            logging.info(f"Файл успешно сохранён: {save_path}")
             QMessageBox.information(self, "Успех", f"Файл успешно сохранён")
 
-        except requests.RequestException as e:
-            logging.error(f"Ошибка сети при скачивании файла: {e}")
-            QMessageBox.critical(self, "Ошибка", f"Ошибка сети: {e}")
-            self.status_label.setText("Ошибка сети при скачивании")
-
-        except Exception as e:
-            logging.error(f"Ошибка при скачивании файла: {e}")
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при скачивании: {e}")
+        def on_failed(message):
             self.status_label.setText("Ошибка при скачивании")
+            QMessageBox.critical(self, "Ошибка", message)
+
+        self.progress_window = ProgressWindow(self, max_value=0)
+        self.progress_window.setWindowTitle("Скачивание данных")
+        self.progress_window.show()
+        self.jobs.submit(run_download_task, self.api, original_task_name, save_path,
+                         progress_window=self.progress_window,
+                         on_finished=on_finished,
+                         on_failed=on_failed,
+                         on_cancelled=lambda: self.status_label.setText("Скачивание отменено"))
 
 
 if __name__ == "__main__":
+    setup_logging()
     app = QApplication(sys.argv)
     main_window = TaskManagerApp()
     main_window.show()
@@ -0,0 +1,238 @@
+"""
+Пакетная загрузка и скачивание заданий без окон (ночная смена, скрипты).
+
+Команды выполняют те же задания (task_jobs), что и кнопки приложений:
+    upload FILE... --sklad СКЛАД   загрузка файлов заданий (test.py)
+    download TASK... [--output DIR]  скачивание отчетов по заданиям (test.py)
+    load-task FILE...               загрузка заданий ВПС (netr.py)
+    load-vps FILE...                загрузка файлов ВПС (netr.py)
+    download-wps TASK... [--output DIR]  скачивание заданий ВПС (netr.py)
+
+Файлы и задания обрабатываются параллельно (--workers). Ход работы
+печатается в stdout строками JSON, по одному событию в строке:
+    {"event": "progress", "item": "WB 1.xlsx", "done": 500, "total": 2000, "time": 1760000000.0}
+События: start, status, progress, done, failed, cancelled, cleaned_up и
+cleanup_failed (удаление строк отмененной загрузки) и итоговый summary.
+Журнал приложения пишется в application.log и stderr.
+
+Загрузка, остановленная ошибкой, при повторном запуске продолжается с
+первой неподтвержденной строки. Ctrl+C отменяет задания; строки отмененных
+загрузок удаляются с сервера, как при отмене в окне загрузки.
+
+Код выхода: 0 - все задания выполнены, 1 - есть ошибки, 130 - прервано.
+
+Пример: python packer_cli.py --workers 4 upload --sklad "Склад 1" tasks/*.xlsx
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from api_client import get_client
+from app_logging import setup_logging
+from column_schema import TASK_SCHEMA
+from job_base import BaseJob, JobError
+from job_metrics import OUTCOME_CANCELLED, OUTCOME_FAILED, OUTCOME_SUCCESS
+from task_jobs import delete_uploaded_data, run_download_file, run_download_task, run_load_task, run_load_vps, \
+    run_upload_file, task_prefix
+
+# Количество заданий, выполняемых одновременно (как в окнах, jobs.MAX_CONCURRENT_JOBS)
+DEFAULT_WORKERS = 4
+
+# Прогресс одного задания печатается не чаще раза в PROGRESS_INTERVAL_SECONDS секунд
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+OUTCOME_EVENTS = {OUTCOME_SUCCESS: 'done', OUTCOME_FAILED: 'failed', OUTCOME_CANCELLED: 'cancelled'}
+
+
+class EventPrinter:
+    """Печатает события заданий строками JSON; вызывается из нескольких потоков."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+
+    def emit(self, event, item=None, **fields):
+        record = {'event': event}
+        if item is not None:
+            record['item'] = item
+        record.update(fields)
+        record['time'] = round(time.time(), 3)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+class CliJob(BaseJob):
+    """Задание командной строки: прогресс и статус печатаются событиями EventPrinter."""
+
+    def __init__(self, item, printer, fn, *args, **kwargs):
+        super().__init__(fn, *args, **kwargs)
+        self.item = item
+        self.printer = printer
+        # Вызывается после отмены задания (удаление загруженных строк)
+        self.on_cancelled = None
+        self.last_progress = 0.0
+        self.outcome = None
+
+    def report_progress(self, done, total):
+        super().report_progress(done, total)
+        now = time.monotonic()
+        if now - self.last_progress < PROGRESS_INTERVAL_SECONDS and done < total:
+            return
+        self.last_progress = now
+        self.printer.emit('progress', self.item, done=done, total=total)
+
+    def report_status(self, text):
+        self.printer.emit('status', self.item, text=text)
+
+    def run(self):
+        self.printer.emit('start', self.item)
+        self.outcome, value = self.execute()
+        fields = {}
+        if self.metrics is not None:
+            summary = self.metrics.summary()
+            fields.update(seconds=summary['duration_seconds'], rows=summary['rows'],
+                          rows_per_second=summary['rows_per_second'], retries=summary['retries'])
+        if self.outcome == OUTCOME_SUCCESS and value is not None:
+            fields['result'] = value
+        elif self.outcome == OUTCOME_FAILED:
+            fields['error'] = value
+        self.printer.emit(OUTCOME_EVENTS[self.outcome], self.item, **fields)
+        if self.outcome == OUTCOME_CANCELLED and self.on_cancelled is not None:
+            self.clean_up()
+        return self.outcome
+
+    def clean_up(self):
+        try:
+            self.on_cancelled()
+        except (JobError, requests.RequestException) as e:
+            logging.error(f'Не удалось удалить загруженные строки {self.item}: {e}')
+            self.printer.emit('cleanup_failed', self.item, error=str(e))
+        else:
+            self.printer.emit('cleaned_up', self.item)
+
+
+def upload_job(args, api, file_path):
+    file_name = os.path.basename(file_path)
+    return run_upload_file, api, file_path, file_name, task_prefix(file_name), args.sklad
+
+
+def delete_uploaded_file(args, api, file_path):
+    file_name = os.path.basename(file_path)
+    return lambda: delete_uploaded_data(api, task_prefix(file_name), file_name)
+
+
+def download_job(args, api, task_name):
+    return run_download_file, api, task_name, TASK_SCHEMA.download_rename, args.output
+
+
+def load_task_job(args, api, file_path):
+    file_name = os.path.basename(file_path)
+    return run_load_task, api, file_path, file_name, task_prefix(file_name)
+
+
+def load_vps_job(args, api, file_path):
+    return run_load_vps, api, file_path
+
+
+def download_wps_job(args, api, task_name):
+    # Имя файла - как предлагает окно сохранения netr.py
+    return run_download_task, api, task_name, os.path.join(args.output or os.getcwd(), f'{task_name}.xlsx')
+
+
+# Команда: (описание, аргументы - файлы или задания, функция (args, api, элемент) -> fn и ее аргументы,
+#           функция (args, api, элемент) -> действие после отмены или None)
+COMMANDS = {
+    'upload': ('загрузка файлов заданий на сервер', 'files', upload_job, delete_uploaded_file),
+    'download': ('скачивание отчетов по заданиям', 'tasks', download_job, None),
+    'load-task': ('загрузка заданий ВПС', 'files', load_task_job, delete_uploaded_file),
+    'load-vps': ('загрузка файлов ВПС', 'files', load_vps_job, None),
+    'download-wps': ('скачивание заданий ВПС', 'tasks', download_wps_job, None),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='заданий одновременно')
+    parser.add_argument('--api-url', help='адрес сервера (по умолчанию PACKER_API_URL)')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, (description, kind, _, _) in COMMANDS.items():
+        command = commands.add_parser(name, help=description, description=description)
+        if kind == 'files':
+            command.add_argument('items', nargs='+', metavar='FILE', help='файлы Excel (.xlsx)')
+        else:
+            command.add_argument('items', nargs='+', metavar='TASK', help='названия заданий')
+            command.add_argument('--output', help='папка для файлов (по умолчанию - папка загрузок '
+                                                  'для download и текущая папка для download-wps)')
+        if name == 'upload':
+            command.add_argument('--sklad', required=True, help='склад, как в списке окна загрузки')
+
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error('--workers должно быть не меньше 1')
+    if COMMANDS[args.command][1] == 'files':
+        missing = [path for path in args.items if not os.path.isfile(path)]
+        if missing:
+            parser.error(f'файлы не найдены: {", ".join(missing)}')
+    if getattr(args, 'output', None) and not os.path.isdir(args.output):
+        parser.error(f'папка не найдена: {args.output}')
+    return args
+
+
+def run_jobs(jobs, workers, printer):
+    """Выполняет задания в пуле потоков; по Ctrl+C отменяет их и дожидается остановки. Возвращает код выхода."""
+    started = time.perf_counter()
+    interrupted = False
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='packer-cli')
+    try:
+        pending = {executor.submit(job.run) for job in jobs}
+        while pending:
+            # Ожидание с таймаутом, чтобы Ctrl+C доходил до главного потока
+            _, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+    except KeyboardInterrupt:
+        interrupted = True
+        logging.warning('Прервано пользователем, задания отменяются...')
+        for job in jobs:
+            job.cancel()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    outcomes = [job.outcome or OUTCOME_CANCELLED for job in jobs]
+    counts = {OUTCOME_EVENTS[outcome]: outcomes.count(outcome) for outcome in OUTCOME_EVENTS}
+    printer.emit('summary', total=len(jobs), seconds=round(time.perf_counter() - started, 3), **counts)
+    if interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_OK if all(outcome == OUTCOME_SUCCESS for outcome in outcomes) else EXIT_FAILED
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(getattr(logging, args.log_level))
+    api = get_client(args.api_url)
+    printer = EventPrinter()
+    _, _, make_job, make_cleanup = COMMANDS[args.command]
+    jobs = []
+    # Одинаковые файлы или задания в списке выполняются один раз
+    for item in dict.fromkeys(args.items):
+        job = CliJob(item, printer, *make_job(args, api, item))
+        if make_cleanup is not None:
+            job.on_cancelled = make_cleanup(args, api, item)
+        jobs.append(job)
+    return run_jobs(jobs, args.workers, printer)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Постраничное параллельное скачивание больших заданий.
+
+Протокол: к запросу скачивания (/download, /downloadData) добавляются
+table (массив ответа, например dataSet2), offset и limit. Сервер отвечает
+тем же объектом, но в массиве table только строки [offset, offset + limit),
+а в поле total - число строк всего массива. Сервер без постраничной выдачи
+параметры не знает и возвращает ответ целиком (без total) - тогда он и
+используется, как при обычном скачивании.
+
+Первая страница каждого массива запрашивается сразу и дает total, остальные -
+параллельно (не больше max_in_flight) через общий пул соединений клиента.
+Каждая страница повторяется отдельно по политике повторов, без перезапуска
+всего скачивания. Записи страниц раскладываются по столбцам (json_stream)
+и собираются в исходном порядке в один DataFrame на массив - результат тот
+же, что у разбора ответа целиком.
+
+Первый запрос может быть условным (заголовки validators, например
+If-None-Match из download_cache): на ответ 304 скачивание сразу завершается.
+ETag всех страниц должен совпадать с ETag первой - иначе задание изменилось
+во время скачивания.
+"""
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from json_stream import STREAM_CHUNK_BYTES, read_json_tables
+from retry_policy import SERVER_ERROR_STATUSES, RetryPolicy
+from upload_engine import UploadCancelled, guarded_get, pause
+
+# Параметры запроса страницы и поле ответа с числом строк массива
+TABLE_PARAM = 'table'
+OFFSET_PARAM = 'offset'
+LIMIT_PARAM = 'limit'
+TOTAL_FIELD = 'total'
+
+# Строк на странице по умолчанию
+DEFAULT_PAGE_ROWS = 5000
+
+# Страниц, скачиваемых одновременно
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Таймаут запроса страницы: (подключение, пауза между кусками ответа), секунды
+DEFAULT_TIMEOUT = (10, 60)
+
+
+class DownloadStatusError(Exception):
+    """Сервер ответил на запрос страницы ошибкой, которую не исправит повтор."""
+
+    def __init__(self, status_code):
+        super().__init__(f'Сервер вернул: {status_code}')
+        self.status_code = status_code
+
+
+class DownloadChangedError(Exception):
+    """Страницы не сходятся с числом строк или ETag: задание изменилось во время скачивания."""
+
+
+class PagedDownloader:
+    """
+    Скачивает массивы tables ответа path постранично и параллельно.
+
+    Задержки запросов и повторы записываются в metrics (JobMetrics).
+    После скачивания etag и last_modified - валидаторы ответа сервера (или None).
+    """
+
+    def __init__(self, client, path, params, page_rows=DEFAULT_PAGE_ROWS, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 timeout=DEFAULT_TIMEOUT, retry_policy=None, metrics=None):
+        self.client = client
+        self.path = path
+        self.params = params
+        self.tables = ()
+        self.page_rows = max(page_rows, 1)
+        self.max_in_flight = max(max_in_flight, 1)
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.metrics = metrics
+        self.etag = None
+        self.last_modified = None
+
+    def download(self, tables, on_progress=None, cancel_event=None, on_event=None, validators=None,
+                 as_buffers=False):
+        """
+        Возвращает словарь, как json_stream.read_json_tables: массивы tables -
+        DataFrame (при as_buffers - ColumnBuffer), остальные поля ответа - как есть.
+        on_progress(строк, всего строк, байт) вызывается после каждой страницы.
+        О повторах сообщает через on_event(текст). При установке cancel_event
+        скачивание прерывается исключением UploadCancelled.
+
+        validators - заголовки условного запроса; если сервер ответил 304
+        (данные не изменились), возвращает None.
+        """
+        cancel_event = cancel_event or threading.Event()
+        budget = self.retry_policy.start_upload()
+        self.tables = tuple(tables)
+        self.etag = self.last_modified = None
+        received_rows = received_bytes = 0
+
+        def finish(buffer):
+            return buffer if as_buffers else buffer.to_frame()
+
+        # Первые страницы: число строк каждого массива
+        result = {}
+        totals = {}
+        # Массив -> {смещение страницы: ее записи по столбцам}
+        pages_received = {}
+        for table in tables:
+            headers = validators if table == self.tables[0] else None
+            page, size = self.fetch_page(table, 0, budget, cancel_event, on_event, headers)
+            if page is None:
+                logging.info('%s %s: данные не изменились (304).', self.path, self.params)
+                return None
+            if TOTAL_FIELD not in page:
+                logging.info('Сервер не поддерживает постраничное скачивание %s, ответ получен целиком.', self.path)
+                frames = {key: finish(value) if key in tables else value for key, value in page.items()}
+                if on_progress:
+                    rows = sum(page[key].rows for key in tables)
+                    on_progress(rows, rows, size)
+                return frames
+            for key, value in page.items():
+                if key not in tables and key != TOTAL_FIELD:
+                    result.setdefault(key, value)
+            totals[table] = int(page[TOTAL_FIELD])
+            self.check_page(table, 0, page[table], totals[table])
+            pages_received[table] = {0: page[table]}
+            received_rows += page[table].rows
+            received_bytes += size
+        total_rows = sum(totals.values())
+        if on_progress:
+            on_progress(received_rows, total_rows, received_bytes)
+
+        # Остальные страницы параллельно; собираются по номеру страницы
+        pages = iter([(table, offset) for table in tables
+                      for offset in range(self.page_rows, totals[table], self.page_rows)])
+        stop_event = threading.Event()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='paged-download') as executor:
+            in_flight = {}
+
+            def submit_next():
+                for table, offset in pages:
+                    future = executor.submit(self.fetch_page, table, offset, budget, stop_event, on_event)
+                    in_flight[future] = table, offset
+                    if len(in_flight) >= self.max_in_flight:
+                        return
+
+            submit_next()
+            try:
+                while in_flight:
+                    if cancel_event.is_set():
+                        stop_event.set()
+                    finished, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        table, offset = in_flight.pop(future)
+                        page, size = future.result()
+                        buffer = page[table]
+                        self.check_page(table, offset, buffer, totals[table])
+                        pages_received[table][offset] = buffer
+                        received_rows += buffer.rows
+                        received_bytes += size
+                        if on_progress:
+                            on_progress(received_rows, total_rows, received_bytes)
+                    submit_next()
+            except BaseException:
+                # Остальные страницы не ждут своих повторов, а сразу останавливаются
+                stop_event.set()
+                raise
+
+        for table in tables:
+            offsets = sorted(pages_received[table])
+            buffer = pages_received[table].pop(offsets[0])
+            for offset in offsets[1:]:
+                buffer.extend(pages_received[table].pop(offset))
+            result[table] = finish(buffer)
+        return result
+
+    def check_page(self, table, offset, buffer, total):
+        expected = max(min(self.page_rows, total - offset), 0)
+        if buffer.rows != expected:
+            raise DownloadChangedError(f'{table}: на странице с {offset} {buffer.rows} строк вместо {expected}')
+
+    def check_validators(self, response):
+        """Запоминает ETag первого ответа; ETag следующих страниц должен с ним совпадать."""
+        etag = response.headers.get('ETag')
+        if self.etag is None and self.last_modified is None:
+            self.etag = etag
+            self.last_modified = response.headers.get('Last-Modified')
+        elif etag != self.etag:
+            raise DownloadChangedError(f'ETag страницы {etag} вместо {self.etag}')
+
+    def fetch_page(self, table, offset, budget, cancel_event, on_event=None, headers=None):
+        """
+        Скачивает одну страницу с повторами; возвращает (ответ с ColumnBuffer в table, байт тела).
+        На условный запрос (headers) с ответом 304 возвращает (None, 0).
+        """
+        params = dict(self.params, **{TABLE_PARAM: table, OFFSET_PARAM: offset, LIMIT_PARAM: self.page_rows})
+        label = f'Страница {table} с {offset}'
+        retry = self.retry_policy.start_row(budget)
+        while True:
+            if cancel_event.is_set():
+                raise UploadCancelled()
+            try:
+                response = guarded_get(self.client, self.path, cancel_event, on_event, self.metrics,
+                                       params=params, timeout=self.timeout, stream=True, headers=headers)
+                with response:
+                    if response.status_code == 304 and headers:
+                        return None, 0
+                    if response.status_code == 200:
+                        self.check_validators(response)
+                        return self.read_page(response, cancel_event)
+                    # Тело ответа с ошибкой дочитывается, чтобы соединение вернулось в пул
+                    logging.error('%s: сервер вернул %d %s', label, response.status_code, response.text)
+                    if response.status_code not in SERVER_ERROR_STATUSES:
+                        raise DownloadStatusError(response.status_code)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # Обрыв соединения или недочитанный ответ
+                logging.error('%s: ошибка скачивания: %s', label, e)
+
+            delay = retry.next_delay(label)
+            if on_event:
+                on_event(f"{label}: повтор через {delay:.1f} с (попытка {retry.attempt + 1})")
+            pause(cancel_event, delay, self.metrics)
+
+    def read_page(self, response, cancel_event):
+        size = 0
+
+        def chunks():
+            nonlocal size
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+                if cancel_event.is_set():
+                    raise UploadCancelled()
+                size += len(chunk)
+                yield chunk
+
+        # Все массивы: сервер без постраничной выдачи присылает их в первом же ответе
+        return read_json_tables(chunks(), self.tables, as_buffers=True), size
@@ -0,0 +1,98 @@
+"""
+Формирование строк задания для загрузки на сервер по столбцам.
+
+Вместо обхода DataFrame через iterrows и обработки каждой ячейки отдельно
+все столбцы преобразуются целиком: пустые значения заменяются за один
+проход, а признаки операций и артикулы вычисляются один раз на каждое
+уникальное значение столбца. Готовые строки собираются из списков
+столбцов одним проходом.
+"""
+import numpy as np
+import pandas as pd
+
+from column_schema import ID_TEXT, OP_FLAG, TEXT
+
+# Значения ячеек, которые считаются пустыми
+NULL_MARKERS = ['nan', 'NaN', '', ' ', '  ', '   ']
+
+
+def op_flag_value(value):
+    """
+    Обрабатывает значение ячейки признака операции:
+    - Если значение равно 'V', возвращает '1'.
+    - Если значение число, возвращает его целую часть строкой.
+    - Если значение текст и не равно 'V', возвращает 'V'.
+    - Если значение пустое или None, возвращает None.
+    """
+    if value is None:
+        return None
+    value_str = str(value).strip()
+    if value_str == 'V':
+        return '1'
+    try:
+        return str(int(float(value_str)))
+    except (ValueError, OverflowError):
+        return 'V'
+
+
+def id_text_value(value):
+    """Артикул строкой: целое число с плавающей точкой - без '.0'."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def clean_nulls(data):
+    """Заменяет NaN и пустые маркеры на None во всей таблице за один проход."""
+    # Текстовые маркеры пустоты могут быть только в нечисловых столбцах
+    text_columns = [column for column, dtype in data.dtypes.items() if not pd.api.types.is_numeric_dtype(dtype)]
+    data = data.astype(object)
+    keep = data.notna()
+    if text_columns:
+        keep[text_columns] &= ~data[text_columns].isin(NULL_MARKERS)
+    return data.where(keep, None)
+
+
+def map_unique(column, fn):
+    """
+    Применяет fn к каждому уникальному непустому значению столбца и
+    раскладывает результаты по строкам; пустые значения остаются None.
+    """
+    codes, uniques = pd.factorize(column)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [fn(value) for value in uniques]
+    mapped[-1] = None  # код -1 у пустых значений указывает на последний элемент
+    return mapped[codes]
+
+
+def build_payloads(data, fields, constants=None):
+    """
+    Возвращает список строк для отправки на сервер.
+
+    data - таблица после clean_nulls; fields - поля загрузки схемы
+    (ColumnSchema.upload_fields); constants - значения, одинаковые для всех строк
+    (pref, склад, название задания). Отсутствующие в файле столбцы дают None.
+    """
+    row_count = len(data)
+    empty = [None] * row_count
+    columns = {}
+    for key, source, kind in fields:
+        if source not in data.columns:
+            columns[key] = empty
+            continue
+        column = data[source]
+        if kind == OP_FLAG:
+            columns[key] = map_unique(column, op_flag_value)
+        elif kind == ID_TEXT:
+            columns[key] = map_unique(column, id_text_value)
+        elif kind == TEXT:
+            columns[key] = map_unique(column, str)
+        else:
+            columns[key] = column.to_numpy(dtype=object)
+        # tolist возвращает сами объекты Python без упаковки каждой ячейки, как в to_dict
+        columns[key] = columns[key].tolist()
+    for key, value in (constants or {}).items():
+        columns[key] = [value] * row_count
+
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
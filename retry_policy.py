@@ -0,0 +1,168 @@
+"""
+Политика повторов запросов к серверу.
+
+- экспоненциальная задержка со случайным разбросом (full jitter), чтобы
+  станции упаковки не повторяли запросы одновременно;
+- ограничение числа попыток и времени на строку и на всю загрузку;
+- автоматический выключатель (circuit breaker), который приостанавливает все
+  загрузки клиента, когда доля ошибок сервера превышает порог.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+# Статусы ответа, которые считаются перегрузкой или сбоем сервера
+SERVER_ERROR_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryBudgetExceeded(Exception):
+    """Исчерпан лимит попыток или времени на повторы."""
+
+
+class RetryPolicy:
+    """Параметры повторов: задержки, лимит попыток на строку и сроки на строку и загрузку."""
+
+    def __init__(self, base_delay=1.0, max_delay=60.0, max_attempts=10, row_deadline=900.0, upload_deadline=None):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.row_deadline = row_deadline
+        self.upload_deadline = upload_deadline
+
+    def backoff(self, attempt):
+        """Задержка перед повтором номер attempt (с 1): случайная в [0, base * 2^(attempt-1)]."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def start_upload(self):
+        """Возвращает бюджет времени на одну загрузку файла."""
+        return UploadBudget(self.upload_deadline)
+
+    def start_row(self, budget=None):
+        """Возвращает счетчик повторов для одной строки (или пакета строк)."""
+        return RowRetry(self, budget)
+
+
+class UploadBudget:
+    def __init__(self, deadline_seconds):
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+
+    def remaining(self):
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+
+class RowRetry:
+    """Счетчик попыток одной строки."""
+
+    def __init__(self, policy, budget=None):
+        self.policy = policy
+        self.budget = budget
+        self.attempt = 0
+        self.deadline = time.monotonic() + policy.row_deadline if policy.row_deadline else None
+
+    def next_delay(self, label):
+        """Возвращает задержку перед следующей попыткой или бросает RetryBudgetExceeded."""
+        self.attempt += 1
+        if self.policy.max_attempts and self.attempt >= self.policy.max_attempts:
+            raise RetryBudgetExceeded(f'{label}: исчерпано {self.policy.max_attempts} попыток загрузки')
+
+        delay = self.policy.backoff(self.attempt)
+        limits = [self.deadline - time.monotonic()] if self.deadline else []
+        if self.budget and self.budget.deadline is not None:
+            limits.append(self.budget.remaining())
+        if limits and min(limits) <= delay:
+            raise RetryBudgetExceeded(f'{label}: истекло время на повторы загрузки')
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель для всех запросов клиента.
+
+    Если среди последних window запросов (не менее min_calls) доля сбоев
+    достигает failure_ratio, выключатель размыкается и запросы ждут
+    open_seconds. Затем пропускается один пробный запрос: успех замыкает
+    выключатель, сбой снова размыкает его с удвоенной паузой (до max_open_seconds).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_ratio=0.5, window=20, min_calls=10, open_seconds=30.0, max_open_seconds=300.0):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.open_seconds = open_seconds
+        self.results = deque(maxlen=window)
+        self.state = self.CLOSED
+        self.opened_until = 0.0
+        self.probe_in_flight = False
+        self.condition = threading.Condition()
+
+    def wait_until_allowed(self, cancel_event=None, on_event=None):
+        """
+        Блокирует, пока выключатель разомкнут. Возвращает False, если
+        ожидание прервано событием отмены.
+        """
+        waited = False
+        with self.condition:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                if self.state == self.OPEN and time.monotonic() >= self.opened_until:
+                    self.state = self.HALF_OPEN
+                    self.probe_in_flight = False
+                if self.state == self.CLOSED or (self.state == self.HALF_OPEN and not self.probe_in_flight):
+                    if self.state == self.HALF_OPEN:
+                        self.probe_in_flight = True
+                    if waited and on_event:
+                        on_event("Пробный запрос к серверу...")
+                    return True
+
+                if not waited and on_event:
+                    remaining = max(self.opened_until - time.monotonic(), 0)
+                    on_event(f"Сервер перегружен, загрузка приостановлена (~{remaining:.0f} с)")
+                waited = True
+                self.condition.wait(timeout=0.5)
+
+    def record_success(self):
+        with self.condition:
+            self.results.append(True)
+            if self.state != self.CLOSED:
+                logging.info('Сервер снова отвечает, загрузка возобновлена.')
+                self.state = self.CLOSED
+                self.open_seconds = self.base_open_seconds
+                self.results.clear()
+                self.condition.notify_all()
+
+    def record_failure(self):
+        with self.condition:
+            self.results.append(False)
+            if self.state == self.HALF_OPEN:
+                self.open_seconds = min(self.open_seconds * 2, self.max_open_seconds)
+                self._open()
+            elif self.state == self.CLOSED and len(self.results) >= self.min_calls:
+                failures = self.results.count(False)
+                if failures / len(self.results) >= self.failure_ratio:
+                    self._open()
+
+    def release_probe(self):
+        """
+        Освобождает место пробного запроса, если он не дошел до сервера (ошибка
+        до отправки, отмена): следующий запрос снова станет пробным.
+        """
+        with self.condition:
+            if self.state == self.HALF_OPEN and self.probe_in_flight:
+                self.probe_in_flight = False
+                self.condition.notify_all()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_until = time.monotonic() + self.open_seconds
+        self.probe_in_flight = False
+        logging.warning(f'Слишком много ошибок сервера, загрузки приостановлены на {self.open_seconds:.0f} с.')
+        self.condition.notify_all()
@@ -0,0 +1,371 @@
+"""
+Задания загрузки и скачивания без интерфейса: их выполняют окна test.py и
+netr.py (через jobs.JobManager), командная строка packer_cli.py и служба
+горячей папки.
+
+Функции вызываются как fn(job, api, ...): job - задание (job_base.BaseJob)
+для прогресса, статуса, отмены и метрик, api - клиент сервера (ApiClient).
+Ожидаемые ошибки - JobError с текстом для пользователя.
+"""
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import requests
+
+from app_logging import SampledLog
+from column_schema import TASK_SCHEMA, VPS_FILE_SCHEMA, WPS_SCHEMA
+from download_cache import cache_key, get_download_cache
+from excel_reader import ExcelReader, SpilledChunks, prefetch
+from job_base import JobError
+from job_metrics import STAGE_BUILD, STAGE_CLEAN, STAGE_DOWNLOAD, STAGE_EXCEL_WRITE, STAGE_READ, STAGE_REPORT, \
+    STAGE_SEND
+from paged_download import DownloadChangedError, DownloadStatusError, PagedDownloader
+from payload_builder import build_payloads, clean_nulls
+from retry_policy import RetryBudgetExceeded
+from task_reports import calculate_full_report, save_multiple_sheets_to_excel, save_to_excel
+from upload_engine import ConcurrentUploader, RowUploader
+from upload_journal import resumable_upload_chunks
+from validation import validate_file
+
+# Количество строк в одном запросе при пакетной загрузке (1 - построчная отправка)
+UPLOAD_BATCH_SIZE = 500
+
+# Количество одновременных запросов при загрузке задания ВПС
+UPLOAD_MAX_IN_FLIGHT = 8
+
+# Строк на странице и страниц одновременно при скачивании задания
+DOWNLOAD_PAGE_ROWS = 5000
+DOWNLOAD_MAX_IN_FLIGHT = 4
+
+
+def task_prefix(file_name):
+    """Префикс площадки (pref) - часть названия файла задания до первого пробела."""
+    return file_name.split(' ')[0]
+
+
+def download_tables(job, api, path, params, tables, metrics, cache=None):
+    """
+    Скачивает ответ path постранично и параллельно (paged_download): массивы
+    tables - DataFrame. Прогресс - строки и байты; ошибки - JobError.
+
+    Ответ хранится в дисковом кэше (download_cache): если задание уже
+    скачивалось, сервер получает условный запрос и при ответе 304 данные
+    читаются с диска.
+    """
+    def on_progress(rows, total, received):
+        job.report_progress(rows, total)
+        job.report_status(f"Скачано строк: {rows} из {total} ({received / 1024 / 1024:.1f} МБ)")
+
+    cache = cache or get_download_cache()
+    key = cache_key(api.base_url + path, params)
+    entry = cache.lookup(key)
+    downloader = PagedDownloader(api, path, params, page_rows=DOWNLOAD_PAGE_ROWS,
+                                 max_in_flight=DOWNLOAD_MAX_IN_FLIGHT, metrics=metrics)
+    try:
+        result = downloader.download(tables, on_progress=on_progress, cancel_event=job.cancel_event,
+                                     on_event=job.report_status, validators=entry and entry.validators(),
+                                     as_buffers=True)
+        if result is None:
+            job.report_status("Задание не изменилось, чтение из кэша...")
+            try:
+                return cache.load(entry, tables)
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Запись кэша {path} {params} повреждена, скачиваем заново: {e}")
+                cache.remove(key)
+                result = downloader.download(tables, on_progress=on_progress, cancel_event=job.cancel_event,
+                                             on_event=job.report_status, as_buffers=True)
+    except DownloadStatusError as e:
+        logging.error(f"Ошибка скачивания {path} {params}: {e.status_code}")
+        raise JobError(f"Не удалось загрузить файл. Сервер вернул: {e.status_code}")
+    except DownloadChangedError as e:
+        logging.error(f"Страницы {path} {params} не сходятся: {e}")
+        raise JobError("Задание изменилось во время скачивания. Скачайте его повторно.")
+    except RetryBudgetExceeded as e:
+        raise JobError(f"Скачивание остановлено: {e}")
+
+    try:
+        cache.store(key, f"{path} {params}", downloader.etag, downloader.last_modified, result, tables)
+    except (OSError, sqlite3.Error) as e:
+        logging.warning(f"Не удалось сохранить {path} {params} в кэш: {e}")
+    return {name: value.to_frame() if name in tables else value for name, value in result.items()}
+
+
+def delete_uploaded_data(api, pref, task_name):
+    """Удаляет с сервера строки задания, загруженные до отмены; ошибка сервера - JobError с его сообщением."""
+    data = {
+        "pref": pref,
+        "Nazvanie_Zadaniya": task_name
+    }
+    response = api.post('/delete-uploaded-data', json=data)
+    if response.status_code != 200:
+        raise JobError(response.json().get('message', 'Не удалось удалить данные.'))
+
+
+def run_upload_file(job, api, file_path, file_name, pref, selected_sklad):
+    """Читает Excel-файл и отправляет строки на сервер (выполняется в фоновом задании)."""
+    constants = {
+        'pref': pref,
+        'Scklad_Pref': selected_sklad,
+        'Status': 0,
+        'Status_Zadaniya': 0,
+        'Nazvanie_Zadaniya': file_name,
+    }
+
+    metrics = job.start_metrics('upload_file', file_name)
+
+    # Файл проверяется целиком до отправки первой строки: все ошибки попадают
+    # в один отчет, а сервер не получает неполное задание. Число листов здесь
+    # не проверяется - загружается первый лист, как и раньше.
+    chunks, total = read_checked_file(job, file_path, TASK_SCHEMA.upload_columns, "Файл пустой.", single_sheet=False)
+
+    job.report_status("Загрузка, пожалуйста, подождите...")
+
+    def payload_chunks():
+        for chunk in chunks:
+            with metrics.stage(STAGE_CLEAN):
+                chunk = clean_nulls(chunk)
+            with metrics.stage(STAGE_BUILD):
+                payloads = build_payloads(chunk, TASK_SCHEMA.upload_fields, constants)
+            yield payloads
+
+    # Строки кусков формируются в фоновом потоке, пока отправляются предыдущие.
+    # Отправляем строки пакетами; если сервер не поддерживает пакеты - построчно.
+    # Строки, подтвержденные в прерванной загрузке этого же файла, пропускаются.
+    uploader = RowUploader(api, '/upload-data-new', batch_size=UPLOAD_BATCH_SIZE, metrics=metrics)
+    with chunks, closing(prefetch(payload_chunks())) as payloads:
+        try:
+            resumable_upload_chunks(uploader, file_path, file_name, payloads,
+                                    total=total, on_progress=job.report_progress,
+                                    cancel_event=job.cancel_event, on_status=job.report_status)
+        except RetryBudgetExceeded as e:
+            raise JobError(f"Загрузка остановлена: {e}. Загрузите файл повторно - "
+                           f"загрузка продолжится с первой незагруженной строки.")
+
+
+def run_download_file(job, api, selected_task, column_names, directory=None):
+    """Скачивает данные задания и сохраняет их в Excel (выполняется в фоновом задании)."""
+    metrics = job.start_metrics('download_file', selected_task)
+    try:
+        # Log the task being downloaded
+        logging.debug(f"Downloading data for task: {selected_task}")
+        job.report_status("Скачивание данных...")
+        with metrics.stage(STAGE_DOWNLOAD):
+            json_data = download_tables(job, api, '/download', {'task': selected_task}, ('dataSet1', 'dataSet2'),
+                                        metrics)
+
+        job.check_cancelled()
+        job.report_status("Формирование отчета...")
+
+        # Process WB-specific data
+        if "WB" in selected_task:
+            data_set1 = json_data['dataSet1']
+            data_set2 = json_data['dataSet2']
+
+            # Check if data_set1 has required data
+            if data_set1.empty:
+                raise JobError("No data available.")
+
+            # Verify required columns before processing
+            required_columns = ['Artikul', 'Kolvo_Tovarov', 'Pallet_No']
+            missing_columns = [col for col in required_columns if col not in data_set1.columns]
+            if missing_columns:
+                logging.error(f"Missing required columns in data_set1: {missing_columns}")
+                raise JobError(f"Missing required columns in data_set1: {missing_columns}")
+
+            metrics.add_rows(len(data_set1))
+
+            # Calculate full report
+            with metrics.stage(STAGE_REPORT):
+                data_set2 = calculate_full_report(data_set1, data_set2)
+
+            # Save to Excel
+            with metrics.stage(STAGE_EXCEL_WRITE):
+                return save_multiple_sheets_to_excel(data_set1, data_set2, selected_task, column_names,
+                                                     directory, source=('/download', task_prefix(selected_task)))
+
+        # Handle non-WB tasks
+        data_set1 = json_data['dataSet1']
+        if data_set1.empty:
+            raise JobError("No data available.")
+        metrics.add_rows(len(data_set1))
+        with metrics.stage(STAGE_EXCEL_WRITE):
+            return save_to_excel(data_set1, selected_task, column_names, directory,
+                                 source=('/download', task_prefix(selected_task)))
+
+    except requests.RequestException as e:
+        logging.error(f'Error downloading file: {e}')
+        raise JobError(f"Error downloading file: {e}")
+
+
+def check_single_sheet(reader):
+    """Проверяет по уже открытой книге, что в ней один лист (файл не открывается повторно)."""
+    if not reader.single_sheet:
+        raise JobError("Файл содержит несколько листов. Пожалуйста, загрузите файл только с одним листом!")
+
+
+def read_checked_file(job, file_path, columns, empty_message, single_sheet=True):
+    """
+    Проверяет файл целиком по столбцам схемы до отправки первой строки; при
+    single_sheet файл должен содержать один лист. Книга разбирается один раз:
+    прочитанные куски сохраняются на диск (SpilledChunks), а не в память.
+    Возвращает (SpilledChunks - куски для отправки, количество строк); при
+    ошибках - JobError с отчетом.
+    Время чтения добавляется к метрикам задания (job.start_metrics вызывается раньше).
+    """
+    job.report_status("Проверка файла...")
+    chunks = SpilledChunks()
+    try:
+        with job.metrics.stage(STAGE_READ), ExcelReader(file_path) as reader:
+            if single_sheet:
+                check_single_sheet(reader)
+            report = validate_file(reader, columns, spill=chunks)
+        if not report.rows_checked:
+            raise JobError(empty_message)
+        if not report.ok:
+            logging.error(f"Файл {os.path.basename(file_path)} не прошел проверку:\n{report.format(max_rows=None)}")
+            raise JobError(f"Файл не прошел проверку, строки не отправлены.\n{report.format()}")
+    except BaseException:
+        chunks.close()
+        raise
+    return chunks, report.rows_checked
+
+
+def run_load_vps(job, api, file_path):
+    """Читает файл ВПС и отправляет строки на сервер (выполняется в фоновом задании)."""
+    metrics = job.start_metrics('load_vps', os.path.basename(file_path))
+
+    # Файл проверяется целиком до отправки первой строки.
+    # Пустые ячейки - NaN, как при чтении через pandas.read_excel.
+    chunks, total = read_checked_file(job, file_path, VPS_FILE_SCHEMA.upload_columns, "Файл пустой!")
+
+    def cleaned_rows():
+        with chunks:
+            for chunk in chunks:
+                with metrics.stage(STAGE_CLEAN):
+                    chunk = chunk.where(chunk.notna(), np.nan)
+                for _, row in chunk.iterrows():
+                    yield row
+
+    row_log = SampledLog()
+    for index, row in enumerate(cleaned_rows()):
+        job.check_cancelled()
+
+        # Формируем payload для отправки строки на сервер
+        build_started = time.perf_counter()
+        payload = {
+            'nazvanie_zdaniya': str(row.get('Название задания', '')),
+            'artikul': str(row.get('Артикул', '')),
+            'shk': str(row.get('Штрих-код', '')).rstrip('.0') if isinstance(row.get('Штрих-код', ''),
+                                                                            (int, float)) else str(
+                row.get('Штрих-код', '')),
+            'mesto': str(row.get('Место', '')),
+            'vlozhennost': str(row.get('Вложенность', '')),
+            'pallet': str(row.get('Паллет', '')),
+            'size_vps': str(row.get('Размер ВПС', '')),
+            'vp': str(row.get('ВП', '')),
+            'itog_zakaza': row.get('Итог заказа'),  # Без преобразования в строку
+            'shk_wps': str(row.get('ШК ВПС', ''))
+        }
+        started = time.perf_counter()
+        metrics.add_stage_time(STAGE_BUILD, started - build_started)
+
+        try:
+            with metrics.stage(STAGE_SEND):
+                response = api.post("/uploadWPS", json=payload, timeout=30)
+            metrics.record_request(time.perf_counter() - started, failed=response.status_code != 200)
+
+            if response.status_code == 200:
+                metrics.add_rows()
+                row_log.log(logging.INFO, "✅ Строка %d/%d успешно загружена: %s", index + 1, total, payload)
+            else:
+                logging.error(f"❌ Ошибка при загрузке строки {index + 1}: {response.text}")
+
+        except requests.RequestException as e:
+            metrics.record_request(time.perf_counter() - started, failed=True)
+            logging.error(f"⛔ Ошибка сети при загрузке строки {index + 1}: {e}")
+            continue
+
+        # Обновляем прогресс
+        job.report_progress(index + 1, total)
+
+
+def run_load_task(job, api, file_path, file_name, pref):
+    """Читает файл задания и отправляет строки на сервер (выполняется в фоновом задании)."""
+    constants = {
+        'pref': pref,
+        'Status': 0,
+        'Status_Zadaniya': 0,
+        'Nazvanie_Zadaniya': file_name,
+    }
+
+    metrics = job.start_metrics('load_task', file_name)
+
+    def payload_chunks(chunks):
+        for chunk in chunks:
+            # Очистка данных
+            with metrics.stage(STAGE_CLEAN):
+                chunk = chunk.replace({np.nan: None, '': None, ' ': None, 'nan': None, 'NaN': None})
+            with metrics.stage(STAGE_BUILD):
+                payloads = build_payloads(chunk, WPS_SCHEMA.upload_fields, constants)
+            logging.debug("Сформировано строк для загрузки: %d", len(payloads))
+            yield payloads
+
+    # Файл проверяется целиком до отправки; строки кусков формируются в фоновом потоке
+    chunks, total = read_checked_file(job, file_path, WPS_SCHEMA.upload_columns, "Файл пустой.")
+    job.report_status("Загрузка, пожалуйста, подождите...")
+
+    # Строки отправляются параллельно, прогресс обновляется в порядке строк файла.
+    # После сбоя загрузка продолжается с первой неподтвержденной строки.
+    uploader = ConcurrentUploader(api, "/uploadData", max_in_flight=UPLOAD_MAX_IN_FLIGHT, timeout=75,
+                                  metrics=metrics)
+    with chunks, closing(prefetch(payload_chunks(chunks))) as payloads:
+        try:
+            resumable_upload_chunks(uploader, file_path, file_name, payloads,
+                                    total=total, on_progress=job.report_progress,
+                                    cancel_event=job.cancel_event, on_status=job.report_status)
+        except RetryBudgetExceeded as e:
+            raise JobError(f"Загрузка остановлена: {e}. Загрузите файл повторно - "
+                           f"загрузка продолжится с первой незагруженной строки.")
+
+
+def run_download_task(job, api, original_task_name, save_path):
+    """Скачивает данные задания и сохраняет их в Excel (выполняется в фоновом задании)."""
+    metrics = job.start_metrics('download_task', original_task_name)
+    try:
+        job.report_status(f"Скачивание задания: {original_task_name}...")
+
+        # Запрос с параметром task
+        params = {'task': original_task_name}
+
+        with metrics.stage(STAGE_DOWNLOAD):
+            data = download_tables(job, api, "/downloadData", params, ('data',), metrics)
+        df = data["data"]
+        if not data.get("success") or df.empty:
+            logging.warning(f"Нет данных для задания {original_task_name}")
+            raise JobError("Нет данных для скачивания.")
+
+        job.check_cancelled()
+        metrics.add_rows(len(df))
+
+        # Удаляем поле ID если оно есть
+        if 'id' in df.columns:
+            df.drop(columns=['id'], inplace=True)
+
+        # Русифицируем заголовки колонок
+        WPS_SCHEMA.rename_for_download(df)
+
+        # Сохраняем в Excel
+        job.report_status("Сохранение файла...")
+        with metrics.stage(STAGE_EXCEL_WRITE):
+            df.to_excel(save_path, index=False)
+
+        logging.info(f"Файл успешно сохранён: {save_path}")
+        return save_path
+
+    except requests.RequestException as e:
+        logging.error(f"Ошибка сети при скачивании файла: {e}")
+        raise JobError(f"Ошибка сети: {e}")
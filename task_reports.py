@@ -0,0 +1,331 @@
+"""
+Отчеты по скачанным заданиям: полный отчет WB (calculate_full_report) и
+запись отчетов в Excel с листом времени работы.
+
+Файлы сохраняются в папку загрузок пользователя или в переданную папку
+(командная строка). Ошибки записи - JobError с текстом для пользователя.
+"""
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from app_paths import downloads_dir
+from column_schema import TASK_SCHEMA
+from datetime_formats import parse_datetime_columns
+from job_base import JobError
+
+
+def calculate_full_report(sheet1, sheet2):
+    """Calculate and update the second sheet based on the first sheet's data, then remove redundant rows."""
+
+    # Standardize column names in both sheets
+    TASK_SCHEMA.standardize_for_report(sheet1)
+    TASK_SCHEMA.standardize_for_report(sheet2)
+
+    # Verify required columns in both sheets
+    required_columns = ['Artikul', 'Kolvo_Tovarov', 'Pallet_No']
+    missing_columns = [col for col in required_columns if col not in sheet1.columns]
+
+    if missing_columns:
+        logging.error(f"Missing columns in sheet1 after renaming: {missing_columns}")
+        return sheet2  # Return unmodified sheet2 if there are missing columns
+
+    # Group by standardized column names
+    grouped_data = sheet1.groupby(['Artikul', 'Kolvo_Tovarov', 'Pallet_No']).size().reset_index(
+        name='Количество записей')
+    # Group values as the rows of grouped_data.iterrows() see them (one common dtype)
+    group_values = grouped_data.to_numpy()
+    group_kolvo, group_pallet, group_mesto = (
+        group_values[:, grouped_data.columns.get_loc(name)] for name in ('Kolvo_Tovarov', 'Pallet_No',
+                                                                         'Количество записей'))
+
+    # Groups matching existing rows of sheet2 by Artikul and Vlozhennost
+    groups = grouped_data[['Artikul', 'Kolvo_Tovarov']].assign(_group=np.arange(len(grouped_data)))
+    rows = sheet2[['Artikul', 'Vlozhennost']].assign(_row=np.arange(len(sheet2)))
+    matches = merge_on_keys(groups, rows, ['Artikul', 'Kolvo_Tovarov'], ['Artikul', 'Vlozhennost'])
+
+    # Update existing rows: for a row matched by several groups the last group (by sort order) wins
+    if not matches.empty:
+        last_group = matches.groupby('_row', sort=True)['_group'].max()
+        positions = last_group.index.to_numpy()
+        winners = last_group.to_numpy()
+        for name, column in (('Mesto', group_mesto), ('Pallet_No', group_pallet)):
+            # Values of one type: a column keeps its dtype when the values fit it, as with scalars
+            values = pd.Series(column[winners], dtype=column.dtype).infer_objects().to_numpy()
+            sheet2.iloc[positions, sheet2.columns.get_loc(name)] = values
+
+    # Unmatched groups copy every row of sheet2 with the same Artikul (in group order, then row order)
+    unmatched = groups[~groups['_group'].isin(matches['_group'])]
+    copies = merge_on_keys(unmatched[['Artikul', '_group']], rows[['Artikul', '_row']], ['Artikul'], ['Artikul'])
+    if not copies.empty:
+        copies = copies.sort_values(['_group', '_row'], kind='stable')
+        copied_groups = copies['_group'].to_numpy()
+        values = sheet2.to_numpy()
+        if values.dtype != object:
+            values = values.astype(np.result_type(values.dtype, group_values.dtype))
+        values = values[copies['_row'].to_numpy()]
+        for name, column in (('Vlozhennost', group_kolvo), ('Mesto', group_mesto), ('Pallet_No', group_pallet)):
+            values[:, sheet2.columns.get_loc(name)] = column[copied_groups]
+        new_rows = pd.DataFrame(values, columns=sheet2.columns)
+        if values.dtype == object:
+            new_rows = new_rows.infer_objects()
+        sheet2 = pd.concat([sheet2, new_rows], ignore_index=True)
+
+    # Remove redundant rows: rows with empty Mesto, Vlozhennost, and Pallet_No
+    # if the same Artikul already has non-empty values
+    report_values = sheet2[['Mesto', 'Vlozhennost', 'Pallet_No']]
+    with_values = report_values.notna().all(axis=1)
+    without_values = report_values.isna().all(axis=1)
+    artikul_has_values = with_values.groupby(sheet2['Artikul'], sort=False, dropna=True).transform('any')
+    # Rows with an empty Artikul are never dropped (NaN never equals NaN)
+    redundant = without_values & artikul_has_values.eq(True)
+    if redundant.any():
+        sheet2 = sheet2[~redundant]
+
+    return sheet2
+
+
+def merge_on_keys(left, right, left_on, right_on):
+    """
+    Inner merge с сохранением порядка строк left. Ключи разных типов (например,
+    int64 и object) сравниваются как объекты, как при сравнении столбца со значением.
+    """
+    left = left.copy()
+    right = right.copy()
+    for left_key, right_key in zip(left_on, right_on):
+        if left[left_key].dtype != right[right_key].dtype:
+            left[left_key] = left[left_key].astype(object)
+            right[right_key] = right[right_key].astype(object)
+    return left.merge(right, how='inner', left_on=left_on, right_on=right_on, sort=False)
+
+
+def save_to_excel(data, task_name, column_names, directory=None, source=None):
+    """Save a DataFrame to an Excel file and return its path.
+
+    source - источник данных для запоминания формата времени (datetime_formats)."""
+    try:
+        # Логгируем информацию о структуре данных для отладки
+        logging.info(f"Колонки в данных: {data.columns.tolist()}")
+
+        # Переименуем колонки
+        data.rename(columns=column_names, inplace=True)
+        logging.info(f"Колонки после переименования: {data.columns.tolist()}")
+
+        # Преобразуем ШК в текстовый формат
+        if 'ШК' in data.columns:
+            data['ШК'] = data['ШК'].astype(str)
+
+        # Получаем информацию о времени работы
+        time_info = [
+            ["Информация о времени работы с заданием"],
+            ["Название задания:", task_name]
+        ]
+
+        # Проверяем, есть ли колонки с датами (разные возможные имена)
+        time_start_col = None
+        time_end_col = None
+
+        for col in data.columns:
+            if col.lower() in ['начало', 'time_start', 'time start']:
+                time_start_col = col
+            elif col.lower() in ['окончание', 'time_end', 'time end']:
+                time_end_col = col
+
+        logging.info(f"Найдены колонки с датами: начало={time_start_col}, окончание={time_end_col}")
+
+        if time_start_col and time_end_col:
+            try:
+                # Формат определяется по выборке (и запоминается для источника), столбцы разбираются целиком
+                parse_datetime_columns(data, [time_start_col, time_end_col], source)
+
+                # Получаем минимальное и максимальное значение времени
+                start_time = data[time_start_col].min()
+                end_time = data[time_end_col].max()
+
+                logging.info(f"Временные метки: начало={start_time}, окончание={end_time}")
+
+                if pd.notna(start_time) and pd.notna(end_time):
+                    # Добавляем информацию о времени
+                    time_info.extend([
+                        ["Начало работы:", start_time.strftime("%d.%m.%Y %H:%M:%S")],
+                        ["Окончание работы:", end_time.strftime("%d.%m.%Y %H:%M:%S")],
+                        ["Общее время работы:", str(end_time - start_time)]
+                    ])
+                    logging.info("Успешно сформирована информация о времени")
+                else:
+                    # Если не удалось определить даты, добавляем "Нет данных"
+                    time_info.extend([
+                        ["Начало работы:", "Нет данных"],
+                        ["Окончание работы:", "Нет данных"],
+                        ["Общее время работы:", "Нет данных"]
+                    ])
+            except Exception as e:
+                logging.error(f"Ошибка при обработке дат: {e}")
+                import traceback
+                logging.error(traceback.format_exc())
+                # В случае ошибки, добавляем "Нет данных"
+                time_info.extend([
+                    ["Начало работы:", "Нет данных"],
+                    ["Окончание работы:", "Нет данных"],
+                    ["Общее время работы:", "Нет данных"]
+                ])
+        else:
+            # Если колонки с датами не найдены
+            time_info.extend([
+                ["Начало работы:", "Нет данных"],
+                ["Окончание работы:", "Нет данных"],
+                ["Общее время работы:", "Нет данных"]
+            ])
+
+        # Удаляем строки, где Вложенность == 0 и reason пустой
+        if 'Вложенность' in data.columns and 'Причина' in data.columns:
+            # Преобразуем Вложенность в числовой формат для корректного сравнения
+            data['Вложенность'] = pd.to_numeric(data['Вложенность'], errors='coerce')
+            filtered_data = data[~((data['Вложенность'] == 0) & (
+                        data['Причина'].isna() | (data['Причина'].astype(str).str.strip() == '')))]
+
+            if len(filtered_data) < len(data):
+                logging.info(f"Отфильтровано {len(data) - len(filtered_data)} строк по условию Вложенность==0 и пустой Причине")
+                data = filtered_data
+
+        local_file_path = os.path.join(directory or downloads_dir(), f"{task_name}")
+
+        # Записываем данные в Excel
+        with pd.ExcelWriter(local_file_path, engine='xlsxwriter') as writer:
+            # Записываем информацию о времени на отдельный лист (первым)
+            time_df = pd.DataFrame(time_info)
+            time_df.to_excel(writer, sheet_name='Время работы', index=False, header=False)
+            logging.info("Сохранен лист с информацией о времени")
+
+            # Записываем основные данные
+            data = reorder_columns_by_template(data)
+            data.to_excel(writer, sheet_name='Отчет', index=False)
+            logging.info("Сохранен лист с данными")
+
+        logging.info(f'Файл сохранен: {local_file_path}')
+        return local_file_path
+
+    except Exception as e:
+        logging.error(f"Ошибка при сохранении файла: {e}")
+        import traceback
+        logging.error(traceback.format_exc())
+        raise JobError(f"Ошибка при сохранении файла: {e}")
+
+
+def reorder_columns_by_template(df: pd.DataFrame) -> pd.DataFrame:
+    return TASK_SCHEMA.reorder_for_export(df)
+
+
+def save_multiple_sheets_to_excel(data_set1, data_set2, task_name, column_names, directory=None, source=None):
+    """Save two DataFrames into an Excel file on separate sheets, filtering out rows with missing data on the first sheet.
+
+    Returns the path of the saved file. source - как в save_to_excel."""
+
+    try:
+        # Переименуем столбцы для первого и второго листов
+        data_set1.rename(columns=column_names, inplace=True)
+        data_set2.rename(columns=column_names, inplace=True)
+
+        # Преобразуем ШК в текстовый формат для обоих датафреймов
+        if 'ШК' in data_set1.columns:
+            data_set1['ШК'] = data_set1['ШК'].astype(str)
+        if 'ШК' in data_set2.columns:
+            data_set2['ШК'] = data_set2['ШК'].astype(str)
+
+        # Проверяем наличие необходимых колонок
+        required_columns = ["Kolvo_Tovarov", "Pallet_No"]
+        missing_columns = [col for col in required_columns if col not in data_set1.columns]
+
+        if missing_columns:
+            logging.error(f"Отсутствуют необходимые колонки: {missing_columns}")
+            raise JobError(f"Отсутствуют необходимые колонки: {missing_columns}")
+
+        # Удаляем строки на первом листе, где отсутствуют значения в "Количество товаров" и "Паллет №"
+        filtered_data_set1 = data_set1.dropna(subset=required_columns)
+
+        # Удаляем строки из полного отчета, где Вложенность == 0 и reason пустой
+        if 'Вложенность' in data_set2.columns and 'Причина' in data_set2.columns:
+            # Преобразуем Вложенность в числовой формат для корректного сравнения
+            data_set2['Вложенность'] = pd.to_numeric(data_set2['Вложенность'], errors='coerce')
+            data_set2 = data_set2[~((data_set2['Вложенность'] == 0) & (
+                        data_set2['Причина'].isna() | (data_set2['Причина'].astype(str).str.strip() == '')))]
+
+        # Создаем базовую информацию о времени работы
+        time_info = [
+            ["Информация о времени работы с заданием"],
+            ["Название задания:", task_name]
+        ]
+
+        # Проверяем, есть ли колонки с датами
+        time_start_col = None
+        time_end_col = None
+
+        for col in data_set2.columns:
+            if col.lower() in ['начало', 'time_start', 'time start']:
+                time_start_col = col
+            elif col.lower() in ['окончание', 'time_end', 'time end']:
+                time_end_col = col
+
+        if time_start_col and time_end_col:
+            try:
+                # Формат определяется по выборке (и запоминается для источника), столбцы разбираются целиком
+                parse_datetime_columns(data_set2, [time_start_col, time_end_col], source)
+
+                start_time = data_set2[time_start_col].min()
+                end_time = data_set2[time_end_col].max()
+
+                if pd.notna(start_time) and pd.notna(end_time):
+                    # Добавляем информацию о времени, если удалось определить даты
+                    time_info.extend([
+                        ["Начало работы:", start_time.strftime("%d.%m.%Y %H:%M:%S")],
+                        ["Окончание работы:", end_time.strftime("%d.%m.%Y %H:%M:%S")],
+                        ["Общее время работы:", str(end_time - start_time)]
+                    ])
+                else:
+                    # Если не удалось определить даты, добавляем "Нет данных"
+                    time_info.extend([
+                        ["Начало работы:", "Нет данных"],
+                        ["Окончание работы:", "Нет данных"],
+                        ["Общее время работы:", "Нет данных"]
+                    ])
+            except Exception as e:
+                logging.error(f"Ошибка при обработке дат: {e}")
+                # В случае ошибки, добавляем "Нет данных"
+                time_info.extend([
+                    ["Начало работы:", "Нет данных"],
+                    ["Окончание работы:", "Нет данных"],
+                    ["Общее время работы:", "Нет данных"]
+                ])
+        else:
+            # Если колонки с датами не найдены
+            time_info.extend([
+                ["Начало работы:", "Нет данных"],
+                ["Окончание работы:", "Нет данных"],
+                ["Общее время работы:", "Нет данных"]
+            ])
+
+        # Определяем путь для сохранения файла (по умолчанию - папка загрузок)
+        local_file_path = os.path.join(directory or downloads_dir(), f"{task_name}")
+
+        # Записываем данные в Excel с двумя листами
+        with pd.ExcelWriter(local_file_path, engine='xlsxwriter') as writer:
+            # Записываем информацию о времени на отдельный лист (первым)
+            time_df = pd.DataFrame(time_info)
+            time_df.to_excel(writer, sheet_name='Время работы', index=False, header=False)
+            logging.info("Сохранен лист с информацией о времени")
+
+            filtered_data_set1.to_excel(writer, sheet_name='Краткий отчет', index=False)
+            data_set2 = reorder_columns_by_template(data_set2)
+            data_set2.to_excel(writer, sheet_name='Полный отчет', index=False)
+
+        # Информация о завершении
+        logging.info(f'Файл сохранен: {local_file_path}')
+        return local_file_path
+
+    except JobError:
+        raise
+    except Exception as e:
+        logging.error(f"Ошибка при сохранении файла: {e}")
+        raise JobError(f"Ошибка при сохранении файла: {e}")
@@ -0,0 +1,19 @@
+import pytest
+
+import mock_server
+from api_client import ApiClient
+
+
+@pytest.fixture
+def server():
+    """Заглушка сервера в фоновом потоке (адрес - server.base_url, хранилище - server.backend)."""
+    server = mock_server.start_server(seed=1)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def client(server):
+    client = ApiClient(server.base_url)
+    yield client
+    client.close()
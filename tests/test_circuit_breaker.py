@@ -0,0 +1,49 @@
+"""
+Автоматический выключатель (retry_policy.CircuitBreaker) на заглушке сервера:
+пробный запрос в полуоткрытом состоянии, упавший не по вине сервера, не должен
+занимать место пробного запроса навсегда.
+"""
+import threading
+import time
+
+import pytest
+
+from retry_policy import CircuitBreaker
+from upload_engine import batch_path_for, guarded_post
+
+BATCH_PATH = batch_path_for('/upload-data-new')
+
+
+@pytest.fixture
+def half_open(client):
+    """Выключатель клиента, у которого истекла пауза: следующий запрос - пробный."""
+    client.breaker = breaker = CircuitBreaker(min_calls=1, open_seconds=0.1)
+    breaker.record_failure()
+    time.sleep(0.2)
+    return breaker
+
+
+def test_probe_released_after_error_before_sending(client, half_open):
+    cancel_event = threading.Event()
+    # NaN нельзя сериализовать в JSON: запрос падает до отправки
+    payload = {'rows': [{'Mesto': float('nan')}] * 200}
+    with pytest.raises(ValueError):
+        guarded_post(client, BATCH_PATH, cancel_event, json=payload, compress=True)
+    assert not half_open.probe_in_flight
+
+    # Следующий запрос общего клиента становится пробным и замыкает выключатель
+    timer = threading.Timer(5, cancel_event.set)
+    timer.start()
+    try:
+        response = guarded_post(client, BATCH_PATH, cancel_event, json={'rows': []})
+    finally:
+        timer.cancel()
+    assert response.status_code == 200
+    assert not cancel_event.is_set(), 'следующий запрос ждал до отмены'
+    assert half_open.state == CircuitBreaker.CLOSED
+
+
+def test_probe_success_closes_breaker(client, half_open):
+    response = guarded_post(client, BATCH_PATH, threading.Event(), json={'rows': []})
+    assert response.status_code == 200
+    assert half_open.state == CircuitBreaker.CLOSED
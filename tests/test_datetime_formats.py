@@ -0,0 +1,27 @@
+"""Разбор времени сканирования (datetime_formats) совпадает с прежним разбором save_to_excel."""
+import pandas as pd
+import pytest
+
+from benchmarks.bench_datetime_parsing import COLUMNS, legacy_parse, make_times
+from benchmarks.workbook_generator import RUSSIAN_TIME_FORMAT, WB_TIME_FORMAT
+from datetime_formats import parse_datetime_columns
+
+
+@pytest.mark.parametrize('time_format', [WB_TIME_FORMAT, RUSSIAN_TIME_FORMAT])
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_legacy_parse(time_format, seed):
+    data = make_times(2000, time_format, seed)
+    # Прежний разбор выбирал способ по первому значению - оно непустое
+    data.iloc[0] = make_times(1, time_format, seed=100).iloc[0]
+    # Прежний перебор форматов не убирал пробелы по краям; эталон - без них
+    expected = legacy_parse(data.apply(lambda column: column.str.strip()))
+    for source in (None, ('/download', time_format)):
+        result = parse_datetime_columns(data.copy(), COLUMNS, source)
+        for column in COLUMNS:
+            pd.testing.assert_series_equal(result[column], expected[column], check_dtype=False)
+
+
+def test_empty_columns():
+    data = pd.DataFrame({COLUMNS[0]: [None, None], COLUMNS[1]: [None, None]}, dtype=object)
+    result = parse_datetime_columns(data, COLUMNS)
+    assert result[COLUMNS].isna().all().all()
@@ -0,0 +1,52 @@
+"""Повторное скачивание задания через дисковый кэш (download_cache)."""
+import pytest
+
+from benchmarks.bench_download_cache import TABLES, assert_same, timed_download
+from download_cache import DownloadCache
+
+
+@pytest.fixture
+def tasks(server):
+    server.backend.seed_tasks(2, 300)
+    # Завершенное задание и выполняемое
+    return sorted(server.backend.task_summaries(), key=lambda name: 'seed 2' in name)
+
+
+def test_unchanged_task_read_from_cache(server, client, tmp_path, tasks):
+    completed, _ = tasks
+    cache = DownloadCache(str(tmp_path / 'cache'))
+    first, _, _ = timed_download(server.backend, client, completed, cache)
+    second, _, requests = timed_download(server.backend, client, completed, cache)
+    cache.close()
+    assert requests == 1  # условный запрос, ответ 304
+    assert_same(second, first)
+    assert all(len(first[key]) for key in TABLES)
+
+
+def test_changed_task_downloaded_again(server, client, tmp_path, tasks):
+    _, in_progress = tasks
+    cache = DownloadCache(str(tmp_path / 'cache'))
+    timed_download(server.backend, client, in_progress, cache)
+    server.backend.complete_task(in_progress, share=1.0)
+    changed, _, requests = timed_download(server.backend, client, in_progress, cache)
+    fresh_cache = DownloadCache(str(tmp_path / 'fresh'))
+    fresh, _, _ = timed_download(server.backend, client, in_progress, fresh_cache)
+    cache.close()
+    fresh_cache.close()
+    assert requests > 1
+    assert_same(changed, fresh)
+
+
+def test_least_recently_used_entry_evicted(server, client, tmp_path, tasks):
+    completed, in_progress = tasks
+    cache = DownloadCache(str(tmp_path / 'cache'))
+    timed_download(server.backend, client, completed, cache)
+    entry_size = cache.total_size()
+    cache.close()
+
+    small = DownloadCache(str(tmp_path / 'small'), max_bytes=entry_size * 3 // 2)
+    timed_download(server.backend, client, completed, small)
+    timed_download(server.backend, client, in_progress, small)
+    _, _, requests = timed_download(server.backend, client, completed, small)
+    small.close()
+    assert requests > 1
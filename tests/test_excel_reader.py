@@ -0,0 +1,47 @@
+"""Чтение файла задания кусками (excel_reader.ExcelReader) всеми доступными движками."""
+import pandas as pd
+import pytest
+
+from benchmarks.bench_excel_ingest import workbook_path
+from excel_reader import ExcelReader, available_engines
+from payload_builder import clean_nulls
+
+
+@pytest.fixture(scope='module')
+def path(tmp_path_factory):
+    return workbook_path(300, str(tmp_path_factory.mktemp('ingest')))
+
+
+def read_all(path, engine, chunk_rows):
+    with ExcelReader(path, chunk_rows=chunk_rows, engine=engine) as reader:
+        return clean_nulls(pd.concat(reader.iter_chunks()))
+
+
+def comparable(value):
+    """
+    Значение ячейки для сравнения с pandas.read_excel: ExcelReader не превращает
+    целые в float из-за пустых ячеек и не читает числа из текстовых ячеек как числа.
+    """
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+@pytest.mark.parametrize('engine', available_engines())
+def test_engines_and_chunks_read_the_same(path, engine):
+    reference = read_all(path, 'openpyxl', chunk_rows=1000)
+    pd.testing.assert_frame_equal(read_all(path, engine, chunk_rows=7), reference)
+    # Индекс - номера строк листа Excel
+    assert list(reference.index) == list(range(2, 302))
+
+
+@pytest.mark.parametrize('engine', available_engines())
+def test_values_match_read_excel(path, engine):
+    expected = clean_nulls(pd.read_excel(path))
+    table = read_all(path, engine, chunk_rows=50)
+    assert list(table.columns) == list(expected.columns)
+    for column in expected.columns:
+        assert [comparable(value) for value in table[column]] == [comparable(value) for value in expected[column]]
@@ -0,0 +1,34 @@
+"""
+Полный отчет WB (task_reports.calculate_full_report) совпадает с прежней
+реализацией (цикл по группам) на случайных данных.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_full_report import generated_sheets, legacy_full_report, random_sheets
+from task_reports import calculate_full_report
+
+
+def assert_same_report(sheet1, sheet2):
+    expected = legacy_full_report(sheet1.copy(), sheet2.copy())
+    result = calculate_full_report(sheet1.copy(), sheet2.copy())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_matches_legacy_on_random_tables(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        assert_same_report(*random_sheets(rng))
+
+
+@pytest.mark.parametrize('rows', [1, 10, 200, 500])
+def test_matches_legacy_on_generated_tasks(rows):
+    assert_same_report(*generated_sheets(rows, seed=rows))
+
+
+def test_missing_columns_returns_second_sheet():
+    sheet1 = pd.DataFrame({'Artikul': [100]})
+    sheet2 = pd.DataFrame({'Artikul': [100], 'Mesto': [1], 'Vlozhennost': [2], 'Pallet_No': [3]})
+    assert_same_report(sheet1, sheet2)
@@ -0,0 +1,42 @@
+"""Итог фонового задания (job_base.BaseJob.execute)."""
+from job_base import BaseJob, JobCancelled, JobError
+from job_metrics import OUTCOME_CANCELLED, OUTCOME_FAILED, OUTCOME_SUCCESS
+
+
+def test_cancel_after_function_returned_is_success():
+    """Отмена, нажатая после последней подтвержденной строки, не отменяет выполненную загрузку."""
+    def upload(job):
+        job.cancel()
+        return 'загружено'
+
+    assert BaseJob(upload).execute() == (OUTCOME_SUCCESS, 'загружено')
+
+
+def test_cancelled_while_running():
+    def upload(job):
+        job.cancel()
+        job.check_cancelled()
+
+    assert BaseJob(upload).execute() == (OUTCOME_CANCELLED, None)
+
+
+def test_error_after_cancel_is_cancelled():
+    def upload(job):
+        job.cancel()
+        raise ConnectionError('соединение закрыто')
+
+    assert BaseJob(upload).execute() == (OUTCOME_CANCELLED, None)
+
+
+def test_job_error():
+    def upload(job):
+        raise JobError('Файл пустой.')
+
+    assert BaseJob(upload).execute() == (OUTCOME_FAILED, 'Файл пустой.')
+
+
+def test_job_cancelled_without_flag():
+    def upload(job):
+        raise JobCancelled()
+
+    assert BaseJob(upload).execute() == (OUTCOME_CANCELLED, None)
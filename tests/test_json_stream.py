@@ -0,0 +1,33 @@
+"""Потоковый разбор ответа /download (json_stream) совпадает с response.json() + DataFrame."""
+import random
+
+import pandas as pd
+import pytest
+
+from benchmarks.bench_json_stream import TABLES, chunked, legacy_tables, make_body, random_chunks
+from json_stream import STREAM_CHUNK_BYTES, read_json_tables
+
+
+def assert_same_tables(got, want):
+    for key in TABLES:
+        pd.testing.assert_frame_equal(got[key], want[key])
+
+
+@pytest.fixture(scope='module')
+def body():
+    return make_body(300)
+
+
+def test_matches_json_loads(body):
+    assert_same_tables(read_json_tables(chunked(body, STREAM_CHUNK_BYTES), TABLES), legacy_tables(body))
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_chunk_boundaries_inside_records(body, seed):
+    """Границы кусков внутри записей и многобайтовых символов UTF-8."""
+    assert_same_tables(read_json_tables(random_chunks(body, random.Random(seed)), TABLES), legacy_tables(body))
+
+
+def test_empty_tables():
+    body = b'{"dataSet1": [], "dataSet2": []}'
+    assert_same_tables(read_json_tables(chunked(body, 5), TABLES), legacy_tables(body))
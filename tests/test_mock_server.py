@@ -0,0 +1,24 @@
+"""Маршруты заглушки сервера, которыми пользуются приложения."""
+from mock_server import TASKS, WPS
+from task_jobs import delete_uploaded_data, task_prefix
+from upload_engine import send_row
+
+
+def test_legacy_upload_route(server, client):
+    """main.py загружает строки задания построчно в /upload-data."""
+    row = {'pref': 'WB', 'Nazvanie_Zadaniya': 'WB 12.10.xlsx', 'Artikul': 100}
+    send_row(client, '/upload-data', row, 0, 1)
+    assert server.backend.task_rows('WB 12.10.xlsx', TASKS) == [row]
+
+
+def test_delete_removes_task_and_wps_rows(server, client):
+    """Отмена загрузки задания ВПС (netr.py) удаляет строки /uploadData через /delete-uploaded-data."""
+    name, other = 'WB 12.10.xlsx', 'WB 13.10.xlsx'
+    for path in ('/upload-data-new', '/uploadData'):
+        for task in (name, other):
+            send_row(client, path, {'pref': 'WB', 'Nazvanie_Zadaniya': task, 'Artikul': 100}, 0, 1)
+
+    delete_uploaded_data(client, task_prefix(name), name)
+    for table in (TASKS, WPS):
+        assert server.backend.task_rows(name, table) == []
+        assert len(server.backend.task_rows(other, table)) == 1
@@ -0,0 +1,22 @@
+"""Постраничное скачивание задания (paged_download) совпадает со скачиванием одним ответом."""
+import pandas as pd
+import pytest
+
+from benchmarks.bench_paged_download import TABLES, single_response
+from paged_download import PagedDownloader
+from retry_policy import RetryPolicy
+
+
+@pytest.mark.parametrize('error_rate', [0.0, 0.2])
+def test_pages_match_single_response(server, client, error_rate):
+    server.backend.seed_tasks(1, 700)
+    task, = server.backend.completed_tasks()
+    expected = single_response(client, task)
+
+    # Ответы 500 повторяются по одной странице
+    server.backend.error_rate = error_rate
+    downloader = PagedDownloader(client, '/download', {'task': task}, page_rows=64, max_in_flight=4,
+                                 retry_policy=RetryPolicy(base_delay=0.01, max_delay=0.05))
+    result = downloader.download(TABLES)
+    for key in TABLES:
+        pd.testing.assert_frame_equal(result[key], expected[key])
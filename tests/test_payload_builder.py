@@ -0,0 +1,24 @@
+"""Строки загрузки задания (payload_builder) совпадают с прежней сборкой через iterrows."""
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.bench_payload_builder import legacy_op_value, legacy_payloads, make_sheet, vectorized_payloads
+from payload_builder import op_flag_value
+
+
+def as_json(rows):
+    """Строки так, как они уходят на сервер."""
+    return [json.dumps(row, sort_keys=True) for row in rows]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_iterrows(seed):
+    data = make_sheet(1000, seed)
+    assert as_json(vectorized_payloads(data.copy())) == as_json(legacy_payloads(data.copy()))
+
+
+@pytest.mark.parametrize('value', [None, 'V', 'v', ' V ', 1, 2.0, 3.7, '4', ' 5 ', 'да', '', ' ', np.int64(6)])
+def test_op_flag_matches_legacy(value):
+    assert op_flag_value(value) == legacy_op_value(value)
@@ -0,0 +1,59 @@
+"""Проверка файла задания перед отправкой (task_jobs.read_checked_file)."""
+import functools
+import os
+
+import pandas as pd
+import pytest
+
+import task_jobs
+from benchmarks.workbook_generator import make_task_sheet, write_workbook
+from column_schema import TASK_SCHEMA
+from excel_reader import ExcelReader, SpilledChunks
+from job_base import BaseJob, JobError
+
+
+@pytest.fixture
+def job():
+    job = BaseJob(None)
+    job.start_metrics('upload_file')
+    return job
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """Несколько кусков даже на маленьком файле."""
+    monkeypatch.setattr(task_jobs, 'ExcelReader', functools.partial(ExcelReader, chunk_rows=20))
+
+
+def workbook(tmp_path, sheet):
+    path = str(tmp_path / 'WB 12.10.xlsx')
+    write_workbook(path, sheet)
+    return path
+
+
+def test_chunks_match_single_read(tmp_path, job):
+    path = workbook(tmp_path, make_task_sheet(70))
+    chunks, total = task_jobs.read_checked_file(job, path, TASK_SCHEMA.upload_columns, 'Файл пустой.')
+    with ExcelReader(path, chunk_rows=20) as reader:
+        expected = list(reader.iter_chunks())
+    with chunks:
+        assert total == 70
+        got = list(chunks)
+        assert len(got) == len(expected) == 4
+        for chunk, want in zip(got, expected):
+            pd.testing.assert_frame_equal(chunk, want)
+    assert not os.path.exists(chunks.directory)
+
+
+def test_invalid_file_sends_nothing(tmp_path, job, monkeypatch):
+    spills = []
+
+    def spilled_chunks():
+        spills.append(SpilledChunks())
+        return spills[-1]
+
+    monkeypatch.setattr(task_jobs, 'SpilledChunks', spilled_chunks)
+    path = workbook(tmp_path, make_task_sheet(30).drop(columns=[TASK_SCHEMA.upload_columns[0].title]))
+    with pytest.raises(JobError, match='не прошел проверку'):
+        task_jobs.read_checked_file(job, path, TASK_SCHEMA.upload_columns, 'Файл пустой.')
+    assert not os.path.exists(spills[0].directory)
@@ -0,0 +1,60 @@
+"""Продолжение загрузки после сбоя по журналу подтвержденных строк (upload_journal)."""
+import sqlite3
+
+import pytest
+
+from mock_server import TASKS, WPS
+from upload_engine import ConcurrentUploader, RowUploader
+from upload_journal import UploadJournal, file_hash, resumable_upload_chunks
+
+TASK_NAME = 'WB 12.10.xlsx'
+CHUNK_ROWS = 30
+
+
+class Crash(Exception):
+    """Падение приложения во время чтения файла."""
+
+
+def payload_chunks(count, crash_after=None):
+    for start in range(0, count, CHUNK_ROWS):
+        if crash_after is not None and start >= crash_after:
+            raise Crash()
+        yield [{'pref': 'WB', 'Nazvanie_Zadaniya': TASK_NAME, 'Artikul': index}
+               for index in range(start, min(start + CHUNK_ROWS, count))]
+
+
+@pytest.fixture
+def task_file(tmp_path):
+    path = tmp_path / TASK_NAME
+    path.write_bytes(b'task')
+    return str(path)
+
+
+@pytest.mark.parametrize('path, table, make_uploader', [
+    ('/upload-data-new', TASKS, lambda client, path: RowUploader(client, path, batch_size=7)),
+    ('/uploadData', WPS, lambda client, path: ConcurrentUploader(client, path, max_in_flight=4)),
+])
+def test_resume_after_crash(server, client, tmp_path, task_file, path, table, make_uploader):
+    journal_path = str(tmp_path / 'journal.sqlite3')
+    journal = UploadJournal(journal_path)
+
+    def on_progress(done, total):
+        # Подтвержденные строки уже записаны на диск: их видит другое соединение
+        with sqlite3.connect(journal_path) as connection:
+            stored, = connection.execute('SELECT COUNT(*) FROM acked_rows').fetchone()
+        assert stored >= done
+
+    with pytest.raises(Crash):
+        resumable_upload_chunks(make_uploader(client, path), task_file, TASK_NAME, payload_chunks(100, 60),
+                                total=100, on_progress=on_progress, journal=journal)
+
+    # Журнал открыт заново, как после перезапуска: подтверждения первых кусков уже на диске
+    acked = UploadJournal(journal_path).begin(file_hash(task_file), TASK_NAME, 100)
+    assert acked == set(range(60))
+    journal.close()
+
+    resumable_upload_chunks(make_uploader(client, path), task_file, TASK_NAME, payload_chunks(100),
+                            total=100, journal=UploadJournal(journal_path))
+    rows = server.backend.task_rows(TASK_NAME, table)
+    assert sorted(row['Artikul'] for row in rows) == list(range(100))
+    assert server.backend.stats()['duplicates'] == 0
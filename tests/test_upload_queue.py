@@ -0,0 +1,36 @@
+"""Приоритет файлов в очереди загрузки (upload_queue.detect_priority)."""
+import pytest
+
+import upload_queue
+from benchmarks.workbook_generator import make_task_sheet, write_workbook
+from upload_queue import PRIORITY_NORMAL, PRIORITY_URGENT, URGENT_TITLE, detect_priority
+
+
+@pytest.fixture(autouse=True)
+def small_sample(monkeypatch):
+    monkeypatch.setattr(upload_queue, 'PRIORITY_SAMPLE_ROWS', 10)
+
+
+def workbook(tmp_path, urgent_rows, with_column=True):
+    sheet = make_task_sheet(30)
+    sheet[URGENT_TITLE] = None
+    sheet.loc[sheet.index[urgent_rows], URGENT_TITLE] = 1.5
+    if not with_column:
+        sheet = sheet.drop(columns=[URGENT_TITLE])
+    path = str(tmp_path / 'WB 12.10.xlsx')
+    write_workbook(path, sheet)
+    return path
+
+
+@pytest.mark.parametrize('urgent_rows, expected', [
+    ([], PRIORITY_NORMAL),
+    ([3], PRIORITY_URGENT),
+    # Просматриваются только первые PRIORITY_SAMPLE_ROWS строк
+    ([25], PRIORITY_NORMAL),
+])
+def test_priority_from_first_rows(tmp_path, urgent_rows, expected):
+    assert detect_priority(None, workbook(tmp_path, urgent_rows)) == expected
+
+
+def test_no_urgent_column(tmp_path):
+    assert detect_priority(None, workbook(tmp_path, [], with_column=False)) == PRIORITY_NORMAL
@@ -0,0 +1,376 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from app_logging import SampledLog
+from job_metrics import STAGE_RETRY_WAIT, STAGE_SEND
+from retry_policy import SERVER_ERROR_STATUSES, RetryPolicy
+
+# Количество строк в одном пакете по умолчанию
+DEFAULT_BATCH_SIZE = 500
+
+# Количество одновременных запросов по умолчанию при параллельной загрузке
+DEFAULT_MAX_IN_FLIGHT = 8
+
+# Ответы, по которым считаем, что сервер не поддерживает пакетную загрузку
+BATCH_UNSUPPORTED_STATUSES = (404, 405, 501)
+
+# Ключ идемпотентности строки: поле в теле строки и заголовок построчного запроса.
+# Сервер не сохраняет строку с уже известным ключом повторно и отвечает "duplicate": true.
+IDEMPOTENCY_FIELD = 'Idempotency_Key'
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class BatchNotSupportedError(Exception):
+    """Сервер не поддерживает пакетный эндпоинт."""
+
+
+class UploadCancelled(Exception):
+    """Загрузка прервана по событию отмены."""
+
+
+def pause(cancel_event, seconds, metrics=None):
+    """Ждет перед повтором; прерывает загрузку, если во время ожидания пришла отмена."""
+    if metrics is not None:
+        metrics.record_retry(seconds)
+    if cancel_event.wait(seconds):
+        raise UploadCancelled()
+
+
+def guarded_post(client, path, cancel_event, on_event=None, metrics=None, **kwargs):
+    """
+    Выполняет POST через автоматический выключатель клиента: ждет, пока
+    выключатель разомкнут, и отмечает в нем результат запроса.
+    Задержка запроса и ожидание выключателя записываются в metrics (JobMetrics).
+    """
+    return guarded_request(client, client.post, path, cancel_event, on_event, metrics, **kwargs)
+
+
+def guarded_get(client, path, cancel_event, on_event=None, metrics=None, **kwargs):
+    """GET через автоматический выключатель клиента, как guarded_post."""
+    return guarded_request(client, client.get, path, cancel_event, on_event, metrics, **kwargs)
+
+
+def guarded_request(client, send, path, cancel_event, on_event=None, metrics=None, **kwargs):
+    waiting = time.perf_counter()
+    if not client.breaker.wait_until_allowed(cancel_event, on_event):
+        raise UploadCancelled()
+    started = time.perf_counter()
+    if metrics is not None:
+        metrics.add_stage_time(STAGE_RETRY_WAIT, started - waiting)
+    try:
+        response = send(path, **kwargs)
+    except requests.exceptions.RequestException:
+        client.breaker.record_failure()
+        if metrics is not None:
+            metrics.record_request(time.perf_counter() - started, failed=True)
+        raise
+    except BaseException:
+        # Запрос не дошел до сервера (например, ValueError при сериализации тела):
+        # это не сбой сервера, но место пробного запроса нужно освободить
+        client.breaker.release_probe()
+        raise
+    if metrics is not None:
+        metrics.record_request(time.perf_counter() - started, failed=response.status_code >= 400)
+    if response.status_code in SERVER_ERROR_STATUSES:
+        client.breaker.record_failure()
+    else:
+        client.breaker.record_success()
+    return response
+
+
+def batch_path_for(path):
+    """Возвращает путь пакетного эндпоинта для построчного пути загрузки."""
+    return path.rstrip('/') + '/batch'
+
+
+def send_row(client, path, payload, index, total, timeout=75, policy=None, budget=None, cancel_event=None,
+             on_event=None, metrics=None):
+    """
+    Отправляет одну строку на сервер с повторами по политике policy.
+    Бросает RetryBudgetExceeded, если попытки или время на строку исчерпаны.
+    """
+    policy = policy or RetryPolicy()
+    cancel_event = cancel_event or threading.Event()
+    retry = policy.start_row(budget)
+    headers = {IDEMPOTENCY_HEADER: payload[IDEMPOTENCY_FIELD]} if IDEMPOTENCY_FIELD in payload else None
+    while True:
+        if cancel_event.is_set():
+            raise UploadCancelled()
+        try:
+            response = guarded_post(client, path, cancel_event, on_event, metrics, json=payload, headers=headers,
+                                    timeout=timeout)
+            if response.status_code == 200:
+                if retry.attempt and is_duplicate(response):
+                    logging.info('Строка %d/%d уже была сохранена сервером до повтора.', index + 1, total)
+                return
+            logging.error('Ошибка при загрузке строки %d/%d: %s %s', index + 1, total, response.text, payload)
+        except requests.exceptions.RequestException as e:
+            logging.error('Ошибка сети при загрузке строки %d/%d: %s', index + 1, total, e)
+
+        delay = retry.next_delay(f'Строка {index + 1}')
+        if on_event:
+            on_event(f"Повтор строки {index + 1} через {delay:.1f} с (попытка {retry.attempt + 1})")
+        pause(cancel_event, delay, metrics)
+
+
+def is_duplicate(response):
+    """Сервер ответил, что строка с этим ключом идемпотентности уже сохранена."""
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and bool(body.get('duplicate'))
+
+
+def iter_chunks(items, size):
+    """Разбивает список на пакеты, возвращая (смещение первого элемента, пакет)."""
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+class RowUploader:
+    """
+    Отправляет строки задания на сервер пакетами, а при отсутствии
+    поддержки пакетов на сервере - построчно.
+
+    Контракт пакетного эндпоинта (<path>/batch):
+    - запрос: POST {"rows": [payload, ...]}
+    - ответ 200: {"results": [{"index": 0, "success": true},
+                              {"index": 1, "success": false, "error": "..."}]},
+      где index - позиция строки внутри отправленного пакета, а "duplicate": true
+      означает, что строка с тем же ключом идемпотентности уже была сохранена;
+    - ответ 404/405/501 - пакеты не поддерживаются.
+    Отклоненные строки и пакеты повторяются по политике повторов.
+    Задержки запросов, повторы и подтвержденные строки записываются в metrics (JobMetrics).
+    """
+
+    def __init__(self, client, path, batch_size=DEFAULT_BATCH_SIZE, timeout=75, retry_policy=None, metrics=None):
+        self.client = client
+        self.path = path
+        self.batch_path = batch_path_for(path)
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.batch_supported = batch_size > 1
+        self.metrics = metrics
+        self.row_log = SampledLog()
+
+    def upload(self, payloads, on_progress=None, cancel_event=None, on_rows_acked=None, on_event=None):
+        """
+        Отправляет все строки и вызывает on_progress(загружено, всего)
+        после каждого ответа сервера с подтвержденными строками, а
+        on_rows_acked(индексы) - с индексами строк, подтвержденных этим
+        ответом (до on_progress). О повторах и паузах сообщает через
+        on_event(текст). При установке cancel_event загрузка прерывается
+        исключением UploadCancelled.
+        """
+        total = len(payloads)
+        done = 0
+        self.cancel_event = cancel_event or threading.Event()
+        self.on_event = on_event
+        self.budget = self.retry_policy.start_upload()
+
+        def rows_done(indices):
+            nonlocal done
+            if not indices:
+                return
+            if on_rows_acked:
+                on_rows_acked(indices)
+            done += len(indices)
+            if self.metrics is not None:
+                self.metrics.add_rows(len(indices))
+            if on_progress:
+                on_progress(done, total)
+
+        if self.metrics is None:
+            self._upload(payloads, total, rows_done)
+        else:
+            with self.metrics.stage(STAGE_SEND):
+                self._upload(payloads, total, rows_done)
+
+    def _upload(self, payloads, total, rows_done):
+        for start, chunk in iter_chunks(payloads, max(self.batch_size, 1)):
+            pending = list(range(len(chunk)))
+            if self.batch_supported:
+                pending = self._upload_chunk(start, chunk, total, rows_done)
+
+            # Построчная отправка: сервер без пакетов или остаток пакета после отката
+            for position in pending:
+                if self.cancel_event.is_set():
+                    raise UploadCancelled()
+                self._send_row(start + position, chunk[position], total)
+                rows_done([start + position])
+
+    def _upload_chunk(self, start, chunk, total, rows_done):
+        """Отправляет пакет до подтверждения всех строк. Возвращает строки, которые нужно отправить построчно."""
+        pending = list(range(len(chunk)))
+        retry = self.retry_policy.start_row(self.budget)
+        label = f'Пакет строк {start + 1}-{start + len(chunk)}'
+        while pending:
+            if self.cancel_event.is_set():
+                raise UploadCancelled()
+            try:
+                results = self._send_batch([chunk[position] for position in pending])
+            except BatchNotSupportedError:
+                logging.warning('Сервер не поддерживает пакетную загрузку, переходим на построчную отправку.')
+                self.batch_supported = False
+                return pending
+            except requests.exceptions.RequestException as e:
+                logging.error(f'Ошибка при загрузке строк {start + pending[0] + 1}-{start + pending[-1] + 1}: {e}')
+                self._retry_pause(retry, label)
+                continue
+
+            acked = []
+            rejected = []
+            duplicates = 0
+            for batch_index, position in enumerate(pending):
+                result = results.get(batch_index)
+                if result and result.get('success'):
+                    duplicates += bool(result.get('duplicate'))
+                    acked.append(start + position)
+                    continue
+                error = result.get('error') if result else 'нет результата в ответе сервера'
+                logging.error(f'Ошибка при загрузке строки {start + position + 1}/{total}: {error}')
+                rejected.append(position)
+            rows_done(acked)
+
+            logging.info('%s: загружено %d, отклонено %d, уже были на сервере %d.',
+                         label, len(pending) - len(rejected), len(rejected), duplicates)
+            if rejected:
+                self._retry_pause(retry, label)
+            pending = rejected
+        return []
+
+    def _retry_pause(self, retry, label):
+        delay = retry.next_delay(label)
+        if self.on_event:
+            self.on_event(f"{label}: повтор через {delay:.1f} с (попытка {retry.attempt + 1})")
+        pause(self.cancel_event, delay, self.metrics)
+
+    def _send_batch(self, rows):
+        """Отправляет пакет строк и возвращает результаты по позициям внутри пакета."""
+        response = guarded_post(self.client, self.batch_path, self.cancel_event, self.on_event, self.metrics,
+                                json={'rows': rows}, compress=True, timeout=self.timeout)
+        if response.status_code in BATCH_UNSUPPORTED_STATUSES:
+            raise BatchNotSupportedError(response.status_code)
+        response.raise_for_status()
+
+        try:
+            results = response.json().get('results')
+        except ValueError:
+            results = None
+        if not isinstance(results, list):
+            # Эндпоинт есть, но не возвращает построчные результаты - подтвердить строки нечем
+            raise BatchNotSupportedError('ответ без построчных результатов')
+        return {result.get('index'): result for result in results if isinstance(result, dict)}
+
+    def _send_row(self, index, payload, total):
+        """Отправляет одну строку с повторами по политике."""
+        send_row(self.client, self.path, payload, index, total, timeout=self.timeout, policy=self.retry_policy,
+                 budget=self.budget, cancel_event=self.cancel_event, on_event=self.on_event,
+                 metrics=self.metrics)
+        self.row_log.log(logging.INFO, 'Строка %d/%d успешно загружена: %s', index + 1, total, payload)
+
+
+class ConcurrentUploader:
+    """
+    Отправляет строки построчно несколькими параллельными запросами.
+
+    Одновременно в работе не больше max_in_flight строк. Каждая строка
+    отправляется ровно одной задачей и подтверждается один раз, а прогресс
+    и журнал успешных загрузок идут строго в порядке строк файла.
+    Задержки запросов, повторы и подтвержденные строки записываются в metrics (JobMetrics).
+    """
+
+    def __init__(self, client, path, max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=75, retry_policy=None,
+                 metrics=None):
+        self.client = client
+        self.path = path
+        self.max_in_flight = max(max_in_flight, 1)
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.metrics = metrics
+        self.row_log = SampledLog()
+
+    def upload(self, payloads, on_progress=None, cancel_event=None, on_rows_acked=None, on_event=None):
+        """
+        Отправляет все строки и вызывает on_progress(загружено, всего)
+        по мере подтверждения непрерывного начала файла, а on_rows_acked(индексы) -
+        сразу после подтверждения строк сервером (строки, ответы на которые
+        пришли вместе, передаются одним списком). О повторах и паузах
+        сообщает через on_event(текст). При установке cancel_event новые
+        строки не отправляются, а загрузка прерывается исключением UploadCancelled.
+        """
+        if self.metrics is None:
+            return self._upload(payloads, on_progress, cancel_event, on_rows_acked, on_event)
+        with self.metrics.stage(STAGE_SEND):
+            return self._upload(payloads, on_progress, cancel_event, on_rows_acked, on_event)
+
+    def _upload(self, payloads, on_progress, cancel_event, on_rows_acked, on_event):
+        cancel_event = cancel_event or threading.Event()
+        # Внутренняя остановка: отмена пользователем или ошибка одной из строк
+        stop_event = threading.Event()
+        budget = self.retry_policy.start_upload()
+        total = len(payloads)
+        acknowledged = [False] * total
+        reported = 0
+        rows = iter(enumerate(payloads))
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            in_flight = {}
+
+            def submit_next():
+                if stop_event.is_set():
+                    return
+                for index, payload in rows:
+                    future = executor.submit(send_row, self.client, self.path, payload, index, total,
+                                             self.timeout, self.retry_policy, budget, stop_event, on_event,
+                                             self.metrics)
+                    in_flight[future] = index
+                    if len(in_flight) >= self.max_in_flight:
+                        return
+
+            submit_next()
+            while in_flight:
+                if cancel_event.is_set():
+                    stop_event.set()
+                finished, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                acked = []
+                error = None
+                for future in finished:
+                    index = in_flight.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        # Остальные строки не ждут своих повторов, а сразу останавливаются
+                        stop_event.set()
+                        error = error or e
+                        continue
+                    if acknowledged[index]:
+                        raise RuntimeError(f'Строка {index + 1} подтверждена повторно')
+                    acknowledged[index] = True
+                    acked.append(index)
+                # Строки, подтвержденные вместе с упавшей, тоже записываются в журнал
+                if acked:
+                    if self.metrics is not None:
+                        self.metrics.add_rows(len(acked))
+                    if on_rows_acked:
+                        on_rows_acked(acked)
+                if error is not None:
+                    raise error
+
+                while reported < total and acknowledged[reported]:
+                    self.row_log.log(logging.INFO, '✅ %d/%d - Успешно загружено: %s',
+                                     reported + 1, total, payloads[reported])
+                    reported += 1
+                    if on_progress:
+                        on_progress(reported, total)
+
+                submit_next()
+
+        if reported < total:
+            raise UploadCancelled()
@@ -0,0 +1,168 @@
+"""
+Журнал загрузки строк для продолжения после сбоя.
+
+Для каждой пары (хеш файла, Nazvanie_Zadaniya) журнал хранит индексы строк,
+которые сервер уже подтвердил. Если загрузка прервалась из-за падения
+приложения, сна ноутбука или закрытия exe, повторная загрузка того же файла
+отправляет только неподтвержденные строки. Строки, подтвержденные одним
+ответом сервера (пакет или одновременно завершенные запросы), записываются
+одной транзакцией сразу после ответа, поэтому после аварийного завершения
+повторно отправляются только строки, ответ на которые еще не был получен.
+
+Каждая отправляемая строка получает ключ идемпотентности из хеша файла,
+номера строки и ее содержимого. Если сервер сохранил строку, но ответ не
+дошел до клиента, повтор с тем же ключом сервер не сохраняет второй раз.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app_paths import app_data_dir
+from upload_engine import IDEMPOTENCY_FIELD, UploadCancelled
+
+JOURNAL_FILE_NAME = 'upload_journal.sqlite3'
+
+
+def file_hash(file_path, block_size=1024 * 1024):
+    """SHA-256 содержимого файла."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def idempotency_key(key, row_index, payload):
+    """Ключ строки: хеш файла, номер строки в файле и содержимое строки."""
+    content = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.blake2b(f'{key}:{row_index}:{content}'.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class UploadJournal:
+    """Журнал подтвержденных строк в SQLite (потокобезопасный)."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(app_data_dir(), JOURNAL_FILE_NAME)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=FULL')
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                file_hash TEXT NOT NULL,
+                task_name TEXT NOT NULL,
+                total_rows INTEGER NOT NULL,
+                started_at REAL NOT NULL,
+                PRIMARY KEY (file_hash, task_name)
+            );
+            CREATE TABLE IF NOT EXISTS acked_rows (
+                file_hash TEXT NOT NULL,
+                task_name TEXT NOT NULL,
+                row_index INTEGER NOT NULL,
+                PRIMARY KEY (file_hash, task_name, row_index)
+            ) WITHOUT ROWID;
+        """)
+        self.connection.commit()
+
+    def begin(self, key, task_name, total_rows):
+        """Регистрирует загрузку и возвращает множество уже подтвержденных строк."""
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR IGNORE INTO uploads (file_hash, task_name, total_rows, started_at) VALUES (?, ?, ?, ?)',
+                (key, task_name, total_rows, time.time()))
+            self.connection.commit()
+            rows = self.connection.execute(
+                'SELECT row_index FROM acked_rows WHERE file_hash = ? AND task_name = ?', (key, task_name))
+            return {row_index for row_index, in rows}
+
+    def acknowledge(self, key, task_name, row_indices):
+        """Отмечает строки, подтвержденные одним ответом сервера; запись на диске - до возврата."""
+        with self.lock:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO acked_rows (file_hash, task_name, row_index) VALUES (?, ?, ?)',
+                [(key, task_name, row_index) for row_index in row_indices])
+            self.connection.commit()
+
+    def forget(self, key, task_name):
+        """Удаляет загрузку из журнала (после завершения или отмены)."""
+        with self.lock:
+            self.connection.execute('DELETE FROM acked_rows WHERE file_hash = ? AND task_name = ?', (key, task_name))
+            self.connection.execute('DELETE FROM uploads WHERE file_hash = ? AND task_name = ?', (key, task_name))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Возвращает общий журнал загрузок приложения."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = UploadJournal()
+        return _journal
+
+
+def resumable_upload_chunks(uploader, file_path, task_name, chunks, total=0, on_progress=None, cancel_event=None,
+                            on_status=None, journal=None):
+    """
+    Отправляет строки через uploader (RowUploader/ConcurrentUploader), пропуская
+    строки, подтвержденные в прошлых попытках загрузки этого же файла. Строки
+    приходят кусками (списками payload) по мере чтения файла: первый кусок
+    отправляется, пока читаются следующие. total - ожидаемое число строк для
+    прогресса (0 - неизвестно).
+
+    При успешном завершении или отмене пользователем запись журнала удаляется;
+    при любой другой ошибке остается, и следующая загрузка файла продолжится.
+    """
+    journal = journal or get_journal()
+    key = file_hash(file_path)
+
+    acked = journal.begin(key, task_name, total)
+    if acked:
+        first = next((index for index in range(len(acked) + 1) if index not in acked), len(acked)) + 1
+        logging.info(f'Продолжение загрузки {task_name}: подтверждено {len(acked)} строк, '
+                     f'первая неподтвержденная строка {first}.')
+        if on_status:
+            on_status(f"Продолжение загрузки со строки {first}...")
+        if on_progress:
+            on_progress(len(acked), max(total, len(acked)))
+
+    offset = 0  # индекс первой строки куска в файле
+    uploaded = len(acked)
+    try:
+        for chunk in chunks:
+            start = offset
+            offset += len(chunk)
+            pending_indices = [index for index in range(start, offset) if index not in acked]
+            expected = max(total, offset)
+
+            def progress(done, _, base=uploaded, expected=expected):
+                if on_progress:
+                    on_progress(base + done, max(expected, base + done))
+
+            def rows_acked(positions, pending_indices=pending_indices):
+                journal.acknowledge(key, task_name, [pending_indices[position] for position in positions])
+
+            rows = []
+            for index in pending_indices:
+                payload = chunk[index - start]
+                payload.pop(IDEMPOTENCY_FIELD, None)
+                payload[IDEMPOTENCY_FIELD] = idempotency_key(key, index, payload)
+                rows.append(payload)
+            uploader.upload(rows, on_progress=progress, cancel_event=cancel_event, on_event=on_status,
+                            on_rows_acked=rows_acked)
+            uploaded += len(pending_indices)
+    except UploadCancelled:
+        journal.forget(key, task_name)
+        raise
+
+    journal.forget(key, task_name)
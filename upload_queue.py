@@ -0,0 +1,409 @@
+"""
+Очередь загрузки нескольких файлов заданий.
+
+Файлы добавляются в очередь пачкой и загружаются по нескольку одновременно
+(не больше max_running). Первыми запускаются срочные задания: срочным
+считается файл, в котором заполнен столбец «Индекс за срочность» хотя бы
+в одной из первых PRIORITY_SAMPLE_ROWS строк (файл целиком при этом не
+разбирается - его прочитает и проверит сама загрузка); приоритет можно
+изменить вручную, пока загрузка не началась.
+
+У каждой загрузки свой прогресс и скорость, внизу - общая скорость по всем
+заданиям. Загрузку можно поставить на паузу (она останавливается после
+ближайшей подтвержденной строки и держит свое место в очереди) или отменить;
+строки отмененной загрузки удаляются с сервера, как при отмене в окне загрузки.
+
+Загрузка на паузе держит поток общего пула заданий, поэтому одновременных
+загрузок не больше MAX_RUNNING_LIMIT: хотя бы один поток пула всегда остается
+для проверки приоритета новых файлов и заданий других окон.
+"""
+import logging
+import os
+import time
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QAbstractItemView, QComboBox, QFileDialog, QHBoxLayout, QHeaderView, QLabel, \
+    QMessageBox, QProgressBar, QPushButton, QSpinBox, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+
+from column_schema import TASK_SCHEMA
+from excel_reader import ExcelReader
+from job_base import JobError
+from job_metrics import RateMeter, format_rate
+from jobs import MAX_CONCURRENT_JOBS
+from payload_builder import clean_nulls
+from task_jobs import delete_uploaded_data, task_prefix
+
+# Приоритеты: больший запускается раньше
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_URGENT = 2
+PRIORITY_TITLES = ['Низкий', 'Обычный', 'Срочно']
+
+# Столбец, заполненный у срочных заданий
+URGENT_TITLE = TASK_SCHEMA.by_key['Indeks_za_srochnost_koeff_1_5'].title
+
+# Сколько первых строк файла просматривается при определении приоритета
+PRIORITY_SAMPLE_ROWS = 1000
+
+# Загрузок одновременно по умолчанию (остальные места пула - для других окон)
+DEFAULT_MAX_RUNNING = 2
+
+# Наибольшее число одновременных загрузок: загрузка на паузе держит поток пула,
+# и один поток остается свободным для проверки новых файлов и других заданий
+MAX_RUNNING_LIMIT = max(MAX_CONCURRENT_JOBS - 1, 1)
+
+# Сколько секунд очередь ждет проверки приоритета добавленных файлов, прежде чем
+# запускать загрузки без нее (файл с незавершенной проверкой запустится после)
+CHECK_WAIT_SECONDS = 5
+
+# Скорость и итоговая строка обновляются раз в REFRESH_INTERVAL_MS миллисекунд
+REFRESH_INTERVAL_MS = 1000
+
+STATE_CHECKING = 'Проверка приоритета'
+STATE_QUEUED = 'В очереди'
+STATE_HELD = 'Отложено'
+STATE_RUNNING = 'Загружается'
+STATE_PAUSED = 'Пауза'
+STATE_CANCELLING = 'Отмена...'
+STATE_DONE = 'Готово'
+STATE_FAILED = 'Ошибка'
+STATE_CANCELLED = 'Отменено'
+
+ACTIVE_STATES = (STATE_RUNNING, STATE_PAUSED, STATE_CANCELLING)
+FINISHED_STATES = (STATE_DONE, STATE_FAILED, STATE_CANCELLED)
+
+COLUMN_FILE, COLUMN_PRIORITY, COLUMN_STATE, COLUMN_PROGRESS, COLUMN_RATE = range(5)
+COLUMN_TITLES = ['Файл', 'Приоритет', 'Статус', 'Прогресс', 'Скорость']
+
+
+def detect_priority(job, file_path):
+    """
+    Приоритет файла задания: срочно, если в первых PRIORITY_SAMPLE_ROWS строках заполнен
+    столбец «Индекс за срочность» (выполняется в задании).
+    """
+    # calamine разбирает лист целиком при открытии, openpyxl в режиме read_only - только прочитанные строки
+    with ExcelReader(file_path, chunk_rows=PRIORITY_SAMPLE_ROWS, engine='openpyxl') as reader:
+        chunk = next(reader.iter_chunks(), None)
+    if chunk is None or URGENT_TITLE not in chunk.columns:
+        return PRIORITY_NORMAL
+    if clean_nulls(chunk[[URGENT_TITLE]])[URGENT_TITLE].notna().any():
+        return PRIORITY_URGENT
+    return PRIORITY_NORMAL
+
+
+def run_cleanup(job, cleanup):
+    """Удаляет строки отмененной загрузки (выполняется в задании)."""
+    cleanup()
+
+
+class QueueEntry:
+    """Файл в очереди: задание загрузки, приоритет, состояние и прогресс."""
+
+    def __init__(self, seq, file_path, task, cleanup):
+        self.seq = seq
+        self.file_path = file_path
+        self.file_name = os.path.basename(file_path)
+        # (fn, *args) задания загрузки и действие после отмены (или None)
+        self.task = task
+        self.cleanup = cleanup
+        self.priority = PRIORITY_NORMAL
+        self.state = STATE_CHECKING
+        self.added_at = time.monotonic()
+        self.job = None
+        self.done = 0
+        self.total = 0
+        self.rate_meter = RateMeter()
+        self.priority_combo = None
+        self.progress_bar = None
+
+
+class UploadQueuePanel(QWidget):
+    """
+    Окно очереди загрузки.
+
+    make_task(file_path) возвращает функцию задания и ее аргументы (fn, *args)
+    и вызывается при добавлении файла; JobError - файл не добавляется, текст
+    показывается пользователю. make_cleanup(file_path) возвращает действие,
+    удаляющее строки отмененной загрузки с сервера.
+    """
+
+    def __init__(self, parent, jobs, make_task, make_cleanup=None, max_running=DEFAULT_MAX_RUNNING,
+                 title="Очередь загрузки"):
+        super().__init__(parent, Qt.Window)
+        self.jobs = jobs
+        self.make_task = make_task
+        self.make_cleanup = make_cleanup
+        self.entries = []
+        self.next_seq = 0
+
+        self.setWindowTitle(title)
+        self.setGeometry(150, 150, 900, 450)
+        self.init_ui(max_running)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.on_timer)
+        self.timer.start(REFRESH_INTERVAL_MS)
+
+    def init_ui(self, max_running):
+        layout = QVBoxLayout()
+
+        buttons = QHBoxLayout()
+        self.add_button = QPushButton("Добавить файлы")
+        self.add_button.clicked.connect(self.choose_files)
+        self.pause_button = QPushButton("Пауза / Продолжить")
+        self.pause_button.clicked.connect(self.toggle_pause_selected)
+        self.cancel_button = QPushButton("Отменить")
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        self.clear_button = QPushButton("Убрать завершенные")
+        self.clear_button.clicked.connect(self.remove_finished)
+        for button in (self.add_button, self.pause_button, self.cancel_button, self.clear_button):
+            buttons.addWidget(button)
+        buttons.addStretch(1)
+        buttons.addWidget(QLabel("Одновременно:"))
+        self.max_running_spin = QSpinBox()
+        self.max_running_spin.setRange(1, MAX_RUNNING_LIMIT)
+        self.max_running_spin.setValue(min(max_running, MAX_RUNNING_LIMIT))
+        self.max_running_spin.valueChanged.connect(self.schedule)
+        buttons.addWidget(self.max_running_spin)
+        layout.addLayout(buttons)
+
+        self.table = QTableWidget(0, len(COLUMN_TITLES))
+        self.table.setHorizontalHeaderLabels(COLUMN_TITLES)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(COLUMN_FILE, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        self.total_label = QLabel("")
+        layout.addWidget(self.total_label)
+        self.setLayout(layout)
+        self.refresh_rates()
+
+    @property
+    def max_running(self):
+        return self.max_running_spin.value()
+
+    # Добавление файлов
+
+    def choose_files(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Выберите файлы заданий", "", "Excel файлы (*.xlsx)")
+        if file_paths:
+            self.add_files(file_paths)
+
+    def add_files(self, file_paths):
+        """Добавляет файлы в очередь; для каждого в фоне определяется приоритет."""
+        skipped = []
+        for file_path in file_paths:
+            file_name = os.path.basename(file_path)
+            # Имя файла - название задания на сервере: второй такой файл не добавляется, пока не завершен первый
+            if any(entry.file_name == file_name and entry.state not in FINISHED_STATES for entry in self.entries):
+                skipped.append(f"{file_name}: уже в очереди")
+                continue
+            try:
+                task = self.make_task(file_path)
+            except JobError as e:
+                skipped.append(f"{file_name}: {e}")
+                continue
+            cleanup = self.make_cleanup(file_path) if self.make_cleanup else None
+            entry = QueueEntry(self.next_seq, file_path, task, cleanup)
+            self.next_seq += 1
+            self.entries.append(entry)
+            self.add_row(entry)
+            entry.job = self.jobs.submit(detect_priority, file_path,
+                                         on_finished=lambda priority, entry=entry: self.on_checked(entry, priority),
+                                         on_failed=lambda message, entry=entry: self.on_check_failed(entry, message),
+                                         on_cancelled=lambda entry=entry: self.set_state(entry, STATE_CANCELLED))
+        if skipped:
+            QMessageBox.warning(self, "Предупреждение", "Не добавлены:\n" + "\n".join(skipped))
+        self.refresh_rates()
+
+    def add_row(self, entry):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        item = QTableWidgetItem(entry.file_name)
+        item.setToolTip(entry.file_path)
+        self.table.setItem(row, COLUMN_FILE, item)
+
+        entry.priority_combo = QComboBox()
+        entry.priority_combo.addItems(PRIORITY_TITLES)
+        entry.priority_combo.setCurrentIndex(entry.priority)
+        entry.priority_combo.setEnabled(False)  # до проверки файла
+        entry.priority_combo.currentIndexChanged.connect(
+            lambda priority, entry=entry: self.change_priority(entry, priority))
+        self.table.setCellWidget(row, COLUMN_PRIORITY, entry.priority_combo)
+
+        self.table.setItem(row, COLUMN_STATE, QTableWidgetItem(entry.state))
+        entry.progress_bar = QProgressBar()
+        entry.progress_bar.setMaximum(0)  # пока размер неизвестен - бегущая полоса
+        self.table.setCellWidget(row, COLUMN_PROGRESS, entry.progress_bar)
+        self.table.setItem(row, COLUMN_RATE, QTableWidgetItem(""))
+
+    def on_checked(self, entry, priority):
+        entry.job = None
+        entry.priority = priority
+        entry.priority_combo.setCurrentIndex(priority)
+        entry.priority_combo.setEnabled(True)
+        entry.progress_bar.setMaximum(100)
+        self.set_state(entry, STATE_QUEUED)
+        self.schedule()
+
+    def on_check_failed(self, entry, message):
+        # Ошибку чтения файла покажет сама загрузка, с полным отчетом проверки
+        logging.warning(f"Не удалось определить приоритет {entry.file_name}: {message}")
+        self.on_checked(entry, PRIORITY_NORMAL)
+
+    def change_priority(self, entry, priority):
+        entry.priority = priority
+        self.schedule()
+
+    # Планирование
+
+    def schedule(self):
+        """
+        Запускает задания из очереди в порядке приоритета, пока есть свободные места.
+        Пока проверяются добавленные файлы, новые загрузки не запускаются: срочный
+        файл из той же пачки не должен пропустить вперед обычные. Дольше
+        CHECK_WAIT_SECONDS проверка очередь не держит.
+        """
+        free = self.max_running - sum(entry.state in ACTIVE_STATES for entry in self.entries)
+        if free <= 0 or self.waiting_for_checks():
+            return
+        queued = sorted((entry for entry in self.entries if entry.state == STATE_QUEUED),
+                        key=lambda entry: (-entry.priority, entry.seq))
+        for entry in queued[:free]:
+            self.start(entry)
+
+    def waiting_for_checks(self):
+        deadline = time.monotonic() - CHECK_WAIT_SECONDS
+        return any(entry.state == STATE_CHECKING and entry.added_at > deadline for entry in self.entries)
+
+    def on_timer(self):
+        # Срок ожидания проверки мог истечь: очередь запускается без нее
+        if any(entry.state == STATE_CHECKING for entry in self.entries):
+            self.schedule()
+        self.refresh_rates()
+
+    def start(self, entry):
+        logging.info(f"Очередь загрузки: запуск {entry.file_name} (приоритет {PRIORITY_TITLES[entry.priority]})")
+        entry.priority_combo.setEnabled(False)
+        self.set_state(entry, STATE_RUNNING)
+        fn, *args = entry.task
+        entry.job = self.jobs.submit(fn, *args,
+                                     on_progress=lambda done, total, entry=entry: self.on_progress(entry, done, total),
+                                     on_finished=lambda _, entry=entry: self.on_finished(entry),
+                                     on_failed=lambda message, entry=entry: self.on_failed(entry, message),
+                                     on_cancelled=lambda entry=entry: self.on_cancelled(entry))
+
+    def on_progress(self, entry, done, total):
+        entry.done, entry.total = done, total
+        if total and total != entry.progress_bar.maximum():
+            entry.progress_bar.setMaximum(total)
+        entry.progress_bar.setValue(done)
+        entry.rate_meter.add(done)
+
+    def on_finished(self, entry):
+        entry.job = None
+        entry.progress_bar.setValue(entry.progress_bar.maximum())
+        self.set_state(entry, STATE_DONE)
+        self.schedule()
+
+    def on_failed(self, entry, message):
+        entry.job = None
+        self.set_state(entry, STATE_FAILED, message)
+        self.schedule()
+
+    def on_cancelled(self, entry):
+        entry.job = None
+        if entry.cleanup is None:
+            self.set_state(entry, STATE_CANCELLED)
+        else:
+            self.set_state(entry, STATE_CANCELLING, "Удаление загруженных строк...")
+            self.jobs.submit(run_cleanup, entry.cleanup,
+                             on_finished=lambda _, entry=entry: self.set_state(entry, STATE_CANCELLED),
+                             on_failed=lambda message, entry=entry: self.on_cleanup_failed(entry, message))
+        self.schedule()
+
+    def on_cleanup_failed(self, entry, message):
+        logging.error(f"Не удалось удалить загруженные строки {entry.file_name}: {message}")
+        self.set_state(entry, STATE_CANCELLED, f"Строки не удалены с сервера: {message}")
+
+    # Действия пользователя
+
+    def selected_entries(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.entries[row] for row in rows]
+
+    def toggle_pause_selected(self):
+        """Пауза для загружаемых и ожидающих заданий, продолжение - для остановленных."""
+        for entry in self.selected_entries():
+            if entry.state == STATE_RUNNING:
+                entry.job.pause()
+                self.set_state(entry, STATE_PAUSED)
+            elif entry.state == STATE_PAUSED:
+                entry.job.resume()
+                self.set_state(entry, STATE_RUNNING)
+            elif entry.state == STATE_QUEUED:
+                self.set_state(entry, STATE_HELD)
+            elif entry.state == STATE_HELD:
+                self.set_state(entry, STATE_QUEUED)
+        self.schedule()
+
+    def cancel_selected(self):
+        for entry in self.selected_entries():
+            if entry.state in (STATE_CHECKING, STATE_RUNNING, STATE_PAUSED):
+                entry.job.cancel()
+                if entry.state != STATE_CHECKING:
+                    self.set_state(entry, STATE_CANCELLING)
+            elif entry.state in (STATE_QUEUED, STATE_HELD):
+                self.set_state(entry, STATE_CANCELLED)
+        self.schedule()
+
+    def remove_finished(self):
+        for row in reversed(range(len(self.entries))):
+            if self.entries[row].state in FINISHED_STATES:
+                del self.entries[row]
+                self.table.removeRow(row)
+        self.refresh_rates()
+
+    # Отображение
+
+    def set_state(self, entry, state, details=""):
+        entry.state = state
+        row = self.entries.index(entry)
+        item = self.table.item(row, COLUMN_STATE)
+        item.setText(state)
+        item.setToolTip(details)
+        if state in FINISHED_STATES or state == STATE_PAUSED:
+            self.table.item(row, COLUMN_RATE).setText("")
+        self.refresh_rates()
+
+    def refresh_rates(self):
+        """Скорость каждой загрузки и итог по очереди."""
+        total_rate = 0.0
+        for row, entry in enumerate(self.entries):
+            if entry.state != STATE_RUNNING:
+                continue
+            rate = entry.rate_meter.rate()
+            if rate:
+                total_rate += rate
+                self.table.item(row, COLUMN_RATE).setText(format_rate(rate, entry.total - entry.done))
+
+        counts = {}
+        for entry in self.entries:
+            counts[entry.state] = counts.get(entry.state, 0) + 1
+        waiting = counts.get(STATE_QUEUED, 0) + counts.get(STATE_HELD, 0) + counts.get(STATE_CHECKING, 0)
+        self.total_label.setText(
+            f"Всего: {format_rate(total_rate)} · загружается {counts.get(STATE_RUNNING, 0)}, "
+            f"на паузе {counts.get(STATE_PAUSED, 0)}, в очереди {waiting}, готово {counts.get(STATE_DONE, 0)}, "
+            f"ошибок {counts.get(STATE_FAILED, 0)}")
+
+    def active_count(self):
+        """Количество незавершенных файлов в очереди."""
+        return sum(entry.state not in FINISHED_STATES for entry in self.entries)
+
+
+def delete_uploaded_file(api, file_path):
+    """Действие после отмены загрузки файла: удаление его строк с сервера."""
+    file_name = os.path.basename(file_path)
+    return lambda: delete_uploaded_data(api, task_prefix(file_name), file_name)
@@ -0,0 +1,277 @@
+"""
+Проверка файла задания целиком до отправки первой строки на сервер.
+
+Правила берутся из описания столбцов (column_schema): обязательные столбцы
+и значения, формат артикулов, штрих-кодов, дат и количеств, а для значений,
+которые уходят на сервер как есть, - допустимость в JSON (NaN и inf сервер
+не принимает). Каждое правило вычисляется один раз на уникальное значение
+столбца, поэтому проверка 100 тысяч строк занимает доли секунды. Все ошибки
+собираются в один отчет.
+"""
+import datetime
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from column_schema import ARTICLE_TYPE, BARCODE_TYPE, DATE_TYPE, INT_TYPE, NUMBER_TYPE, RAW
+from payload_builder import clean_nulls
+
+# Допустимые форматы текста в столбцах дат
+DATE_FORMATS = ('%d.%m.%Y', '%d.%m.%y')
+
+# Длина цифрового штрих-кода: от EAN-8 до SSCC-18
+BARCODE_DIGITS = (8, 18)
+
+# Штрих-код маркетплейса из букв и цифр (например, OZN123456789)
+BARCODE_CODE = re.compile(r'^[0-9A-Za-z\-]{4,40}$')
+
+# Число в экспоненциальной записи: Excel уже потерял последние цифры
+EXPONENT_NUMBER = re.compile(r'^\d+([.,]\d+)?[eE][+-]?\d+$')
+
+MAX_ARTICLE_LENGTH = 100
+
+# Сколько номеров строк показывать для одной ошибки
+MAX_ROWS_SHOWN = 10
+
+# Типы, которые всегда допустимы в JSON
+JSON_TYPES = (str, int, bool, type(None))
+
+BARCODE_LENGTH_MESSAGE = f'штрих-код должен содержать от {BARCODE_DIGITS[0]} до {BARCODE_DIGITS[1]} цифр'
+NEGATIVE_MESSAGE = 'количество не может быть отрицательным'
+DATE_MESSAGE = 'ожидается дата ДД.ММ.ГГГГ'
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def whole_number(value):
+    """Целое число из ячейки (int, float без дробной части или строка из цифр) либо None."""
+    if is_number(value):
+        if isinstance(value, float) and not value.is_integer():
+            return None
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+
+def json_problem(value):
+    """Значение, которое нельзя отправить как есть в JSON."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return 'число NaN или бесконечность не передается на сервер'
+    if isinstance(value, (datetime.date, datetime.time)):
+        return 'дата в формате Excel не передается на сервер, укажите ее текстом'
+    if value is not None and not isinstance(value, (str, int, float, bool)):
+        return f'значение типа {type(value).__name__} не передается на сервер'
+    return None
+
+
+def article_problem(value):
+    if isinstance(value, str):
+        text = value.strip()
+        if EXPONENT_NUMBER.match(text):
+            return 'артикул в экспоненциальной записи (цифры потеряны), задайте столбцу текстовый формат'
+        if len(text) > MAX_ARTICLE_LENGTH or any(char in text for char in '\t\r\n'):
+            return f'артикул длиннее {MAX_ARTICLE_LENGTH} символов или содержит перенос строки'
+        return None
+    if is_number(value):
+        return None if whole_number(value) is not None else 'артикул не целое число'
+    return 'артикул должен быть числом или текстом'
+
+
+def barcode_problem(value):
+    digits = whole_number(value)
+    if digits is not None:
+        if digits < 0 or not BARCODE_DIGITS[0] <= len(str(digits)) <= BARCODE_DIGITS[1]:
+            return BARCODE_LENGTH_MESSAGE
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if EXPONENT_NUMBER.match(text):
+            return 'штрих-код в экспоненциальной записи (цифры потеряны), задайте столбцу текстовый формат'
+        if BARCODE_CODE.match(text):
+            return None
+        return 'недопустимые символы в штрих-коде'
+    if is_number(value):
+        return 'штрих-код не целое число'
+    return 'штрих-код должен быть числом или текстом'
+
+
+def int_problem(value):
+    return None if whole_number(value) is not None else 'ожидается целое число'
+
+
+def number_problem(value):
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            return 'ожидается число'
+    if not is_number(value):
+        return 'ожидается число'
+    if not math.isfinite(value):
+        return 'ожидается конечное число'
+    if value < 0:
+        return NEGATIVE_MESSAGE
+    return None
+
+
+def date_problem(value):
+    if isinstance(value, str):
+        for date_format in DATE_FORMATS:
+            try:
+                datetime.datetime.strptime(value.strip(), date_format)
+                return None
+            except ValueError:
+                continue
+    return DATE_MESSAGE
+
+
+# Проверка формата по типу значения столбца
+FORMAT_CHECKS = {
+    ARTICLE_TYPE: article_problem,
+    BARCODE_TYPE: barcode_problem,
+    INT_TYPE: int_problem,
+    NUMBER_TYPE: number_problem,
+    DATE_TYPE: date_problem,
+}
+
+
+def column_check(column):
+    """Функция проверки одного значения столбца (сообщение об ошибке или None) либо None."""
+    format_check = FORMAT_CHECKS.get(column.dtype)
+    # Остальные способы преобразования отправляют значение строкой
+    check_json = column.kind == RAW
+    if format_check is None and not check_json:
+        return None
+
+    def check(value):
+        problem = format_check(value) if format_check else None
+        if problem is None and check_json and type(value) not in JSON_TYPES:
+            problem = json_problem(value)
+        return problem
+
+    return check
+
+
+def integer_problems(values, column):
+    """
+    Проверка уникальных значений столбца, в котором все значения - целые
+    числа (самый частый случай для артикулов и штрих-кодов), без обхода в Python.
+    """
+    problems = np.full(len(values), None, dtype=object)
+    if column.dtype == BARCODE_TYPE:
+        low, high = BARCODE_DIGITS
+        problems[(values < 10 ** (low - 1)) | (values >= 10 ** high)] = BARCODE_LENGTH_MESSAGE
+    elif column.dtype == NUMBER_TYPE:
+        problems[values < 0] = NEGATIVE_MESSAGE
+    elif column.dtype == DATE_TYPE:
+        problems[:] = DATE_MESSAGE
+    return problems
+
+
+def column_problems(values, column, check):
+    """Сообщение об ошибке для каждой строки столбца (None - ошибки нет)."""
+    codes, uniques = pd.factorize(values)
+    problems = None
+    if pd.api.types.infer_dtype(uniques, skipna=False) == 'integer':
+        try:
+            problems = integer_problems(np.asarray(uniques, dtype=np.int64), column)
+        except OverflowError:
+            pass
+    if problems is None:
+        problems = np.array([check(value) for value in uniques], dtype=object)
+    # код -1 у пустых значений указывает на добавленный в конец None
+    return np.append(problems, None)[codes]
+
+
+class ValidationReport:
+    """Отчет проверки: отсутствующие столбцы и номера строк Excel по каждой ошибке."""
+
+    def __init__(self):
+        self.missing_columns = []
+        self.problems = {}  # (заголовок столбца, сообщение) -> номера строк
+        self.rows_checked = 0
+
+    @property
+    def ok(self):
+        return not self.missing_columns and not self.problems
+
+    def add(self, title, message, rows):
+        self.problems.setdefault((title, message), []).extend(rows)
+
+    @property
+    def error_count(self):
+        return len(self.missing_columns) + sum(len(rows) for rows in self.problems.values())
+
+    def format(self, max_rows=MAX_ROWS_SHOWN):
+        """Текст отчета: по строке на каждую ошибку с первыми номерами строк (None - со всеми)."""
+        lines = []
+        if self.missing_columns:
+            lines.append(f"Нет обязательных столбцов: {', '.join(self.missing_columns)}")
+        for (title, message), rows in self.problems.items():
+            shown = ', '.join(str(row) for row in rows[:max_rows])
+            more = f' и еще {len(rows) - max_rows}' if max_rows is not None and len(rows) > max_rows else ''
+            lines.append(f"Столбец '{title}': {message} - строк {len(rows)} ({shown}{more})")
+        return '\n'.join(lines)
+
+
+def validate_chunk(chunk, columns, report):
+    """
+    Проверяет кусок таблицы (после clean_nulls) и дописывает ошибки в report.
+    Номера строк в отчете - индекс куска (номера строк листа из ExcelReader).
+    """
+    report.rows_checked += len(chunk)
+    for column in columns:
+        if column.title not in chunk.columns:
+            continue
+        values = chunk[column.title]
+        if isinstance(values, pd.DataFrame):
+            # Повторяющийся заголовок: на сервер уходит первый столбец
+            values = values.iloc[:, 0]
+
+        if not column.nullable:
+            empty = values.isna().to_numpy()
+            if empty.any():
+                report.add(column.title, 'пустое значение', chunk.index[empty].tolist())
+
+        check = column_check(column)
+        if check is None:
+            continue
+        problems = pd.Series(column_problems(values, column, check), index=chunk.index)
+        problems = problems[problems.notna()]
+        for message, rows in problems.groupby(problems, sort=False):
+            report.add(column.title, message, rows.index.tolist())
+
+
+def validate_chunks(chunks, columns):
+    """
+    Проверяет все куски файла и возвращает ValidationReport.
+    columns - столбцы схемы (ColumnSchema.upload_columns); обязательные
+    столбцы (nullable=False) должны быть в файле.
+    """
+    report = ValidationReport()
+    checked_header = False
+    for chunk in chunks:
+        if not checked_header:
+            report.missing_columns = [column.title for column in columns
+                                      if not column.nullable and column.title not in chunk.columns]
+            checked_header = True
+        validate_chunk(chunk, columns, report)
+    return report
+
+
+def validate_file(reader, columns, spill=None):
+    """
+    Проверяет файл до отправки: куски ExcelReader проверяются по мере чтения
+    и не хранятся в памяти, остается только ValidationReport. spill
+    (excel_reader.SpilledChunks) - куда сохранить прочитанные куски для
+    отправки, чтобы не разбирать книгу второй раз.
+    """
+    chunks = reader.iter_chunks()
+    if spill is not None:
+        chunks = map(spill.add, chunks)
+    return validate_chunks((clean_nulls(chunk) for chunk in chunks), columns)